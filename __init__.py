@@ -1,3 +1 @@
-from .postagger import tokens
-from .postagger import tokenizer
 from .app import Tagger
@@ -21,29 +21,37 @@ from termcolor import colored
 import click
 import time
 import argparse
+import multiprocessing
+import contextlib
+import importlib
+# app.py is run as a script from this directory, or imported from the package it's in, and finds the tagger's other modules either way
+if __package__:
+    from .postagger.output import OutputFiles, StreamOutput, OUTPUT_NAMES
+    from .postagger.pipeline import pipelined, QUEUE_DEPTH
+else:
+    from postagger.output import OutputFiles, StreamOutput, OUTPUT_NAMES
+    from postagger.pipeline import pipelined, QUEUE_DEPTH
 
 
 # Set trace to "True" if you want the constraint grammar module to print an extra output file showing which rules were used to decide on final pos tags.
 
 trace = False
 
+def local_module(name):
+    """ Import one of the tagger's own modules, such as "postagger.tokenizer", relative to the package app.py was imported from, if any """
+    if __package__:
+        return importlib.import_module("." + name, __package__)
+    return importlib.import_module(name)
+
 def set_language():
     language = click.prompt("Type [E] to run CorCenCC with an English-language interface...\nTeipiwch [C] i ddefnyddio CorCenCC gyda rhyngwyneb cyfrwng Cymraeg...\n")
     while language.lower() not in ["c", "e"]:
         language = click.prompt("Please press either the letter [E] or the letter [C] on your keyboard to set the interface language, then hit Enter.\nPwyswch y naill ai'r allwedd [C] neu'r allwedd [E] ar eich bysellfwrdd i ddewis iaith y rhyngwyneb, a wedyn bwrwch Enter.")
     return language
 
-def ask_user(language, lex_refresh):
+def ask_user(language):
     if language == "c":
         output_name = click.prompt("\n\nTeipiwch enw i'r ffolder allbwn")
-        if lex_refresh != "done":
-            lexica = click.prompt("Hoffech (ail-)adeiladu'r lecsica? ([I]e/[N]a, neu [H] am fwy o wybodaeth).")
-            if lexica.lower() in ["i", "ie"]:
-               lexica_refresh(language)
-            elif lexica.lower() == "h":
-                lexica = click.prompt("\nAil-adeiladwch y lecsica y tro cyntaf i chi rhedeg y cod.\nDylsech ail-adeiladu hefyd os fu newidiadau i'r geiriaduron ers y tro diwethaf i chi rhedeg y cod..\n\n(Os nad ydych yn sicr, dewiswch [I] i ail-adeiladu - does dim i'w golli ond amser!)\n\nTeipiwch [I] i ail-adeiladu, neu [N] i rhedeg y cod heb ail-adeiladu.")
-        else:
-            lexica = "n"
         unknown_reset = click.prompt("Hoffech ailosod y rhestr geiriau anhysbus? ([I]e/[N]a, neu [H] am fwy o wybodaeth).")
         if unknown_reset.lower() in ["i", "ie"]:
             unknown_reset = "yes"
@@ -53,14 +61,6 @@ def ask_user(language, lex_refresh):
             unknown_reset = click.prompt("\nSori, dwi ddim yn deall! Teipiwch [I] (ie) neu [N] (na), neu teipiwch [H] i gael help gyda'ch dewis.")
     else:
         output_name = click.prompt("\n\nPlease type a name for the output directory")
-        if lex_refresh != "done":
-            lexica = click.prompt("Do you want to (re)build the lexica? (Type [Y]/[N], or [H] for more information)")
-            if lexica.lower() in ["y", "yes"]:
-                lexica_refresh(language)
-            if lexica.lower() == "h":
-                lexica = click.prompt("\nRebuilding the lexica should be done when you first run this code.\nYou should also rebuild if you've made any changes to the dictionary files since the last time you ran this code.\n\n(If you're unsure whether the rebuild is needed, choose [Y]. Better safe than sorry!)\n\nType [Y] to rebuild, or [N] to run the code without rebuilding.")
-        else:
-            lexica = "n"
         unknown_reset = click.prompt("Do you want to reset the list of unknown words? (Type [Y]/[N], or [H] for more information)")
         if unknown_reset.lower() in ["y", "yes"]:
             unknown_reset = "yes"
@@ -69,7 +69,7 @@ def ask_user(language, lex_refresh):
         if unknown_reset.lower() not in ["y", "yes", "n", "no", "h", "help"]:
             unknown_reset = click.prompt("\nI'm sorry, I don't understand. Please type [Y] (yes) to reset the list of unknown words; [N] (no) to continue by adding to the existing list; or [H] for more information.")
 
-    return(output_name, lexica, unknown_reset)
+    return(output_name, unknown_reset)
 
 def setup_outputs(output_name, unknown_reset, language, prefix=None):
     """ Create the output directory and set up the required output files. Note that the default directory names are language-dependent."""
@@ -136,56 +136,339 @@ def setup_outputs(output_name, unknown_reset, language, prefix=None):
             unkfile.write("")
     return(readings_file, readings_post_cg_file, readings_post_cg_tracefile, tsv_file, unknown_file, map_file)
 
-def lexica_refresh(language, no_gaz=False):
-    from postagger.reference_lists.load_lexica import load_lexica
-    load_lexica(language, no_gaz)
+def size_text(size):
+    """ Format a number of bytes for progress messages """
+    for unit in ["B", "kB", "MB"]:
+        if size < 1000:
+            return "{:.0f} {}".format(size, unit) if unit == "B" else "{:.1f} {}".format(size, unit)
+        size /= 1000
+    return "{:.1f} GB".format(size)
+
+def lexica_refresh(language, no_gaz=False, mutations=None):
+    load_lexica = local_module("postagger.reference_lists.load_lexica").load_lexica
+    load_lexica(language, no_gaz, mutations=mutations)
+
+def lexica_update(language, mutations=None):
+    """ Rebuild any lexica whose source files have changed since they were last built (or which haven't been built yet), or whose mode for mutations isn't the one asked for """
+    update_lexica = local_module("postagger.reference_lists.load_lexica").update_lexica
+    return update_lexica(language, mutations)
 
-def run_tagger(text, file_id, readings_file, readings_post_cg_file, readings_post_cg_tracefile, tsv_file, unknown_file, file_name, filetotal, para_count, para_index):
+def paragraph_readings(para, sent_index):
+    """ Analyse each sentence of a paragraph, numbering the sentences from sent_index. Returns the CG input for each sentence, and the set of unknown words in the paragraph."""
+    sent_readings = []
+    unknown_list = set()
+    for sent in para.sentences():
+        analysed = sent.analyse()
+        for unk in analysed.unknowns():
+            unknown_list.add(unk)
+        sent_readings.append(analysed.cg_input(sent_index))
+        sent_index += 1
+    return sent_readings, unknown_list
+
+def analysed_units(text, batch=None, progress=None):
+    """ Analyse the paragraphs of a text, and yield them in the units in which they go to VISL CG-3: one paragraph at a time or, given a CGBatch, as many paragraphs as fill the batch. A unit is a list of (paragraph, sentence readings, unknown words) plus the batch holding them, or None. progress, if given, is called with each paragraph before it is analysed."""
+    if batch != None:
+        # the caller's batch only sets the limits, and is left empty for the next text
+        batch = batch.new()
+    sent_index = 1
+    unit = []
+    for para in text.paragraphs():
+        if progress != None:
+            progress(para)
+        sent_readings, unknown_list = paragraph_readings(para, sent_index)
+        unit.append((para, sent_readings, unknown_list))
+        if batch == None:
+            yield unit, None
+            unit = []
+        else:
+            batch.add(para, "".join(cg_in + "\n" for cg_in in sent_readings))
+            if batch.full():
+                yield unit, batch
+                # the full batch is handed on, so later paragraphs go into a new one
+                unit = []
+                batch = batch.new()
+        sent_index += len(sent_readings)
+    if unit != []:
+        yield unit, batch
+
+def run_unit(unit):
+    """ Send a unit from analysed_units to VISL CG-3. Returns the unit's paragraphs with each one's CG output, and the trace output if trace is on."""
+    items, batch = unit
+    cg_outputs = []
+    trace_output = ""
+    if batch == None:
+        for para, sent_readings, unknown_list in items:
+            cg_in_sents = "".join(cg_in + "\n" for cg_in in sent_readings)
+            cg_outputs.append(para.cg_output(cg_in_sents))
+            if trace == True:
+                trace_output += para.cg_output_trace(cg_in_sents)
+    else:
+        cg_outputs = [cg_out for para, cg_out in batch.cg_output()]
+        if trace == True:
+            trace_output = batch.cg_output_trace()
+    return items, cg_outputs, trace_output
+
+def write_unit(tagged_unit, file_id, outputs):
+    """ Write the results of run_unit to the outputs """
+    items, cg_outputs, trace_output = tagged_unit
+    for (para, sent_readings, unknown_list), cg_out in zip(items, cg_outputs):
+        for cg_in in sent_readings:
+            outputs.write("readings", cg_in)
+        outputs.write("post_cg", cg_out)
+        outputs.write("tsv", para.tsv_output(cg_out, file_id))
+        unk_items = ""
+        for unk_item in sorted(unknown_list):
+            unk_items += unk_item
+            unk_items += "\n"
+        outputs.write("unknown", unk_items)
+    if trace_output != "":
+        outputs.write("trace", trace_output)
+
+def run_tagger(text, file_id, outputs, file_name, filetotal, bytes_total, bytes_done, batch=None, show_progress=True, pipeline=None):
+    """ Tag a text, writing the results to an OutputFiles. If a CGBatch is given, paragraphs are collected into it and sent to VISL CG-3 whenever it fills up (and at the end of the text), instead of one paragraph at a time. If pipeline is given, it is a list of queue depths: analysis, VISL CG-3 and writing then run side by side in separate threads, so that each paragraph is analysed while the one before it is in VISL CG-3. Progress is measured in bytes of input, against the total size of the input files, starting from bytes_done."""
     if language == "c":
         msg = "Tagio {}".format(file_name[:-4])
     else: 
         msg = "Tagging {}".format(file_name[:-4])
-    sent_index = 1
-    for para in text.paragraphs():
+    done = [bytes_done]
+    def progress(para):
         if filetotal > 10:
-            curr_pc = int("{:.0f}".format((para_index/para_count)*100))
+            done[0] += para.size()
+            curr_pc = int("{:.0f}".format(min(done[0]/max(bytes_total, 1), 1)*100))
             sys.stdout.flush()
             sys.stdout.write("\r{} [{}% o'r cyfanswm]\r".format(msg, curr_pc))
-            para_index += 1
         else:
             print(msg, end='\r')
-        cg_in_sents = ""
-        unknown_list = set()
-        for sent in para.sentences():
-            unknowns = sent.unknowns()
-            for unk in unknowns:
-                unknown_list.add(unk)
-            cg_in = sent.cg_input(sent_index)
-            cg_in_sents += cg_in
-            cg_in_sents += "\n"
-            sent_index += 1
-            with open(readings_file, 'a') as r_outfile:
-                r_outfile.write(cg_in)
-        cg_out = para.cg_output(cg_in_sents)
-        with open(readings_post_cg_file, 'a') as cg_outfile:
-             cg_outfile.write(cg_out)
-        if trace == True:
-            with open(readings_post_cg_tracefile, 'a') as cg_tracefile:
-                cg_tracefile.write(para.cg_output_trace(cg_in_sents))
-        with open(tsv_file, 'a') as tsv_outfile:
-            tsv_outfile.write(para.tsv_output(cg_out, file_id))
-        unknown_list = sorted(unknown_list)
-        with open(unknown_file, 'a') as unk_file:
-            unk_items = ""
-            for unk_item in unknown_list:
-                unk_items += unk_item
-                unk_items += "\n"
-            unk_file.write(unk_items)
-    return para_index
+    if show_progress == True:
+        units = analysed_units(text, batch, progress)
+    else:
+        units = analysed_units(text, batch)
+    if pipeline == None:
+        tagged_units = (run_unit(unit) for unit in units)
+    else:
+        tagged_units = pipelined(units, [run_unit], pipeline)
+    for tagged_unit in tagged_units:
+        write_unit(tagged_unit, file_id, outputs)
 
+def run_stream(instream, outstream, output_format, preprocess_corcencc, batch=None, pipeline=None):
+    """ Tag text from instream one line (paragraph) at a time, writing each paragraph's TSV output or CG readings to outstream as soon as it has been tagged."""
+    tokenizer = local_module("postagger.tokenizer")
+    if output_format == "cg":
+        outputs = StreamOutput(outstream, ["post_cg"])
+    else:
+        outputs = StreamOutput(outstream, ["tsv"])
+    text = tokenizer.StreamedText(instream, "stdin", "000001", preproc=preprocess_corcencc)
+    try:
+        with outputs:
+            run_tagger(text, "000001", outputs, "stdin", 0, 0, 0, batch, show_progress=False, pipeline=pipeline)
+    except BrokenPipeError:
+        # the next program in the pipeline has stopped reading, so there's nobody left to write to
+        sys.stdout = open(os.devnull, 'w')
 
-if __name__ == "__main__":
-    start_time = time.perf_counter()
+def init_worker(worker_language):
+    """ Set up a worker process for --jobs. Workers started with "spawn" rather than "fork" don't inherit the interface language from the main process."""
+    global language
+    language = worker_language
+
+def tag_shard(job):
+    """ Tag one input file in a worker process. Results go to shard files of the worker's own, which are returned so that the main process can merge them in input order."""
+    tokenizer = local_module("postagger.tokenizer")
+    file, file_name, file_id, shard_dir, output_files, preprocess_corcencc, batch_limits, pipeline = job
+    shard_dir.mkdir(parents=True, exist_ok=True)
+    shard_files = []
+    for output_file in output_files:
+        if output_file == None:
+            shard_files.append(None)
+        else:
+            shard_file = Path(shard_dir/output_file.name)
+            with open(shard_file, 'w') as sfile:
+                sfile.write("")
+            shard_files.append(shard_file)
+    batch = None
+    if batch_limits != None:
+        batch = tokenizer.CGBatch(max_cohorts=batch_limits[0], max_bytes=batch_limits[1])
+    with open(file, 'r') as infile, OutputFiles(zip(OUTPUT_NAMES, shard_files)) as shard_outputs:
+        text = tokenizer.StreamedText(infile, file_name, file_id, preproc=preprocess_corcencc)
+        run_tagger(text, file_id, shard_outputs, file_name, 0, 0, 0, batch, show_progress=False, pipeline=pipeline)
+    # CacheInfo can't be pickled, so its counts are sent back as a plain tuple
+    return shard_files, os.getpid(), tuple(tokenizer.entry_cache_info())
+
+def merge_shard(shard_files, outputs):
+    """ Append a finished shard to the main output files, then remove it """
+    for name, shard_file in zip(OUTPUT_NAMES, shard_files):
+        if shard_file != None:
+            outputs.append_file(name, shard_file)
+            shard_file.unlink()
+    shard_files[0].parent.rmdir()
+    outputs.checkpoint()
+
+def run_parallel(input_files, jobs, outputs, preprocess_corcencc, batch_limits, pipeline=None):
+    """ Tag the input files in a pool of worker processes. Each worker writes one file at a time to its own shard; shards are merged in input order as soon as each one (and all the files before it) is finished, so the outputs are the same as for a single-process run."""
+    filetotal = len(input_files)
+    output_files = outputs.paths()
+    shard_root = Path(output_files[0].parent/"shards")
+    job_list = []
+    cache_stats = {}
+    for i, file in enumerate(input_files):
+        file_name = os.path.basename(str(file))
+        file_id = str(i+1)
+        while len(file_id) < 6:
+            file_id = "0" + file_id
+        outputs.write("map", "{}\t{}\n".format(file_name, file_id))
+        job_list.append((file, file_name, file_id, Path(shard_root/file_id), output_files, preprocess_corcencc, batch_limits, pipeline))
+    with multiprocessing.Pool(jobs, initializer=init_worker, initargs=(language,)) as pool:
+        for i, (shard_files, worker, cache_info) in enumerate(pool.imap(tag_shard, job_list)):
+            merge_shard(shard_files, outputs)
+            # each worker's cache counts are running totals, so only the latest from each is kept
+            cache_stats[worker] = cache_info
+            if language == "c":
+                print(f"Ffeil {str(i+1)} o {filetotal} ffeil wedi'i thagio...")
+            else:
+                print(f"File {str(i+1)} of {filetotal} files tagged...")
+    if shard_root.exists():
+        shard_root.rmdir()
+    return list(cache_stats.values())
+
+def cache_report(cache_infos):
+    """ Print the hit rate of the entry lookup cache, summed over all the processes that did any tagging """
+    hits = sum(info[0] for info in cache_infos)
+    misses = sum(info[1] for info in cache_infos)
+    size = sum(info[3] for info in cache_infos)
+    lookups = hits + misses
+    rate = 0 if lookups == 0 else 100 * hits / lookups
+    if language == "c":
+        print(f"\nStorfa cofnodion: {hits} o {lookups} chwiliad o'r storfa ({rate:.1f}%), {misses} yn y geiriaduron, {size} ffurf yn y storfa.\n")
+    else:
+        print(f"\nEntry cache: {hits} of {lookups} lookups from the cache ({rate:.1f}%), {misses} from the dictionaries, {size} forms cached.\n")
+
+
+class TaggedParagraph:
+    """ The tagger's results for one paragraph """
+    def __init__(self, para, file_id, cg_input, cg_output, unknowns):
+        self._para = para
+        self._file_id = file_id
+        self._cg_input = cg_input
+        self._cg_output = cg_output
+        self._unknowns = unknowns
+
+    def text(self):
+        return self._para.text()
+
+    def paragraph(self):
+        return self._para
+
+    def tokens(self):
+        """ Returns the tagged tokens of the paragraph, as TaggedToken tuples """
+        return self._para.tagged_tokens(self._cg_output)
+
+    def unknowns(self):
+        """ Returns the words in the paragraph that aren't in any of the lexica, in alphabetical order """
+        return sorted(self._unknowns)
+
+    def cg_input(self):
+        return self._cg_input
+
+    def cg_output(self):
+        return self._cg_output
+
+    def tsv(self):
+        return self._para.tsv_output(self._cg_output, self._file_id)
+
+class Tagger:
+    """ The tagger, for use from other Python code. The lexica are checked (and rebuilt if they are out of date) and VISL CG-3 is started once, when the Tagger is made, and every call after that reuses them. Run Tagger.run() for the command-line tagger."""
+    def __init__(self, language="c", preprocess=False, batch_limits=None, mutations=None):
+        self._language = language
+        if preprocess == True:
+            self._preproc = "y"
+        else:
+            self._preproc = "n"
+        self._batch_limits = batch_limits
+        lexica_update(language, mutations)
+        # imported here so that the lexica are up to date before they are loaded
+        tokenizer = local_module("postagger.tokenizer")
+        self._tokenizer = tokenizer
+        self._engine = tokenizer.cg_engine()
+        self._engine.start()
+
+    def tag_text(self, text, file_name="text.txt", file_id="000001"):
+        """ Tag a string, in which each line is a paragraph. Returns a list of TaggedParagraph."""
+        return self.tag_paragraphs([text], file_name, file_id)
+
+    def tag_file(self, path, file_name=None, file_id="000001"):
+        """ Tag a text file, reading it a line at a time. Returns a list of TaggedParagraph."""
+        if file_name == None:
+            file_name = os.path.basename(str(path))
+        with open(path, 'r') as infile:
+            return self.tag_paragraphs(infile, file_name, file_id)
+
+    def tag_paragraphs(self, paragraphs, file_name="text.txt", file_id="000001"):
+        """ Tag paragraphs given as strings. Sentences are numbered through all the paragraphs, as they are within a file. Returns a list of TaggedParagraph."""
+        return list(self.iter_paragraphs(paragraphs, file_name, file_id))
+
+    def iter_paragraphs(self, paragraphs, file_name="text.txt", file_id="000001"):
+        """ Like tag_paragraphs, but yields each TaggedParagraph as soon as it's ready """
+        batch = None
+        if self._batch_limits != None:
+            batch = self._tokenizer.CGBatch(max_cohorts=self._batch_limits[0], max_bytes=self._batch_limits[1])
+        pending = []
+        sent_index = 1
+        for para_text in paragraphs:
+            for para in self._tokenizer.Text(para_text, file_name, file_id, preproc=self._preproc).paragraphs():
+                sent_readings, unknowns = paragraph_readings(para, sent_index)
+                cg_in = "".join(cg + "\n" for cg in sent_readings)
+                if batch == None:
+                    yield TaggedParagraph(para, file_id, cg_in, para.cg_output(cg_in), unknowns)
+                else:
+                    batch.add(para, cg_in)
+                    pending.append((cg_in, unknowns))
+                    if batch.full():
+                        yield from self._run_batch(batch, pending, file_id)
+                sent_index += len(sent_readings)
+        if batch != None:
+            yield from self._run_batch(batch, pending, file_id)
+
+    def tag_texts(self, texts, file_name="text.txt", file_id="000001"):
+        """ Tag several separate texts with a single run of VISL CG-3. Each text numbers its sentences from 1, and every paragraph is a window of its own in VISL CG-3, so each text is tagged exactly as if it had been tagged on its own. Returns a list of TaggedParagraph lists, one for each text."""
+        batch = self._tokenizer.CGBatch()
+        pending = []
+        for t, text in enumerate(texts):
+            sent_index = 1
+            for para in self._tokenizer.Text(text, file_name, file_id, preproc=self._preproc).paragraphs():
+                sent_readings, unknowns = paragraph_readings(para, sent_index)
+                cg_in = "".join(cg + "\n" for cg in sent_readings)
+                batch.add(para, cg_in)
+                pending.append((t, cg_in, unknowns))
+                sent_index += len(sent_readings)
+        results = [[] for text in texts]
+        if not batch.empty():
+            for (para, cg_out), (t, cg_in, unknowns) in zip(batch.cg_output(), pending):
+                results[t].append(TaggedParagraph(para, file_id, cg_in, cg_out, unknowns))
+        return results
+
+    def _run_batch(self, batch, pending, file_id):
+        if not batch.empty():
+            # the batch gives back its paragraphs in the order they were added
+            for (para, cg_out), (cg_in, unknowns) in zip(batch.cg_output(), pending):
+                yield TaggedParagraph(para, file_id, cg_in, cg_out, unknowns)
+        batch.clear()
+        pending.clear()
+
+    def close(self):
+        self._engine.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    @staticmethod
+    def run():
+        main()
+
+def main():
+    """ The command-line tagger """
+    global language
     parser = argparse.ArgumentParser(description="CyTag: tagiwr rhan ymadrodd i'r Gymraeg.\nCyTag: a Welsh part-of-speech tagger.")
     # The -c flag allows the user to bypass the prompts for information such as output filenames. 
     # DEFAULTS: 
@@ -194,13 +477,65 @@ if __name__ == "__main__":
     # reset the list of unknown words before running the code
     # These defaults can be changed below.
     parser.add_argument("-c", "--cyf", action='store_const', const=1, help="Rhedeg gyda'r rhagosodiadau. / Run with default values.")
-    # The lexica should be rebuilt every time the main lexicon files are changed. Until this is done, the code will continue to use cached versions of the lexicon files.
+    # Lexica whose source files have changed are rebuilt automatically at startup. This flag forces a rebuild of the Welsh and English lexica even if nothing seems to have changed.
     parser.add_argument("-l", "--lex", action='store_const', const=1, help="Ail-adeiladu'r lecsica Cymraeg a Saesneg. / Rebuild the Welsh and English lexica.")
+    # The Welsh lexicon can hold every mutated form of each word ("expanded", the default) or only the radical forms, with mutated forms worked out as they are looked up ("on-the-fly"), which uses less memory but more time. Choosing a different mode from the one the lexicon was built with rebuilds it; otherwise the last mode chosen is kept.
+    parser.add_argument("--treigladau", choices=("expanded", "on-the-fly"), help="Cadw pob ffurf dreigledig yn y lecsicon Cymraeg, neu eu cyfrif wrth chwilio. / Store every mutated form in the Welsh lexicon, or work them out on lookup.")
     parser.add_argument("-p", "--pre", action='store_const', const=1, help="Cyn-brosesu data CorCenCC. / Pre-process CorCenCC data.")
     parser.add_argument("-b", "--blaen", help="Gosod blaenddod i ddewis is-set o ffeiliau mewnbwn. / Set a prefix to select a subset of input files.")
+    # Batching sends many paragraphs to the constraint grammar at once, which saves the fixed cost of each CG call when paragraphs are short. With -s alone, each input file is sent as one batch; --swp-carfannau and --swp-beitiau cap the size of a batch.
+    parser.add_argument("-s", "--swp", action='store_const', const=1, help="Anfon ffeil gyfan i'r gramadeg cyfyngiadau mewn un swp. / Send each file to the constraint grammar as one batch.")
+    parser.add_argument("--swp-carfannau", type=int, help="Uchafswm y carfannau mewn swp. / Maximum number of cohorts in a batch.")
+    parser.add_argument("--swp-beitiau", type=int, help="Uchafswm y beitiau mewn swp. / Maximum number of bytes in a batch.")
+    # With -j, input files are shared out between several worker processes, each with its own constraint grammar process. Use -j 0 for one worker per CPU.
+    parser.add_argument("-j", "--jobs", type=int, default=1, help="Nifer y prosesau i dagio ffeiliau ochr yn ochr. / Number of processes to tag files in parallel.")
+    # Output is buffered and written out at the end of each input file. --fflysio also writes it out every so many seconds, and --cydamseru waits at the end of each file until the operating system has put the output on disk.
+    parser.add_argument("--fflysio", type=float, help="Ysgrifennu'r allbwn bob hyn a hyn o eiliadau. / Write out buffered output every this many seconds.")
+    parser.add_argument("--cydamseru", action='store_const', const=1, help="Cydamseru'r ffeiliau allbwn â'r ddisg ar ddiwedd pob ffeil. / Sync the output files to disk at the end of each file.")
+    parser.add_argument("--ystadegau", action='store_const', const=1, help="Dangos ystadegau storfa'r cofnodion geiriadur. / Show dictionary entry cache statistics.")
+    # --llif runs the tagger as a filter: text is read from stdin, and results are written to stdout as each line (paragraph) is tagged. It uses the default settings, asks no questions, and sends all its messages to stderr.
+    parser.add_argument("--llif", action='store_const', const=1, help="Tagio testun o stdin ac ysgrifennu'r canlyniadau i stdout. / Tag text from stdin and write the results to stdout.")
+    parser.add_argument("--fformat", choices=["tsv", "cg"], default="tsv", help="Fformat yr allbwn gyda --llif. / Output format for --llif.")
+    # --gweinydd runs the tagger as a service, which tags text sent to it over HTTP on a local port (or, with --soced, a Unix socket). See server.py for the details.
+    parser.add_argument("--gweinydd", action='store_const', const=1, help="Rhedeg y tagiwr fel gwasanaeth HTTP. / Run the tagger as an HTTP service.")
+    parser.add_argument("--gwesteiwr", default="127.0.0.1", help="Y cyfeiriad i'r gwasanaeth wrando arno. / Address for the service to listen on.")
+    parser.add_argument("--porth", type=int, default=8080, help="Y porth i'r gwasanaeth wrando arno. / Port for the service to listen on.")
+    parser.add_argument("--soced", help="Gwrando ar soced Unix yn lle porth. / Listen on a Unix socket instead of a port.")
+    parser.add_argument("--ciw", type=int, default=64, help="Uchafswm y ceisiadau sy'n cael aros am y tagiwr. / Maximum number of requests waiting for the tagger.")
+    parser.add_argument("--terfyn-amser", type=float, default=30.0, help="Yr eiliadau y caiff cais aros am ei ganlyniadau. / Seconds a request may wait for its results.")
+    # --piblinell runs the analysis of each paragraph in one thread and VISL CG-3 in another, so that the next paragraph is analysed while the current one is in the constraint grammar, and the results are written as they come out. It takes the number of units (paragraphs, or batches with -s) that may wait for the constraint grammar and for writing: one number for both, or one for each.
+    parser.add_argument("--piblinell", type=int, nargs="*", help="Dadansoddi a rhedeg y gramadeg cyfyngiadau ochr yn ochr, gyda'r ciwiau o'r hyd hwn. / Analyse text and run the constraint grammar side by side, with queues of this depth.")
     args = parser.parse_args()
     prefix = None
-    lex_refresh = None
+    if args.piblinell == []:
+        args.piblinell = [QUEUE_DEPTH, QUEUE_DEPTH]
+    elif args.piblinell != None and len(args.piblinell) == 1:
+        args.piblinell = args.piblinell * 2
+    if args.gweinydd == 1:
+        language = "c"
+        if args.lex == 1:
+            lexica_refresh(language, no_gaz=True, mutations=args.treigladau)
+        serve = local_module("server").serve
+        tagger = Tagger(language, preprocess=args.pre == 1, mutations=args.treigladau)
+        if args.soced != None:
+            print("Mae CyTag yn gwrando ar {} / CyTag is listening on {}".format(args.soced, args.soced))
+        else:
+            print("Mae CyTag yn gwrando ar {}:{} / CyTag is listening on {}:{}".format(args.gwesteiwr, args.porth, args.gwesteiwr, args.porth))
+        serve(tagger, host=args.gwesteiwr, port=args.porth, socket_path=args.soced, queue_size=args.ciw, timeout=args.terfyn_amser)
+        tagger.close()
+        sys.exit(0)
+    if args.llif == 1:
+        language = "c"
+        with contextlib.redirect_stdout(sys.stderr):
+            if args.lex == 1:
+                lexica_refresh(language, no_gaz=True, mutations=args.treigladau)
+            lexica_update(language, args.treigladau)
+        tokenizer = local_module("postagger.tokenizer")
+        batch = None
+        if args.swp_carfannau != None or args.swp_beitiau != None:
+            batch = tokenizer.CGBatch(max_cohorts=args.swp_carfannau, max_bytes=args.swp_beitiau)
+        run_stream(sys.stdin, sys.stdout, args.fformat, "y" if args.pre == 1 else "n", batch, args.piblinell)
+        sys.exit(0)
     if args.cyf == 1:
         # To change defaults:
         # set language to "e" for English messages and  directory/file names
@@ -212,9 +547,7 @@ if __name__ == "__main__":
     else:
         language = set_language().lower()
     if args.lex == 1:
-        # This flag allows the user to refresh the lexica without refreshing the gazetteers. The gazetters are slow to refresh, so this option is the best one if only the Welsh or English lexicon file has been changed.
-        lexica_refresh(language, no_gaz=True)
-        lex_refresh = "done"
+        lexica_refresh(language, no_gaz=True, mutations=args.treigladau)
     if args.cyf != 1:
         if language == "c":
             prefs = "\n\n## GOSODWCH EICH DEWISIADAU ##\n\n"
@@ -222,7 +555,7 @@ if __name__ == "__main__":
             prefs = "\n\n## SET PREFERENCES ##\n\n"
         prefs_message = colored(prefs, attrs=['reverse', 'bold'])
         print(prefs_message) 
-        output_name, lexica, unknown_reset = ask_user(language, lex_refresh)
+        output_name, unknown_reset = ask_user(language)
 
     if args.blaen != None:
         globnames = args.blaen + "*.txt"
@@ -255,27 +588,26 @@ if __name__ == "__main__":
     startup_message = colored(startup, attrs=['reverse', 'bold'])
     print(startup_message)
 
+    lexica_update(language, args.treigladau)
+
     # imports happen here so that they take account of reloaded lexica when applicable #
 
-    import postagger.tokenizer as tokenizer
-    import postagger.preprocessor as preprocessor
+    tokenizer = local_module("postagger.tokenizer")
+    preprocessor = local_module("postagger.preprocessor")
     
-    para_count = 0
     if language == "c":
         print(f"\n\nCasglu mewnbynnau...\n\n")
     else: 
         print(f"\n\nCollecting input files...\n\n")
 
+    # Progress is measured against the size of the input files, which needs no more than a stat of each one
     filetotal = len(input_files)
-    for file in input_files:
-        with open (file, 'r') as infile:
-            rawtext = infile.read()
-            text = tokenizer.Text(rawtext, infile.name, "000")
-            para_count += len(text.paragraphs())
+    file_sizes = [os.path.getsize(file) for file in input_files]
+    bytes_total = sum(file_sizes)
     if language == "c":
-        print(f"{para_count} paragraff i dagio, o fewn {filetotal} ffeil...\n\n")
+        print(f"{filetotal} ffeil i dagio, {size_text(bytes_total)} i gyd...\n\n")
     else: 
-        print(f"{para_count} paragraph(s) to tag in {filetotal} files...\n\n")
+        print(f"{filetotal} file(s) to tag, {size_text(bytes_total)} in total...\n\n")
     
     pc = 0
 
@@ -284,7 +616,26 @@ if __name__ == "__main__":
     else: 
         print(f"CyTag is tagging your input files...\n\n")
 
-    para_index = 1
+    batch = None
+    batch_limits = None
+    if args.swp == 1 or args.swp_carfannau != None or args.swp_beitiau != None:
+        batch_limits = (args.swp_carfannau, args.swp_beitiau)
+        batch = tokenizer.CGBatch(max_cohorts=args.swp_carfannau, max_bytes=args.swp_beitiau)
+
+    pipeline = args.piblinell
+    jobs = args.jobs
+    if jobs < 1:
+        jobs = os.cpu_count()
+    output_paths = dict(zip(OUTPUT_NAMES, (readings_file, readings_post_cg_file, readings_post_cg_tracefile, tsv_file, unknown_file)))
+    output_paths["map"] = map_file
+    outputs = OutputFiles(output_paths, flush_interval=args.fflysio, fsync=args.cydamseru == 1)
+    if jobs > 1 and filetotal > 1:
+        cache_infos = run_parallel(input_files, min(jobs, filetotal), outputs, preprocess_corcencc, batch_limits, pipeline)
+        input_files = []
+    else:
+        cache_infos = []
+
+    bytes_done = 0
     for i, file in enumerate(input_files):
         if language == "c":
             print(f"Ffeil {str(i+1)} o {filetotal} ffeil...\n\n")
@@ -294,11 +645,19 @@ if __name__ == "__main__":
         file_id = str(i+1)
         while len(file_id) < 6:
             file_id = "0" + file_id
-        with open (map_file, 'a') as mfile:
-            mfile.write("{}\t{}\n".format(file_name, file_id))
+        outputs.write("map", "{}\t{}\n".format(file_name, file_id))
         with open (file, 'r') as infile:
-            rawtext = infile.read()                
-            text = tokenizer.Text(rawtext, file_name, file_id, preproc=preprocess_corcencc)
-            para_index = run_tagger(text, file_id, readings_file, readings_post_cg_file, readings_post_cg_tracefile, tsv_file, unknown_file, file_name, filetotal, para_count, para_index)
-
+            # paragraphs are read from the file as they're tagged, so a large file is never held in memory as a whole
+            text = tokenizer.StreamedText(infile, file_name, file_id, preproc=preprocess_corcencc)
+            run_tagger(text, file_id, outputs, file_name, filetotal, bytes_total, bytes_done, batch, pipeline=pipeline)
+        outputs.checkpoint()
+        # progress through each file is counted on from the sizes of the files before it, since paragraph breaks aren't counted as paragraphs are tagged
+        bytes_done += file_sizes[i]
+    outputs.close()
+    if args.ystadegau == 1:
+        if input_files != []:
+            cache_infos.append(tokenizer.entry_cache_info())
+        cache_report(cache_infos)
 
+if __name__ == "__main__":
+    main()
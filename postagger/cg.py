@@ -0,0 +1,226 @@
+import os
+import shutil
+import subprocess
+import threading
+import atexit
+import hashlib
+from pathlib import Path
+from termcolor import colored
+
+grammar_file = "{}/grammar/cy_grammar_2021".format(os.path.dirname(os.path.abspath(__file__)))
+# Compiled copies of the grammar are kept here, named after a hash of the grammar source, so that a changed grammar is recompiled automatically.
+grammar_cache = Path("{}/grammar/cache".format(os.path.dirname(os.path.abspath(__file__))))
+
+# VISL CG-3 stream command: the current window is processed and written out, and the command line itself is passed through to the output, so it marks the end of each batch of readings.
+FLUSH = "<STREAMCMD:FLUSH>"
+
+def vislcg3_location():
+    location = shutil.which("vislcg3")
+    if location == None:
+        raise RuntimeError("Could not find vislcg3. Please install VISL CG-3 before running the tagger.")
+    return location
+
+def check_grammar_error(cg_error):
+    """ Raise an error if vislcg3 reported that the grammar could not be parsed """
+    if b"Grammar could not be parsed" in cg_error:
+        err_msg = cg_error.decode("utf-8")
+        msg = colored("There is a problem with the constraint grammar!\nPlease fix before rerunning the code.", attrs=['reverse', 'bold'])
+        out_msg = "\n\n{}\n\n{}".format(msg, err_msg)
+        raise RuntimeError(out_msg)
+
+def compiled_grammar():
+    """ Return the path to VISL CG-3's binary form of the grammar, compiling it into the cache first if the grammar source has changed since it was last compiled."""
+    with open(grammar_file, "rb") as grammar:
+        digest = hashlib.sha256(grammar.read()).hexdigest()[:16]
+    grammar_name = os.path.basename(grammar_file)
+    binary = grammar_cache/"{}.{}.cg3b".format(grammar_name, digest)
+    if not binary.exists():
+        grammar_cache.mkdir(exist_ok=True)
+        # compile to a temporary name first, so that parallel workers never load a half-written grammar
+        partial = grammar_cache/"{}.{}.{}.part".format(grammar_name, digest, os.getpid())
+        compile_process = subprocess.run([vislcg3_location(), "--grammar-only", "-v", "0", "-g", grammar_file, "--grammar-bin", str(partial)], stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+        check_grammar_error(compile_process.stderr)
+        if compile_process.returncode != 0 or not partial.exists():
+            raise RuntimeError("vislcg3 could not compile the grammar.\n\n{}".format(compile_process.stderr.decode("utf-8", errors="replace")))
+        os.replace(partial, binary)
+        for old in grammar_cache.glob("{}.*.cg3b".format(grammar_name)):
+            if old != binary:
+                old.unlink(missing_ok=True)
+    return binary
+
+class CGEngine:
+    """ A long-lived VISL CG-3 process. Readings are streamed through it in batches, and each batch is followed by a flush command, which ends VISL CG-3's window there, so that every batch is disambiguated on its own and its output can be matched back to the input that produced it. If the process dies, it is restarted and the batches are retried once."""
+
+    def __init__(self, trace=False):
+        self._trace = trace
+        self._process = None
+        self._stderr = []
+        self._stderr_thread = None
+
+    def trace(self):
+        return self._trace
+
+    def command(self):
+        command = [vislcg3_location(), '--soft-limit', '45', '--hard-limit', "100"]
+        if self._trace == True:
+            command.append("--trace")
+        command += ["-B", "-v", '0', '-g', str(compiled_grammar())]
+        return command
+
+    def start(self):
+        self._stderr = []
+        self._process = subprocess.Popen(self.command(), stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        # stderr is drained in the background so that vislcg3 can never block on a full pipe
+        self._stderr_thread = threading.Thread(target=self._drain_stderr, args=(self._process.stderr, self._stderr), daemon=True)
+        self._stderr_thread.start()
+
+    def _drain_stderr(self, stream, lines):
+        for line in iter(stream.readline, b""):
+            lines.append(line)
+
+    def running(self):
+        return self._process != None and self._process.poll() == None
+
+    def close(self):
+        if self._process != None:
+            try:
+                self._process.stdin.close()
+            except (BrokenPipeError, OSError):
+                pass
+            try:
+                self._process.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                self._process.kill()
+                self._process.wait()
+            self._process.stdout.close()
+            self._process = None
+
+    def _write(self, data):
+        try:
+            self._process.stdin.write(data)
+            self._process.stdin.flush()
+        except (BrokenPipeError, OSError):
+            # the reader will see end-of-file and report the failure
+            pass
+
+    def _exchange(self, batches):
+        """ Send batches of readings, each followed by a flush, and collect everything vislcg3 writes for each one before its flush marker. Returns None if the process died part-way through."""
+        data = []
+        for cg_readings in batches:
+            if not cg_readings.endswith("\n") and cg_readings != "":
+                cg_readings += "\n"
+            data.append(cg_readings + FLUSH + "\n")
+        data = "".join(data).encode("utf-8")
+        # writing happens on a separate thread, otherwise a large batch could fill both pipes and deadlock
+        writer = threading.Thread(target=self._write, args=(data,), daemon=True)
+        writer.start()
+        outputs = []
+        output = []
+        flush_marker = FLUSH.encode("utf-8")
+        for line in iter(self._process.stdout.readline, b""):
+            if line.rstrip(b"\r\n") == flush_marker:
+                outputs.append(b"".join(output).decode("utf-8"))
+                output = []
+                if len(outputs) == len(batches):
+                    writer.join()
+                    return outputs
+            else:
+                output.append(line)
+        writer.join()
+        return None
+
+    def _exit_error(self):
+        self._process.wait()
+        if self._stderr_thread != None:
+            self._stderr_thread.join(timeout=1)
+        cg_error = b"".join(self._stderr)
+        check_grammar_error(cg_error)
+        return cg_error.decode("utf-8", errors="replace")
+
+    def run(self, cg_readings):
+        """ Given a set of CG-formatted readings, return VISL CG-3's output for them """
+        return self.run_batches([cg_readings])[0]
+
+    def run_batches(self, batches):
+        """ Given a list of sets of CG-formatted readings, return a list of VISL CG-3's output for each, as if each set had been run on its own """
+        if batches == []:
+            return []
+        for attempt in range(2):
+            if not self.running():
+                self.start()
+            cg_outputs = self._exchange(batches)
+            if cg_outputs != None:
+                return cg_outputs
+            err_msg = self._exit_error()
+            self.close()
+        raise RuntimeError("vislcg3 stopped unexpectedly while processing input.\n\n{}".format(err_msg))
+
+class CGBatch:
+    """ Collects the CG input for several paragraphs so that VISL CG-3 can process them in one go, then hands each paragraph back its own share of the output. Each paragraph is sent with a flush of its own, so it is disambiguated exactly as it would be if it were run alone. The batch counts as full once it holds max_cohorts cohorts or max_bytes bytes of input; with neither limit set, it only runs when asked to."""
+
+    def __init__(self, max_cohorts=None, max_bytes=None):
+        self._max_cohorts = max_cohorts
+        self._max_bytes = max_bytes
+        self._paragraphs = []
+        self._readings = []
+        self._cohorts = 0
+        self._bytes = 0
+
+    def add(self, para, cg_readings):
+        self._paragraphs.append(para)
+        self._readings.append(cg_readings)
+        self._cohorts += cg_readings.count('\n"<') + cg_readings.startswith('"<')
+        self._bytes += len(cg_readings.encode("utf-8"))
+
+    def new(self):
+        """ Returns an empty batch with the same limits as this one """
+        return CGBatch(max_cohorts=self._max_cohorts, max_bytes=self._max_bytes)
+
+    def empty(self):
+        return self._paragraphs == []
+
+    def full(self):
+        if self._max_cohorts != None and self._cohorts >= self._max_cohorts:
+            return True
+        if self._max_bytes != None and self._bytes >= self._max_bytes:
+            return True
+        return False
+
+    def readings(self):
+        """ Returns the CG input of each paragraph in the batch, in order """
+        return list(self._readings)
+
+    def clear(self):
+        self._paragraphs = []
+        self._readings = []
+        self._cohorts = 0
+        self._bytes = 0
+
+    def split(self, cg_outputs):
+        """ Given VISL CG-3's output for each paragraph of the batch, in input order, return a list of (paragraph, cg_output) pairs """
+        if len(cg_outputs) != len(self._paragraphs):
+            raise ValueError("Expected VISL CG-3 output for {} paragraphs, got {}".format(len(self._paragraphs), len(cg_outputs)))
+        return list(zip(self._paragraphs, cg_outputs))
+
+    def cg_output(self):
+        return self.split(cg_engine().run_batches(self._readings))
+
+    def cg_output_trace(self):
+        return "".join(cg_engine(trace=True).run_batches(self._readings))
+
+_engines = {}
+
+def cg_engine(trace=False):
+    """ Return this process's shared CG engine, starting it on first use. Engines are keyed by process id so that forked workers start their own vislcg3 rather than sharing the parent's pipes."""
+    key = (os.getpid(), trace)
+    if key not in _engines:
+        _engines[key] = CGEngine(trace=trace)
+    return _engines[key]
+
+def close_engines():
+    for key in list(_engines):
+        if key[0] == os.getpid():
+            _engines[key].close()
+        del _engines[key]
+
+atexit.register(close_engines)
@@ -0,0 +1,100 @@
+import os
+import time
+import shutil
+
+# The tagger's output files, in the order used wherever they are passed around together
+OUTPUT_NAMES = ("readings", "post_cg", "trace", "tsv", "unknown")
+# Size of the write buffer kept for each output file
+BUFFER_SIZE = 1024*1024
+
+class OutputFiles:
+    """ The output files of a tagging run, each opened once and kept open until the run ends. Writes are buffered, and the buffers are flushed at checkpoints (the end of each input file), when flush_interval seconds have passed since the last flush, and when the files are closed. With fsync=True, checkpoints also wait for the data to reach the disk, so that everything written before a checkpoint survives a crash."""
+
+    def __init__(self, paths, flush_interval=None, fsync=False, buffer_size=BUFFER_SIZE):
+        self._paths = dict(paths)
+        self._flush_interval = flush_interval
+        self._fsync = fsync
+        self._last_flush = time.monotonic()
+        self._files = {}
+        for name, path in self._paths.items():
+            if path != None:
+                # files are created (and emptied where needed) before the run starts, so everything here is appended
+                self._files[name] = open(path, 'a', buffering=buffer_size)
+
+    def path(self, name):
+        return self._paths.get(name)
+
+    def paths(self):
+        """ Returns the paths of the output files in the order of OUTPUT_NAMES """
+        return tuple(self._paths.get(name) for name in OUTPUT_NAMES)
+
+    def has(self, name):
+        return name in self._files
+
+    def write(self, name, text):
+        if name in self._files:
+            self._files[name].write(text)
+            if self._flush_interval != None and time.monotonic() - self._last_flush >= self._flush_interval:
+                self.flush()
+
+    def append_file(self, name, path):
+        """ Copy the whole of another file onto the end of one of the outputs """
+        if name in self._files:
+            output = self._files[name]
+            output.flush()
+            with open(path, 'rb') as infile:
+                shutil.copyfileobj(infile, output.buffer, BUFFER_SIZE)
+            output.buffer.flush()
+
+    def flush(self, sync=False):
+        for output in self._files.values():
+            output.flush()
+            if sync == True:
+                os.fsync(output.fileno())
+        self._last_flush = time.monotonic()
+
+    def checkpoint(self):
+        """ Called at the end of each input file """
+        self.flush(sync=self._fsync)
+
+    def close(self):
+        self.checkpoint()
+        for output in self._files.values():
+            output.close()
+        self._files = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+class StreamOutput:
+    """ Sends some of the outputs of a tagging run to a stream such as stdout, and drops the rest. Each write is flushed straight away, so every paragraph's results are passed on as soon as they are ready."""
+
+    def __init__(self, stream, names):
+        self._stream = stream
+        self._names = set(names)
+
+    def has(self, name):
+        return name in self._names
+
+    def write(self, name, text):
+        if name in self._names and text != "":
+            self._stream.write(text)
+            self._stream.flush()
+
+    def flush(self, sync=False):
+        self._stream.flush()
+
+    def checkpoint(self):
+        self.flush()
+
+    def close(self):
+        self.flush()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,77 @@
+import queue
+import threading
+
+# Default number of items each queue in a pipeline may hold
+QUEUE_DEPTH = 4
+
+_END = object()
+
+class _Failed:
+    """ Passed down the pipeline in place of an item when a stage raises an exception """
+    def __init__(self, error):
+        self.error = error
+
+def _put(out_queue, item, stop):
+    # gives up if the pipeline has been stopped, so that a thread never waits forever on a queue nobody is reading
+    while not stop.is_set():
+        try:
+            out_queue.put(item, timeout=0.1)
+            return True
+        except queue.Full:
+            pass
+    return False
+
+def _produce(source, out_queue, stop):
+    try:
+        for item in source:
+            if not _put(out_queue, item, stop):
+                return
+    except Exception as error:
+        _put(out_queue, _Failed(error), stop)
+        return
+    _put(out_queue, _END, stop)
+
+def _work(stage, in_queue, out_queue, stop):
+    while not stop.is_set():
+        try:
+            item = in_queue.get(timeout=0.1)
+        except queue.Empty:
+            continue
+        if item is _END or isinstance(item, _Failed):
+            _put(out_queue, item, stop)
+            return
+        try:
+            result = stage(item)
+        except Exception as error:
+            _put(out_queue, _Failed(error), stop)
+            return
+        if not _put(out_queue, result, stop):
+            return
+
+def pipelined(source, stages, queue_depths=None):
+    """ Run the iteration of source, and each of the stages (functions of one item), in threads of their own, joined by bounded queues, and yield the results of the last stage in order. Each item therefore moves on to the next stage while the item after it is still being worked on. queue_depths gives the size of each queue: one in front of each stage, and one for the results; an exception in any thread is raised again here."""
+    if queue_depths == None:
+        queue_depths = QUEUE_DEPTH
+    if isinstance(queue_depths, int):
+        queue_depths = [queue_depths] * (len(stages) + 1)
+    if len(queue_depths) != len(stages) + 1:
+        raise ValueError("Expected {} queue depths, got {}".format(len(stages) + 1, len(queue_depths)))
+    stop = threading.Event()
+    queues = [queue.Queue(maxsize=max(depth, 1)) for depth in queue_depths]
+    threads = [threading.Thread(target=_produce, args=(source, queues[0], stop), daemon=True)]
+    for i, stage in enumerate(stages):
+        threads.append(threading.Thread(target=_work, args=(stage, queues[i], queues[i+1], stop), daemon=True))
+    for thread in threads:
+        thread.start()
+    try:
+        while True:
+            item = queues[-1].get()
+            if item is _END:
+                break
+            if isinstance(item, _Failed):
+                raise item.error
+            yield item
+    finally:
+        stop.set()
+        for thread in threads:
+            thread.join()
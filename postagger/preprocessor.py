@@ -98,35 +98,63 @@ class CorCenCC_cleaned:
     saib = re.compile(r" ?</? ?[sS]aib ?> ?")
     noise_start = re.compile(r" *<N> *")
     noise_end = re.compile(r" *</N> *")
-    noise_spaces = re.compile(r"(\[~[^ ~]+) ([^~]+~\])")
-    anon_spaces = re.compile(r"(<anon>[^ <]+) ([^<]+</anon>)")
+    noise_span = re.compile(r"(?<=\[~)[^~\n]*(?=~\])")
+    anon_span = re.compile(r"(?<=<anon>)[^<\n]*(?=</anon>)")
     anon_start = re.compile(r" ?<anon ?> *")
     anon_end = re.compile(r" *</anon> ?")
 
-    anon_pair = re.compile(r"(<anon>[^ <]+) ([^<]+</anon>)")
     eng_pi1 = re.compile(r" ?<eng?> *")
     eng_pi2 = re.compile(r" *</eng?> ?")
     eng_pi3 = re.compile(r" ?<eng? gair=")
     punct = re.compile(r"([\?\!\.,\:\;\'\"])</en>")
-    en1 = re.compile(r"<en([^>]*)> ?(\w+)(\W+) ?</en>")
-    en2 = re.compile(r"<en[^>]*>[^<]+ [^<]+</en>")
-    en3 = re.compile(r"(<en[^>]*>[^<]+[^<]+</en>)")
-    en4 = re.compile(r"<en[^>]*>[^<]+ [^<]+</en>")
+    en1 = re.compile(r"<en([^>\n]*)> ?(\w+)([^\w\n]+) ?</en>")
+    en2 = re.compile(r"<en[^>\n]*>[^<\n]+ [^<\n]+</en>")
+    en3 = re.compile(r"(<en[^>\n]*>[^<\n]+[^<\n]+</en>)")
+    en4 = re.compile(r"<en[^>\n]*>[^<\n]+ [^<\n]+</en>")
     en5 = re.compile(r"(?:</?en(?:gair=[A-Za-z]+)?>| )")
     
+    @staticmethod
+    def joined(match):
+        """ Joins the words inside a [~ ~] or <anon> span with underscores, for re.sub. As when the first space in the span was replaced again and again until none was left with something after it, a span starting with a space is left alone, and so is a space at its very end."""
+        inside = match.group(0)
+        if inside == "" or inside[0] == " ":
+            return inside
+        return inside[:-1].replace(" ", "_") + inside[-1]
+
+    @staticmethod
+    def en_words(line):
+        """ Splits each <en> span of more than one word in a line into one span per word """
+        if re.search(CorCenCC_cleaned.en2, line) == None:
+            return line
+        input_split = re.split(CorCenCC_cleaned.en3, line)
+        output_split = []
+        for split in list(filter(None, input_split)):
+            if re.match(CorCenCC_cleaned.en4, split):
+                words = list(filter(None, re.split(CorCenCC_cleaned.en5, split)))
+                for word in words:
+                    if not word.isalpha():
+                        output_split.append(word)
+                    else:
+                        out = "<en>" + word + "</en>"
+                        output_split.append(out)
+            else:
+                output_split.append(split)
+        return re.sub(r"  +", " ", " ".join(output_split))
+
     @classmethod
     def cleaned(cls, input_text):
-        output = ""
+        """ Cleans a sentence, or several sentences, one to a line: no rule reaches across a line break, so the lines are cleaned exactly as if each were cleaned alone """
         input_text = input_text.replace("​", "")
+        # every rule below needs a tag or a [~ span, and most text has neither
+        if "<" not in input_text and "[~" not in input_text:
+            return input_text
         input_text = re.sub(CorCenCC_cleaned.saib, r" \[~saib~\] ", input_text)
         input_text = re.sub(CorCenCC_cleaned.noise_start, " [~", input_text)
         input_text = re.sub(CorCenCC_cleaned.noise_end, "~] ", input_text)
-        while CorCenCC_cleaned.noise_spaces.findall(input_text) != []:
-            input_text = re.sub(r"(\[~[^ ~]+) ([^~]+~\])", r"\1_\2", input_text)
+        input_text = re.sub(CorCenCC_cleaned.noise_span, CorCenCC_cleaned.joined, input_text)
         input_text = re.sub(CorCenCC_cleaned.anon_start, r" <anon>", input_text)
         input_text = re.sub(CorCenCC_cleaned.anon_end, r"</anon> ", input_text)
-        while CorCenCC_cleaned.anon_spaces.findall(input_text) != []:
-            input_text = re.sub(CorCenCC_cleaned.anon_pair, r"\1_\2", input_text)
+        input_text = re.sub(CorCenCC_cleaned.anon_span, CorCenCC_cleaned.joined, input_text)
         input_text = input_text.replace("<anon>", "[##")
         input_text = input_text.replace("</anon>", "##]")
         input_text = re.sub(CorCenCC_cleaned.eng_pi1, r" <en>", input_text)
@@ -135,22 +163,7 @@ class CorCenCC_cleaned:
         input_text = re.sub(CorCenCC_cleaned.punct, r"</en> \1", input_text)
         input_text = re.sub(CorCenCC_cleaned.en1, r"<en\1>\2</en> \3", input_text)
         if re.search(CorCenCC_cleaned.en2, input_text) != None:
-            input_split = re.split(CorCenCC_cleaned.en3, input_text)
-            output_split = []
-            for split in list(filter(None, input_split)):
-                if re.match(CorCenCC_cleaned.en4, split):
-                    words = list(filter(None, re.split(CorCenCC_cleaned.en5, split)))
-                    for word in words:
-                        if not word.isalpha():
-                            output_split.append(word)
-                        else:
-                            out = "<en>" + word + "</en>"
-                            output_split.append(out)
-                else:
-                    output_split.append(split)
-            output = re.sub(r"  +", " ", " ".join(output_split))
-        else:
-            output = input_text
-        return output
+            input_text = "\n".join(CorCenCC_cleaned.en_words(line) for line in input_text.split("\n"))
+        return input_text
 
 
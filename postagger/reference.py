@@ -1,17 +1,136 @@
-from .reference_lists.cy_lexicon import cy_dict
-from .reference_lists.en_lexicon import en_dict
-from .reference_lists.gaz_lexicon import gaz_dict
-from .reference_lists.cy_mwus import cy_mwus
-from .reference_lists.en_mwus import en_mwus
-from .reference_lists.gaz_mwus import gaz_mwus
+import os
+from pathlib import Path
+from collections.abc import Mapping
 from .reference_lists.admin_refs import *
 from .reference_lists.ref_functs import *
+from .reference_lists.lex_store import Lexicon, LexiconStore, KeyView, LexEntry
 
-ll_cy = set(cy_dict.keys())
-ll_en = set(en_dict.keys())
-ll_gaz = set(gaz_dict.keys())
+lexicon_path = Path(os.path.dirname(os.path.abspath(__file__)))/"reference_lists"
+
+def lexicon_store(file_name):
+    lex_file = lexicon_path/file_name
+    if not lex_file.exists():
+        raise FileNotFoundError("{} has not been built yet. Please rebuild the lexica before running the tagger.".format(lex_file))
+    return lex_file
+
+def open_lexicon(name):
+    return Lexicon(lexicon_store("{}_lexicon.lex".format(name)))
+
+class MutatingLexicon(Mapping):
+    """ A Welsh lexicon built without its mutated forms (see mutation_modes in load_lexica). A wordform's entries are those stored for it, followed by the entries of each radical form that mutates into it, marked with the mutation; these are the same entries the expanded lexicon holds, although not always in the same order."""
+
+    def __init__(self, lexicon):
+        self._lexicon = lexicon
+
+    def meta(self):
+        return self._lexicon.meta()
+
+    def radicals(self, key):
+        """ The (radical, mutation) pairs in the lexicon which mutate into key """
+        return [(radical, mutation) for radical, mutation in radical_forms(key, two_mut) if radical in self._lexicon]
+
+    def __getitem__(self, key):
+        entries = ()
+        if key in self._lexicon:
+            entries = self._lexicon[key]
+        for radical, mutation in self.radicals(key):
+            entries += tuple(di._replace(mutation=mutation) for di in self._lexicon[radical])
+        if entries == ():
+            raise KeyError(key)
+        return entries
+
+    def __contains__(self, key):
+        return key in self._lexicon or self.radicals(key) != []
+
+    def __iter__(self):
+        for key in self._lexicon:
+            yield key
+        for key in self._lexicon:
+            if mutatable(key, two_mut):
+                for form, mutation in mutate(key):
+                    # a form with more than one radical is yielded for the first
+                    if form not in self._lexicon and self.radicals(form)[0] == (key, mutation):
+                        yield form
+
+    def __len__(self):
+        return self._lexicon.meta()["keys"]
+
+cy_dict = open_lexicon("cy")
+if cy_dict.meta().get("mutations") == "on-the-fly":
+    cy_dict = MutatingLexicon(cy_dict)
+en_dict = open_lexicon("en")
+gaz_dict = open_lexicon("gaz")
+cy_mwus = cy_dict.meta()["mwus"]
+en_mwus = en_dict.meta()["mwus"]
+gaz_mwus = gaz_dict.meta()["mwus"]
+
+# The key lists are views onto the mapped lexicon files rather than sets, so they cost no memory of their own.
+ll_cy = KeyView(cy_dict)
+ll_en = KeyView(en_dict)
+ll_gaz = KeyView(gaz_dict)
 ll_both = ll_cy.union(ll_en)
 ll_all = ll_both.union(ll_gaz)
+# The spelling skeletons (see spelling_skeleton) of the Welsh wordforms
+ll_cy_spelling = KeyView(LexiconStore(lexicon_store("cy_spelling.lex")))
+
+class MWUIndex:
+    """ A word-by-word prefix trie of multi-word units (wordforms joined by "_"), so that the longest unit starting at any point in a sentence can be found in one scan forward from there."""
+    def __init__(self):
+        self._root = {}
+        # the most words any unit beginning with each first word can span
+        self._max_len = {}
+
+    def add(self, key, lower_first=False):
+        parts = key.split("_")
+        if lower_first == True:
+            parts[0] = parts[0].lower()
+        node = self._root
+        for part in parts:
+            node = node.setdefault(part, {})
+        # None marks the end of a unit
+        node[None] = True
+        if self._max_len.get(parts[0], 0) < len(parts):
+            self._max_len[parts[0]] = len(parts)
+
+    def __contains__(self, first_word):
+        return first_word in self._max_len
+
+    def longest(self, words, start):
+        """ Return the number of words in the longest multi-word unit that starts at words[start] (a list of Word objects), and the unit itself, or (0, None) if there isn't one. As in the lexica, the first word is matched in lower case."""
+        first = words[start].word().lower()
+        if first not in self._max_len:
+            return 0, None
+        node = self._root[first]
+        end = min(start + self._max_len[first], len(words))
+        length = 0
+        for i in range(start + 1, end):
+            # a word with underscores of its own spans several parts of a unit
+            for part in words[i].word().split("_"):
+                node = node.get(part)
+                if node == None:
+                    break
+            if node == None:
+                break
+            if None in node:
+                length = i - start + 1
+        if length == 0:
+            return 0, None
+        return length, "_".join([first] + [w.word() for w in words[start+1:start+length]])
+
+def mwu_keys(lexicon):
+    keys = lexicon.meta().get("mwu_keys")
+    if keys == None:
+        keys = [key for key in lexicon if "_" in key]
+    return keys
+
+# Lexica whose multi-word units are joined up into single tokens. Add "en" and/or "gaz" to match English or proper-noun units as well.
+mwu_lexica = ("cy",)
+mwu_index = MWUIndex()
+for name, lexicon in (("cy", cy_dict), ("en", en_dict), ("gaz", gaz_dict)):
+    if name in mwu_lexica:
+        for key in mwu_keys(lexicon):
+            # proper nouns are capitalised in the gazetteers, but sentences are matched from a lower-cased first word
+            mwu_index.add(key, lower_first=name == "gaz")
 
 class Headword:
     def __init__(self, headword, language=None, en_trans=None, mutation=None):
@@ -32,31 +151,23 @@ class Headword:
         if self._en_trans != None:
             dict_items = cy_dict[self._headword]
             for di in dict_items:
-                if mutation != None:
-                    di["mutation"] = mutation
-                if di["lemma_en"] == self._en_trans:
-                    entry = Entry(self._headword, di, "cy")
+                if di.lemma_en == self._en_trans:
+                    entry = Entry(self._headword, di, "cy", mutation)
                     entry_list.append(entry)
         if self._headword in ll_cy and self._language in [None, "cy"] and entry_list == []:
             dict_items = cy_dict[self._headword]
             for di in dict_items:
-                if mutation != None:
-                    di["mutation"] = mutation
-                entry = Entry(self._headword, di, "cy")
+                entry = Entry(self._headword, di, "cy", mutation)
                 entry_list.append(entry)
         if self._headword in ll_en and self._language in [None, "en"] and self._en_trans == None:
             dict_items = en_dict[self._headword]
             for di in dict_items:
-                if mutation != None:
-                    di["mutation"] = mutation
-                entry = Entry(self._headword, di, "en")
+                entry = Entry(self._headword, di, "en", mutation)
                 entry_list.append(entry)
         if self._headword in ll_gaz and self._language in ["gaz", None] and self._en_trans == None:
             dict_items = gaz_dict[self._headword] 
             for di in dict_items:
-                if mutation != None:
-                    di["mutation"] = mutation
-                entry = Entry(self._headword, di, "gaz")
+                entry = Entry(self._headword, di, "gaz", mutation)
                 entry_list.append(entry)
         return entry_list
 
@@ -67,10 +178,12 @@ class MWU(Headword):
         self._language = language  
 
 class Entry:
-    def __init__(self, word, dict_item=None, language=None):
+    """ A dictionary entry (a LexEntry, shared with the lexicon and never changed) as found for a word. mutation, if given, overrides the entry's own mutation: it is the mutation the word was found to have when it was looked up in its radical form."""
+    def __init__(self, word, dict_item=None, language=None, mutation=None):
         self._word = word
         self._language = language
         self._dict_item = dict_item
+        self._mutation = mutation
     
     def word(self):
         return self._word
@@ -80,7 +193,9 @@ class Entry:
 
     def mutation(self):
         if self._dict_item != None:
-            return self._dict_item["mutation"]
+            if self._mutation != None:
+                return self._mutation
+            return self._dict_item.mutation
         else:
             return "0m"
 
@@ -97,35 +212,35 @@ class Entry:
 
     def lemma(self):      
         if self._dict_item != None:
-            lemma = self.dict_item()["lemma"]
+            lemma = self.dict_item().lemma
         else:
             lemma = self._word
         return lemma
 
     def basic_pos(self):
         if self._dict_item != None:
-            basic_pos = self.dict_item()["pos_basic"]
+            basic_pos = self.dict_item().pos_basic
         else:
             basic_pos = "unk"
         return basic_pos
 
     def full_pos(self):
         if self._dict_item != None:
-            full_pos = self.dict_item()["pos_enriched"]["full"]
+            full_pos = self.dict_item().pos_enriched["full"]
         else:
             full_pos = "unk"
         return full_pos
 
     def segmented_pos(self):
         if self._dict_item != None:
-            segmented_pos = self.dict_item()["pos_enriched"]["seg"]
+            segmented_pos = self.dict_item().pos_enriched["seg"]
         else:
             segmented_pos = "unk"
         return segmented_pos
 
     def trans(self):
         if self._dict_item != None:
-            trans = self.dict_item()["lemma_en"]
+            trans = self.dict_item().lemma_en
         else:
             trans = self._word
         trans = trans.replace(" ", "_")
@@ -323,10 +323,11 @@ def foreign_chars(token):
         return True
 
 hashtag = re.compile(r"(#[a-zA-Z0-9_\-']+[a-zA-Z0-9]+)")
-email = re.compile(r"([a-zA-Z0-9\.\-_]+@[a-zA-Z0-9\-\._]+\.(?:travelersinsurance|northwesternmutual|sandvikcoromant|kerryproperties|americanexpress|weatherchannel|kerrylogistics|cookingchannel|cancerresearch|bananarepublic|americanfamily|afamilycompany|wolterskluwer|travelchannel|spreadbetting|lifeinsurance|international|versicherung|scholarships|lplfinancial|construction|williamhill|redumbrella|progressive|productions|playstation|photography|olayangroup|motorcycles|lamborghini|kerryhotels|investments|foodnetwork|enterprises|engineering|creditunion|contractors|calvinklein|bridgestone|blockbuster|blackfriday|barclaycard|accountants|volkswagen|vlaanderen|university|technology|tatamotors|swiftcover|schaeffler|restaurant|republican|realestate|prudential|protection|properties|onyourside|nextdirect|newholland|nationwide|mitsubishi|management|industries|immobilien|healthcare|foundation|extraspace|eurovision|cuisinella|creditcard|consulting|capitalone|boehringer|bnpparibas|basketball|associates|apartments|accountant|yodobashi|vacations|travelers|stockholm|statefarm|statebank|solutions|shangrila|scjohnson|richardli|pramerica|passagens|panasonic|microsoft|melbourne|marshalls|marketing|lifestyle|landrover|lancaster|kuokgroup|insurance|institute|homesense|homegoods|homedepot|hisamitsu|goldpoint|furniture|fujixerox|frontdoor|fresenius|firestone|financial|fairwinds|equipment|education|directory|community|christmas|bloomberg|barcelona|aquarelle|analytics|amsterdam|allfinanz|alfaromeo|accenture|yokohama|woodside|verisign|ventures|vanguard|training|supplies|stcgroup|software|softbank|showtime|shopping|services|security|samsclub|saarland|reliance|redstone|property|plumbing|pictures|pharmacy|partners|observer|mortgage|merckmsd|memorial|mckinsey|maserati|marriott|lundbeck|lighting|jpmorgan|istanbul|ipiranga|infiniti|hospital|holdings|helsinki|hdfcbank|guardian|graphics|grainger|goodyear|frontier|football|firmdale|fidelity|feedback|exchange|etisalat|ericsson|engineer|download|discover|discount|diamonds|democrat|deloitte|delivery|computer|commbank|clothing|clinique|cleaning|cityeats|cipriani|catholic|catering|capetown|business|builders|budapest|brussels|broadway|bradesco|boutique|baseball|bargains|barefoot|barclays|attorney|allstate|airforce|abudhabi|zuerich|youtube|yamaxun|xfinity|winners|windows|whoswho|wedding|website|weather|watches|wanggou|walmart|trading|toshiba|tiffany|tickets|theatre|theater|temasek|systems|surgery|support|storage|staples|singles|shriram|shiksha|science|schwarz|schmidt|sandvik|samsung|rexroth|reviews|rentals|recipes|realtor|politie|pioneer|philips|origins|organic|oldnavy|okinawa|neustar|network|netflix|netbank|monster|markets|lincoln|limited|leclerc|latrobe|lasalle|lanxess|lacaixa|komatsu|kitchen|juniper|jewelry|ismaili|hyundai|hotmail|hoteles|hosting|holiday|hitachi|hangout|hamburg|guitars|grocery|godaddy|genting|gallery|fujitsu|frogans|forsale|flowers|florist|flights|fitness|fishing|finance|ferrero|ferrari|fashion|farmers|express|exposed|domains|digital|dentist|cruises|cricket|courses|coupons|country|corsica|cooking|contact|compare|company|comcast|cologne|college|clubmed|citadel|chintai|charity|channel|careers|caravan|capital|bugatti|brother|booking|bestbuy|bentley|bauhaus|banamex|avianca|auspost|audible|auction|athleta|android|alibaba|agakhan|academy|abogado|zappos|yandex|yachts|xihuan|webcam|walter|vuelos|voyage|voting|vision|virgin|villas|viking|viajes|unicom|travel|toyota|tkmaxx|tjmaxx|tienda|tennis|tattoo|target|taobao|taipei|sydney|swatch|suzuki|supply|studio|stream|social|soccer|shouji|select|secure|search|schule|school|sanofi|sakura|safety|ryukyu|rogers|rocher|review|report|repair|reisen|realty|racing|quebec|pictet|physio|photos|pfizer|otsuka|orange|oracle|online|olayan|office|nowruz|norton|nissay|nissan|natura|nagoya|mutual|museum|moscow|mormon|monash|mobile|mattel|market|makeup|maison|madrid|luxury|london|locker|living|lefrak|lawyer|latino|lancia|kosher|kindle|kinder|kaufen|juegos|joburg|jaguar|intuit|insure|imamat|hughes|hotels|hockey|hiphop|hermes|health|gratis|google|global|giving|george|garden|gallup|futbol|flickr|family|expert|events|estate|energy|emerck|durban|dupont|dunlop|doctor|direct|design|dental|degree|dealer|datsun|dating|cruise|credit|coupon|condos|comsec|coffee|clinic|claims|circle|church|chrome|chanel|center|casino|caseih|career|camera|broker|boston|bostik|bharti|berlin|beauty|bayern|author|aramco|anquan|amazon|alstom|alsace|alipay|airtel|airbus|agency|africa|abbvie|abbott|abarth|yahoo|xerox|world|works|weibo|weber|watch|wales|volvo|vodka|video|vegas|ubank|tushu|tunes|trust|trade|tours|total|toray|tools|tokyo|today|tmall|tirol|tires|tatar|swiss|sucks|style|study|store|stada|sport|space|solar|smile|smart|sling|skype|shoes|shell|sharp|seven|sener|salon|rugby|rodeo|rocks|ricoh|reise|rehab|radio|quest|promo|prime|press|praxi|poker|place|pizza|photo|phone|party|parts|paris|osaka|omega|nowtv|nokia|ninja|nikon|nexus|movie|money|miami|media|mango|macys|lupin|lotto|lotte|locus|loans|lixil|lipsy|linde|lilly|lexus|legal|lease|lamer|kyoto|koeln|jetzt|iveco|irish|ikano|hyatt|house|horse|honda|homes|guide|gucci|group|gripe|green|gmail|globo|glass|glade|gives|gifts|games|gallo|forum|forex|final|fedex|faith|epson|email|edeka|earth|dubai|drive|delta|deals|dance|dabur|cymru|crown|codes|coach|cloud|click|citic|cisco|cheap|chase|cards|canon|build|bosch|boats|black|bingo|bible|beats|baidu|azure|autos|audio|archi|apple|amica|amfam|aetna|adult|actor|zone|zero|zara|yoga|xbox|work|wine|wiki|wien|weir|wang|voto|vote|vivo|viva|visa|vana|tube|toys|town|tips|tiaa|teva|tech|team|taxi|talk|surf|star|spot|sony|song|sohu|sncf|skin|site|sina|silk|show|shop|shia|shaw|sexy|seek|seat|scot|saxo|save|sarl|sale|safe|ruhr|rsvp|room|rmit|rich|rest|rent|reit|read|raid|qpon|prof|prod|post|porn|pohl|plus|play|pink|ping|pics|pccw|pars|page|open|ollo|nike|nico|next|news|navy|name|moto|moda|mobi|mint|mini|menu|meme|meet|maif|luxe|ltda|love|loft|loan|live|link|limo|like|life|lidl|lgbt|lego|land|kred|kpmg|kiwi|kddi|jprs|jobs|jeep|java|itau|info|immo|imdb|ieee|icbc|hsbc|host|hgtv|here|help|hdfc|haus|hair|guru|guge|goog|golf|gold|gmbh|gift|ggee|gent|gbiz|game|fund|free|ford|food|flir|fish|fire|film|fido|fiat|fast|farm|fans|fail|fage|erni|dvag|duck|docs|dish|diet|desi|dell|deal|dclk|date|data|cyou|coop|cool|club|city|citi|chat|cern|cbre|cash|case|casa|cars|care|camp|call|cafe|buzz|book|bond|bofa|blue|blog|bing|bike|best|beer|bbva|bank|band|baby|auto|audi|asia|asda|arte|arpa|army|arab|amex|ally|akdn|aero|adac|able|aarp|zip|yun|you|xyz|xxx|xin|wtf|wtc|wow|wme|win|wed|vip|vin|vig|vet|ups|uol|uno|ubs|tvs|tui|trv|top|tjx|thd|tel|tdk|tci|tax|tab|stc|srl|spa|soy|sky|ski|sfr|sex|sew|ses|scb|sca|sbs|sbi|sas|sap|rwe|run|rip|rio|ril|ren|red|qvc|pwc|pub|pru|pro|pnc|pin|pid|phd|pet|pay|ovh|ott|org|ooo|onl|ong|one|off|obi|nyc|ntt|nrw|nra|now|nhk|ngo|nfl|new|net|nec|nba|nab|mtr|mtn|msd|mov|mom|moi|moe|mma|mls|mlb|mit|mil|men|med|mba|map|man|ltd|lpl|lol|llp|llc|lds|law|lat|krd|kpn|kim|kia|kfh|joy|jot|jnj|jmp|jll|jio|jcb|itv|ist|int|ink|ing|inc|ifm|icu|ice|ibm|how|hot|hkt|hiv|hbo|gov|got|gop|goo|gmx|gmo|gle|gea|gdn|gay|gap|gal|fyi|fun|ftr|frl|fox|foo|fly|fit|fan|eus|esq|edu|eco|eat|dvr|dtv|dot|dog|dnp|diy|dhl|dev|dds|day|dad|csc|crs|cpa|com|cfd|cfa|ceo|ceb|cbs|cbn|cba|cat|car|cam|cal|cab|bzh|buy|box|bot|boo|bom|bmw|bms|biz|bio|bid|bet|bcn|bcg|bbt|bbc|bar|axa|aws|art|app|aol|anz|aig|afl|aeg|ads|aco|abc|abb|aaa|zw|zm|za|yt|ye|ws|wf|vu|vn|vi|vg|ve|vc|va|uz|uy|us|uk|ug|ua|tz|tw|tv|tt|tr|to|tn|tm|tl|tk|tj|th|tg|tf|td|tc|sz|sy|sx|sv|su|st|ss|sr|so|sn|sm|sl|sk|sj|si|sh|sg|se|sd|sc|sb|sa|rw|ru|rs|ro|re|qa|py|pw|pt|ps|pr|pn|pm|pl|pk|ph|pg|pf|pe|pa|om|nz|nu|nr|np|no|nl|ni|ng|nf|ne|nc|na|mz|my|mx|mw|mv|mu|mt|ms|mr|mq|mp|mo|mn|mm|ml|mk|mh|mg|me|md|mc|ma|ly|lv|lu|lt|ls|lr|lk|li|lc|lb|la|kz|ky|kw|kr|kp|kn|km|ki|kh|kg|ke|jp|jo|jm|je|it|is|ir|iq|io|in|im|il|ie|id|hu|ht|hr|hn|hm|hk|gy|gw|gu|gt|gs|gr|gq|gp|gn|gm|gl|gi|gh|gg|gf|ge|gd|gb|ga|fr|fo|fm|fk|fj|fi|eu|et|es|er|eg|ee|ec|dz|do|dm|dk|dj|de|cz|cy|cx|cw|cv|cu|cr|co|cn|cm|cl|ck|ci|ch|cg|cf|cd|cc|ca|bz|by|bw|bv|bt|bs|br|bo|bn|bm|bj|bi|bh|bg|bf|be|bd|bb|ba|az|ax|aw|au|at|as|ar|aq|ao|am|al|ai|ag|af|ae|ad|ac))")
-url = re.compile(r"((?:https?://)?[a-zA-Z0-9\.\-_]+\.(?:travelersinsurance|northwesternmutual|sandvikcoromant|kerryproperties|americanexpress|weatherchannel|kerrylogistics|cookingchannel|cancerresearch|bananarepublic|americanfamily|afamilycompany|wolterskluwer|travelchannel|spreadbetting|lifeinsurance|international|versicherung|scholarships|lplfinancial|construction|williamhill|redumbrella|progressive|productions|playstation|photography|olayangroup|motorcycles|lamborghini|kerryhotels|investments|foodnetwork|enterprises|engineering|creditunion|contractors|calvinklein|bridgestone|blockbuster|blackfriday|barclaycard|accountants|volkswagen|vlaanderen|university|technology|tatamotors|swiftcover|schaeffler|restaurant|republican|realestate|prudential|protection|properties|onyourside|nextdirect|newholland|nationwide|mitsubishi|management|industries|immobilien|healthcare|foundation|extraspace|eurovision|cuisinella|creditcard|consulting|capitalone|boehringer|bnpparibas|basketball|associates|apartments|accountant|yodobashi|vacations|travelers|stockholm|statefarm|statebank|solutions|shangrila|scjohnson|richardli|pramerica|passagens|panasonic|microsoft|melbourne|marshalls|marketing|lifestyle|landrover|lancaster|kuokgroup|insurance|institute|homesense|homegoods|homedepot|hisamitsu|goldpoint|furniture|fujixerox|frontdoor|fresenius|firestone|financial|fairwinds|equipment|education|directory|community|christmas|bloomberg|barcelona|aquarelle|analytics|amsterdam|allfinanz|alfaromeo|accenture|yokohama|woodside|verisign|ventures|vanguard|training|supplies|stcgroup|software|softbank|showtime|shopping|services|security|samsclub|saarland|reliance|redstone|property|plumbing|pictures|pharmacy|partners|observer|mortgage|merckmsd|memorial|mckinsey|maserati|marriott|lundbeck|lighting|jpmorgan|istanbul|ipiranga|infiniti|hospital|holdings|helsinki|hdfcbank|guardian|graphics|grainger|goodyear|frontier|football|firmdale|fidelity|feedback|exchange|etisalat|ericsson|engineer|download|discover|discount|diamonds|democrat|deloitte|delivery|computer|commbank|clothing|clinique|cleaning|cityeats|cipriani|catholic|catering|capetown|business|builders|budapest|brussels|broadway|bradesco|boutique|baseball|bargains|barefoot|barclays|attorney|allstate|airforce|abudhabi|zuerich|youtube|yamaxun|xfinity|winners|windows|whoswho|wedding|website|weather|watches|wanggou|walmart|trading|toshiba|tiffany|tickets|theatre|theater|temasek|systems|surgery|support|storage|staples|singles|shriram|shiksha|science|schwarz|schmidt|sandvik|samsung|rexroth|reviews|rentals|recipes|realtor|politie|pioneer|philips|origins|organic|oldnavy|okinawa|neustar|network|netflix|netbank|monster|markets|lincoln|limited|leclerc|latrobe|lasalle|lanxess|lacaixa|komatsu|kitchen|juniper|jewelry|ismaili|hyundai|hotmail|hoteles|hosting|holiday|hitachi|hangout|hamburg|guitars|grocery|godaddy|genting|gallery|fujitsu|frogans|forsale|flowers|florist|flights|fitness|fishing|finance|ferrero|ferrari|fashion|farmers|express|exposed|domains|digital|dentist|cruises|cricket|courses|coupons|country|corsica|cooking|contact|compare|company|comcast|cologne|college|clubmed|citadel|chintai|charity|channel|careers|caravan|capital|bugatti|brother|booking|bestbuy|bentley|bauhaus|banamex|avianca|auspost|audible|auction|athleta|android|alibaba|agakhan|academy|abogado|zappos|yandex|yachts|xihuan|webcam|walter|vuelos|voyage|voting|vision|virgin|villas|viking|viajes|unicom|travel|toyota|tkmaxx|tjmaxx|tienda|tennis|tattoo|target|taobao|taipei|sydney|swatch|suzuki|supply|studio|stream|social|soccer|shouji|select|secure|search|schule|school|sanofi|sakura|safety|ryukyu|rogers|rocher|review|report|repair|reisen|realty|racing|quebec|pictet|physio|photos|pfizer|otsuka|orange|oracle|online|olayan|office|nowruz|norton|nissay|nissan|natura|nagoya|mutual|museum|moscow|mormon|monash|mobile|mattel|market|makeup|maison|madrid|luxury|london|locker|living|lefrak|lawyer|latino|lancia|kosher|kindle|kinder|kaufen|juegos|joburg|jaguar|intuit|insure|imamat|hughes|hotels|hockey|hiphop|hermes|health|gratis|google|global|giving|george|garden|gallup|futbol|flickr|family|expert|events|estate|energy|emerck|durban|dupont|dunlop|doctor|direct|design|dental|degree|dealer|datsun|dating|cruise|credit|coupon|condos|comsec|coffee|clinic|claims|circle|church|chrome|chanel|center|casino|caseih|career|camera|broker|boston|bostik|bharti|berlin|beauty|bayern|author|aramco|anquan|amazon|alstom|alsace|alipay|airtel|airbus|agency|africa|abbvie|abbott|abarth|yahoo|xerox|world|works|weibo|weber|watch|wales|volvo|vodka|video|vegas|ubank|tushu|tunes|trust|trade|tours|total|toray|tools|tokyo|today|tmall|tirol|tires|tatar|swiss|sucks|style|study|store|stada|sport|space|solar|smile|smart|sling|skype|shoes|shell|sharp|seven|sener|salon|rugby|rodeo|rocks|ricoh|reise|rehab|radio|quest|promo|prime|press|praxi|poker|place|pizza|photo|phone|party|parts|paris|osaka|omega|nowtv|nokia|ninja|nikon|nexus|movie|money|miami|media|mango|macys|lupin|lotto|lotte|locus|loans|lixil|lipsy|linde|lilly|lexus|legal|lease|lamer|kyoto|koeln|jetzt|iveco|irish|ikano|hyatt|house|horse|honda|homes|guide|gucci|group|gripe|green|gmail|globo|glass|glade|gives|gifts|games|gallo|forum|forex|final|fedex|faith|epson|email|edeka|earth|dubai|drive|delta|deals|dance|dabur|cymru|crown|codes|coach|cloud|click|citic|cisco|cheap|chase|cards|canon|build|bosch|boats|black|bingo|bible|beats|baidu|azure|autos|audio|archi|apple|amica|amfam|aetna|adult|actor|zone|zero|zara|yoga|xbox|work|wine|wiki|wien|weir|wang|voto|vote|vivo|viva|visa|vana|tube|toys|town|tips|tiaa|teva|tech|team|taxi|talk|surf|star|spot|sony|song|sohu|sncf|skin|site|sina|silk|show|shop|shia|shaw|sexy|seek|seat|scot|saxo|save|sarl|sale|safe|ruhr|rsvp|room|rmit|rich|rest|rent|reit|read|raid|qpon|prof|prod|post|porn|pohl|plus|play|pink|ping|pics|pccw|pars|page|open|ollo|nike|nico|next|news|navy|name|moto|moda|mobi|mint|mini|menu|meme|meet|maif|luxe|ltda|love|loft|loan|live|link|limo|like|life|lidl|lgbt|lego|land|kred|kpmg|kiwi|kddi|jprs|jobs|jeep|java|itau|info|immo|imdb|ieee|icbc|hsbc|host|hgtv|here|help|hdfc|haus|hair|guru|guge|goog|golf|gold|gmbh|gift|ggee|gent|gbiz|game|fund|free|ford|food|flir|fish|fire|film|fido|fiat|fast|farm|fans|fail|fage|erni|dvag|duck|docs|dish|diet|desi|dell|deal|dclk|date|data|cyou|coop|cool|club|city|citi|chat|cern|cbre|cash|case|casa|cars|care|camp|call|cafe|buzz|book|bond|bofa|blue|blog|bing|bike|best|beer|bbva|bank|band|baby|auto|audi|asia|asda|arte|arpa|army|arab|amex|ally|akdn|aero|adac|able|aarp|zip|yun|you|xyz|xxx|xin|wtf|wtc|wow|wme|win|wed|vip|vin|vig|vet|ups|uol|uno|ubs|tvs|tui|trv|top|tjx|thd|tel|tdk|tci|tax|tab|stc|srl|spa|soy|sky|ski|sfr|sex|sew|ses|scb|sca|sbs|sbi|sas|sap|rwe|run|rip|rio|ril|ren|red|qvc|pwc|pub|pru|pro|pnc|pin|pid|phd|pet|pay|ovh|ott|org|ooo|onl|ong|one|off|obi|nyc|ntt|nrw|nra|now|nhk|ngo|nfl|new|net|nec|nba|nab|mtr|mtn|msd|mov|mom|moi|moe|mma|mls|mlb|mit|mil|men|med|mba|map|man|ltd|lpl|lol|llp|llc|lds|law|lat|krd|kpn|kim|kia|kfh|joy|jot|jnj|jmp|jll|jio|jcb|itv|ist|int|ink|ing|inc|ifm|icu|ice|ibm|how|hot|hkt|hiv|hbo|gov|got|gop|goo|gmx|gmo|gle|gea|gdn|gay|gap|gal|fyi|fun|ftr|frl|fox|foo|fly|fit|fan|eus|esq|edu|eco|eat|dvr|dtv|dot|dog|dnp|diy|dhl|dev|dds|day|dad|csc|crs|cpa|com|cfd|cfa|ceo|ceb|cbs|cbn|cba|cat|car|cam|cal|cab|bzh|buy|box|bot|boo|bom|bmw|bms|biz|bio|bid|bet|bcn|bcg|bbt|bbc|bar|axa|aws|art|app|aol|anz|aig|afl|aeg|ads|aco|abc|abb|aaa|zw|zm|za|yt|ye|ws|wf|vu|vn|vi|vg|ve|vc|va|uz|uy|us|uk|ug|ua|tz|tw|tv|tt|tr|to|tn|tm|tl|tk|tj|th|tg|tf|td|tc|sz|sy|sx|sv|su|st|ss|sr|so|sn|sm|sl|sk|sj|si|sh|sg|se|sd|sc|sb|sa|rw|ru|rs|ro|re|qa|py|pw|pt|ps|pr|pn|pm|pl|pk|ph|pg|pf|pe|pa|om|nz|nu|nr|np|no|nl|ni|ng|nf|ne|nc|na|mz|my|mx|mw|mv|mu|mt|ms|mr|mq|mp|mo|mn|mm|ml|mk|mh|mg|me|md|mc|ma|ly|lv|lu|lt|ls|lr|lk|li|lc|lb|la|kz|ky|kw|kr|kp|kn|km|ki|kh|kg|ke|jp|jo|jm|je|it|is|ir|iq|io|in|im|il|ie|id|hu|ht|hr|hn|hm|hk|gy|gw|gu|gt|gs|gr|gq|gp|gn|gm|gl|gi|gh|gg|gf|ge|gd|gb|ga|fr|fo|fm|fk|fj|fi|eu|et|es|er|eg|ee|ec|dz|do|dm|dk|dj|de|cz|cy|cx|cw|cv|cu|cr|co|cn|cm|cl|ck|ci|ch|cg|cf|cd|cc|ca|bz|by|bw|bv|bt|bs|br|bo|bn|bm|bj|bi|bh|bg|bf|be|bd|bb|ba|az|ax|aw|au|at|as|ar|aq|ao|am|al|ai|ag|af|ae|ad|ac))")
+# Top-level domains which end the domain names in email addresses and URLs. Where one is the start of another (.co and .com), the longer is taken.
+top_level_domains = ['travelersinsurance', 'northwesternmutual', 'sandvikcoromant', 'kerryproperties', 'americanexpress', 'weatherchannel', 'kerrylogistics', 'cookingchannel', 'cancerresearch', 'bananarepublic', 'americanfamily', 'afamilycompany', 'wolterskluwer', 'travelchannel', 'spreadbetting', 'lifeinsurance', 'international', 'versicherung', 'scholarships', 'lplfinancial', 'construction', 'williamhill', 'redumbrella', 'progressive', 'productions', 'playstation', 'photography', 'olayangroup', 'motorcycles', 'lamborghini', 'kerryhotels', 'investments', 'foodnetwork', 'enterprises', 'engineering', 'creditunion', 'contractors', 'calvinklein', 'bridgestone', 'blockbuster', 'blackfriday', 'barclaycard', 'accountants', 'volkswagen', 'vlaanderen', 'university', 'technology', 'tatamotors', 'swiftcover', 'schaeffler', 'restaurant', 'republican', 'realestate', 'prudential', 'protection', 'properties', 'onyourside', 'nextdirect', 'newholland', 'nationwide', 'mitsubishi', 'management', 'industries', 'immobilien', 'healthcare', 'foundation', 'extraspace', 'eurovision', 'cuisinella', 'creditcard', 'consulting', 'capitalone', 'boehringer', 'bnpparibas', 'basketball', 'associates', 'apartments', 'accountant', 'yodobashi', 'vacations', 'travelers', 'stockholm', 'statefarm', 'statebank', 'solutions', 'shangrila', 'scjohnson', 'richardli', 'pramerica', 'passagens', 'panasonic', 'microsoft', 'melbourne', 'marshalls', 'marketing', 'lifestyle', 'landrover', 'lancaster', 'kuokgroup', 'insurance', 'institute', 'homesense', 'homegoods', 'homedepot', 'hisamitsu', 'goldpoint', 'furniture', 'fujixerox', 'frontdoor', 'fresenius', 'firestone', 'financial', 'fairwinds', 'equipment', 'education', 'directory', 'community', 'christmas', 'bloomberg', 'barcelona', 'aquarelle', 'analytics', 'amsterdam', 'allfinanz', 'alfaromeo', 'accenture', 'yokohama', 'woodside', 'verisign', 'ventures', 'vanguard', 'training', 'supplies', 'stcgroup', 'software', 'softbank', 'showtime', 'shopping', 'services', 'security', 'samsclub', 'saarland', 'reliance', 'redstone', 'property', 'plumbing', 'pictures', 'pharmacy', 'partners', 'observer', 'mortgage', 'merckmsd', 'memorial', 'mckinsey', 'maserati', 'marriott', 'lundbeck', 'lighting', 'jpmorgan', 'istanbul', 'ipiranga', 'infiniti', 'hospital', 'holdings', 'helsinki', 'hdfcbank', 'guardian', 'graphics', 'grainger', 'goodyear', 'frontier', 'football', 'firmdale', 'fidelity', 'feedback', 'exchange', 'etisalat', 'ericsson', 'engineer', 'download', 'discover', 'discount', 'diamonds', 'democrat', 'deloitte', 'delivery', 'computer', 'commbank', 'clothing', 'clinique', 'cleaning', 'cityeats', 'cipriani', 'catholic', 'catering', 'capetown', 'business', 'builders', 'budapest', 'brussels', 'broadway', 'bradesco', 'boutique', 'baseball', 'bargains', 'barefoot', 'barclays', 'attorney', 'allstate', 'airforce', 'abudhabi', 'zuerich', 'youtube', 'yamaxun', 'xfinity', 'winners', 'windows', 'whoswho', 'wedding', 'website', 'weather', 'watches', 'wanggou', 'walmart', 'trading', 'toshiba', 'tiffany', 'tickets', 'theatre', 'theater', 'temasek', 'systems', 'surgery', 'support', 'storage', 'staples', 'singles', 'shriram', 'shiksha', 'science', 'schwarz', 'schmidt', 'sandvik', 'samsung', 'rexroth', 'reviews', 'rentals', 'recipes', 'realtor', 'politie', 'pioneer', 'philips', 'origins', 'organic', 'oldnavy', 'okinawa', 'neustar', 'network', 'netflix', 'netbank', 'monster', 'markets', 'lincoln', 'limited', 'leclerc', 'latrobe', 'lasalle', 'lanxess', 'lacaixa', 'komatsu', 'kitchen', 'juniper', 'jewelry', 'ismaili', 'hyundai', 'hotmail', 'hoteles', 'hosting', 'holiday', 'hitachi', 'hangout', 'hamburg', 'guitars', 'grocery', 'godaddy', 'genting', 'gallery', 'fujitsu', 'frogans', 'forsale', 'flowers', 'florist', 'flights', 'fitness', 'fishing', 'finance', 'ferrero', 'ferrari', 'fashion', 'farmers', 'express', 'exposed', 'domains', 'digital', 'dentist', 'cruises', 'cricket', 'courses', 'coupons', 'country', 'corsica', 'cooking', 'contact', 'compare', 'company', 'comcast', 'cologne', 'college', 'clubmed', 'citadel', 'chintai', 'charity', 'channel', 'careers', 'caravan', 'capital', 'bugatti', 'brother', 'booking', 'bestbuy', 'bentley', 'bauhaus', 'banamex', 'avianca', 'auspost', 'audible', 'auction', 'athleta', 'android', 'alibaba', 'agakhan', 'academy', 'abogado', 'zappos', 'yandex', 'yachts', 'xihuan', 'webcam', 'walter', 'vuelos', 'voyage', 'voting', 'vision', 'virgin', 'villas', 'viking', 'viajes', 'unicom', 'travel', 'toyota', 'tkmaxx', 'tjmaxx', 'tienda', 'tennis', 'tattoo', 'target', 'taobao', 'taipei', 'sydney', 'swatch', 'suzuki', 'supply', 'studio', 'stream', 'social', 'soccer', 'shouji', 'select', 'secure', 'search', 'schule', 'school', 'sanofi', 'sakura', 'safety', 'ryukyu', 'rogers', 'rocher', 'review', 'report', 'repair', 'reisen', 'realty', 'racing', 'quebec', 'pictet', 'physio', 'photos', 'pfizer', 'otsuka', 'orange', 'oracle', 'online', 'olayan', 'office', 'nowruz', 'norton', 'nissay', 'nissan', 'natura', 'nagoya', 'mutual', 'museum', 'moscow', 'mormon', 'monash', 'mobile', 'mattel', 'market', 'makeup', 'maison', 'madrid', 'luxury', 'london', 'locker', 'living', 'lefrak', 'lawyer', 'latino', 'lancia', 'kosher', 'kindle', 'kinder', 'kaufen', 'juegos', 'joburg', 'jaguar', 'intuit', 'insure', 'imamat', 'hughes', 'hotels', 'hockey', 'hiphop', 'hermes', 'health', 'gratis', 'google', 'global', 'giving', 'george', 'garden', 'gallup', 'futbol', 'flickr', 'family', 'expert', 'events', 'estate', 'energy', 'emerck', 'durban', 'dupont', 'dunlop', 'doctor', 'direct', 'design', 'dental', 'degree', 'dealer', 'datsun', 'dating', 'cruise', 'credit', 'coupon', 'condos', 'comsec', 'coffee', 'clinic', 'claims', 'circle', 'church', 'chrome', 'chanel', 'center', 'casino', 'caseih', 'career', 'camera', 'broker', 'boston', 'bostik', 'bharti', 'berlin', 'beauty', 'bayern', 'author', 'aramco', 'anquan', 'amazon', 'alstom', 'alsace', 'alipay', 'airtel', 'airbus', 'agency', 'africa', 'abbvie', 'abbott', 'abarth', 'yahoo', 'xerox', 'world', 'works', 'weibo', 'weber', 'watch', 'wales', 'volvo', 'vodka', 'video', 'vegas', 'ubank', 'tushu', 'tunes', 'trust', 'trade', 'tours', 'total', 'toray', 'tools', 'tokyo', 'today', 'tmall', 'tirol', 'tires', 'tatar', 'swiss', 'sucks', 'style', 'study', 'store', 'stada', 'sport', 'space', 'solar', 'smile', 'smart', 'sling', 'skype', 'shoes', 'shell', 'sharp', 'seven', 'sener', 'salon', 'rugby', 'rodeo', 'rocks', 'ricoh', 'reise', 'rehab', 'radio', 'quest', 'promo', 'prime', 'press', 'praxi', 'poker', 'place', 'pizza', 'photo', 'phone', 'party', 'parts', 'paris', 'osaka', 'omega', 'nowtv', 'nokia', 'ninja', 'nikon', 'nexus', 'movie', 'money', 'miami', 'media', 'mango', 'macys', 'lupin', 'lotto', 'lotte', 'locus', 'loans', 'lixil', 'lipsy', 'linde', 'lilly', 'lexus', 'legal', 'lease', 'lamer', 'kyoto', 'koeln', 'jetzt', 'iveco', 'irish', 'ikano', 'hyatt', 'house', 'horse', 'honda', 'homes', 'guide', 'gucci', 'group', 'gripe', 'green', 'gmail', 'globo', 'glass', 'glade', 'gives', 'gifts', 'games', 'gallo', 'forum', 'forex', 'final', 'fedex', 'faith', 'epson', 'email', 'edeka', 'earth', 'dubai', 'drive', 'delta', 'deals', 'dance', 'dabur', 'cymru', 'crown', 'codes', 'coach', 'cloud', 'click', 'citic', 'cisco', 'cheap', 'chase', 'cards', 'canon', 'build', 'bosch', 'boats', 'black', 'bingo', 'bible', 'beats', 'baidu', 'azure', 'autos', 'audio', 'archi', 'apple', 'amica', 'amfam', 'aetna', 'adult', 'actor', 'zone', 'zero', 'zara', 'yoga', 'xbox', 'work', 'wine', 'wiki', 'wien', 'weir', 'wang', 'voto', 'vote', 'vivo', 'viva', 'visa', 'vana', 'tube', 'toys', 'town', 'tips', 'tiaa', 'teva', 'tech', 'team', 'taxi', 'talk', 'surf', 'star', 'spot', 'sony', 'song', 'sohu', 'sncf', 'skin', 'site', 'sina', 'silk', 'show', 'shop', 'shia', 'shaw', 'sexy', 'seek', 'seat', 'scot', 'saxo', 'save', 'sarl', 'sale', 'safe', 'ruhr', 'rsvp', 'room', 'rmit', 'rich', 'rest', 'rent', 'reit', 'read', 'raid', 'qpon', 'prof', 'prod', 'post', 'porn', 'pohl', 'plus', 'play', 'pink', 'ping', 'pics', 'pccw', 'pars', 'page', 'open', 'ollo', 'nike', 'nico', 'next', 'news', 'navy', 'name', 'moto', 'moda', 'mobi', 'mint', 'mini', 'menu', 'meme', 'meet', 'maif', 'luxe', 'ltda', 'love', 'loft', 'loan', 'live', 'link', 'limo', 'like', 'life', 'lidl', 'lgbt', 'lego', 'land', 'kred', 'kpmg', 'kiwi', 'kddi', 'jprs', 'jobs', 'jeep', 'java', 'itau', 'info', 'immo', 'imdb', 'ieee', 'icbc', 'hsbc', 'host', 'hgtv', 'here', 'help', 'hdfc', 'haus', 'hair', 'guru', 'guge', 'goog', 'golf', 'gold', 'gmbh', 'gift', 'ggee', 'gent', 'gbiz', 'game', 'fund', 'free', 'ford', 'food', 'flir', 'fish', 'fire', 'film', 'fido', 'fiat', 'fast', 'farm', 'fans', 'fail', 'fage', 'erni', 'dvag', 'duck', 'docs', 'dish', 'diet', 'desi', 'dell', 'deal', 'dclk', 'date', 'data', 'cyou', 'coop', 'cool', 'club', 'city', 'citi', 'chat', 'cern', 'cbre', 'cash', 'case', 'casa', 'cars', 'care', 'camp', 'call', 'cafe', 'buzz', 'book', 'bond', 'bofa', 'blue', 'blog', 'bing', 'bike', 'best', 'beer', 'bbva', 'bank', 'band', 'baby', 'auto', 'audi', 'asia', 'asda', 'arte', 'arpa', 'army', 'arab', 'amex', 'ally', 'akdn', 'aero', 'adac', 'able', 'aarp', 'zip', 'yun', 'you', 'xyz', 'xxx', 'xin', 'wtf', 'wtc', 'wow', 'wme', 'win', 'wed', 'vip', 'vin', 'vig', 'vet', 'ups', 'uol', 'uno', 'ubs', 'tvs', 'tui', 'trv', 'top', 'tjx', 'thd', 'tel', 'tdk', 'tci', 'tax', 'tab', 'stc', 'srl', 'spa', 'soy', 'sky', 'ski', 'sfr', 'sex', 'sew', 'ses', 'scb', 'sca', 'sbs', 'sbi', 'sas', 'sap', 'rwe', 'run', 'rip', 'rio', 'ril', 'ren', 'red', 'qvc', 'pwc', 'pub', 'pru', 'pro', 'pnc', 'pin', 'pid', 'phd', 'pet', 'pay', 'ovh', 'ott', 'org', 'ooo', 'onl', 'ong', 'one', 'off', 'obi', 'nyc', 'ntt', 'nrw', 'nra', 'now', 'nhk', 'ngo', 'nfl', 'new', 'net', 'nec', 'nba', 'nab', 'mtr', 'mtn', 'msd', 'mov', 'mom', 'moi', 'moe', 'mma', 'mls', 'mlb', 'mit', 'mil', 'men', 'med', 'mba', 'map', 'man', 'ltd', 'lpl', 'lol', 'llp', 'llc', 'lds', 'law', 'lat', 'krd', 'kpn', 'kim', 'kia', 'kfh', 'joy', 'jot', 'jnj', 'jmp', 'jll', 'jio', 'jcb', 'itv', 'ist', 'int', 'ink', 'ing', 'inc', 'ifm', 'icu', 'ice', 'ibm', 'how', 'hot', 'hkt', 'hiv', 'hbo', 'gov', 'got', 'gop', 'goo', 'gmx', 'gmo', 'gle', 'gea', 'gdn', 'gay', 'gap', 'gal', 'fyi', 'fun', 'ftr', 'frl', 'fox', 'foo', 'fly', 'fit', 'fan', 'eus', 'esq', 'edu', 'eco', 'eat', 'dvr', 'dtv', 'dot', 'dog', 'dnp', 'diy', 'dhl', 'dev', 'dds', 'day', 'dad', 'csc', 'crs', 'cpa', 'com', 'cfd', 'cfa', 'ceo', 'ceb', 'cbs', 'cbn', 'cba', 'cat', 'car', 'cam', 'cal', 'cab', 'bzh', 'buy', 'box', 'bot', 'boo', 'bom', 'bmw', 'bms', 'biz', 'bio', 'bid', 'bet', 'bcn', 'bcg', 'bbt', 'bbc', 'bar', 'axa', 'aws', 'art', 'app', 'aol', 'anz', 'aig', 'afl', 'aeg', 'ads', 'aco', 'abc', 'abb', 'aaa', 'zw', 'zm', 'za', 'yt', 'ye', 'ws', 'wf', 'vu', 'vn', 'vi', 'vg', 've', 'vc', 'va', 'uz', 'uy', 'us', 'uk', 'ug', 'ua', 'tz', 'tw', 'tv', 'tt', 'tr', 'to', 'tn', 'tm', 'tl', 'tk', 'tj', 'th', 'tg', 'tf', 'td', 'tc', 'sz', 'sy', 'sx', 'sv', 'su', 'st', 'ss', 'sr', 'so', 'sn', 'sm', 'sl', 'sk', 'sj', 'si', 'sh', 'sg', 'se', 'sd', 'sc', 'sb', 'sa', 'rw', 'ru', 'rs', 'ro', 're', 'qa', 'py', 'pw', 'pt', 'ps', 'pr', 'pn', 'pm', 'pl', 'pk', 'ph', 'pg', 'pf', 'pe', 'pa', 'om', 'nz', 'nu', 'nr', 'np', 'no', 'nl', 'ni', 'ng', 'nf', 'ne', 'nc', 'na', 'mz', 'my', 'mx', 'mw', 'mv', 'mu', 'mt', 'ms', 'mr', 'mq', 'mp', 'mo', 'mn', 'mm', 'ml', 'mk', 'mh', 'mg', 'me', 'md', 'mc', 'ma', 'ly', 'lv', 'lu', 'lt', 'ls', 'lr', 'lk', 'li', 'lc', 'lb', 'la', 'kz', 'ky', 'kw', 'kr', 'kp', 'kn', 'km', 'ki', 'kh', 'kg', 'ke', 'jp', 'jo', 'jm', 'je', 'it', 'is', 'ir', 'iq', 'io', 'in', 'im', 'il', 'ie', 'id', 'hu', 'ht', 'hr', 'hn', 'hm', 'hk', 'gy', 'gw', 'gu', 'gt', 'gs', 'gr', 'gq', 'gp', 'gn', 'gm', 'gl', 'gi', 'gh', 'gg', 'gf', 'ge', 'gd', 'gb', 'ga', 'fr', 'fo', 'fm', 'fk', 'fj', 'fi', 'eu', 'et', 'es', 'er', 'eg', 'ee', 'ec', 'dz', 'do', 'dm', 'dk', 'dj', 'de', 'cz', 'cy', 'cx', 'cw', 'cv', 'cu', 'cr', 'co', 'cn', 'cm', 'cl', 'ck', 'ci', 'ch', 'cg', 'cf', 'cd', 'cc', 'ca', 'bz', 'by', 'bw', 'bv', 'bt', 'bs', 'br', 'bo', 'bn', 'bm', 'bj', 'bi', 'bh', 'bg', 'bf', 'be', 'bd', 'bb', 'ba', 'az', 'ax', 'aw', 'au', 'at', 'as', 'ar', 'aq', 'ao', 'am', 'al', 'ai', 'ag', 'af', 'ae', 'ad', 'ac']
 username = re.compile(r"(@[a-zA-Z0-9\.\-_]+[a-zA-Z0-9]+)")
 
 ## N.B. - this list of moji *must* be in reverse order of length (i.e., longest moji come first)
 moji_list = ["┻━┻︵ヽ('Д')ﾉ︵┻━┻", "v(^_^)v（'-'*)", ".....φ(・∀・＊)", "┬──┬ ¯\\_(ツ)", "(ノಠ益ಠ)ノ彡┻━┻", "(╯°□°）╯︵┻━┻", "((d[-_-]b))", "( ͡° ͜ʖ ͡°)", "┬─┬ノ(º_ºノ)", "(*^^)v(^^)", "(-.-)y-°°°", "(^.^)y-.o○", "(^^ゞ(^_^;)", "zzz(︶｡︶✽)", "(*^3^)/~☆", "¯\\_(ツ)_/¯", "(V)o￥o(V)", "(ToT)/~~~", "(T_T)/~~~", "(@^^)/~~~", "($··)/~~~", "(-_-)/~~~", "(^.^)/~~~", "(;_;)/~~~", "V=(° °)=V", "⎛⎝(•ⱅ•)⎠⎞", "@}-;-'---", "(*°∀°)=3", "(^^)/~~~", "(=^・・^=)", "<m(__)m>", "(-_-)zzz", "(=ʘᆽʘ=)∫", "～°·_·°～", "~>°)～～～", "<*))>=<", "<+))><<", ">°))))彡", "('･ω･')", "ヽ('ー｀)┌", "(*'▽｀*)", "(*^▽^*)", "(^)o(^)", "(●^o^●)", "(^0_0^)", "＼(◎o◎)／", "(*^0^*)", "ヽ(^o^)丿", "ヽ(^。^)ノ", "＼(-o-)／", "＼(^o^)／", "＼(~o~)／", "(^_^)/~", "(*^.^*)", "（*^_^*）", "(=^・^=)", "<(_ _)>", "_(_^_)_", "_(._.)_", "∩(·ω·)∩", "(/◕ヮ◕)/", "<(｀^')>", "((+_+))", "(^_-)-☆", "(#^.^#)", "><(((*>", "<*)))-{", "@>-->--", ":-###..", "<°)))彡", "(°))<<", ">°)))彡", "(*￣m￣)", "(￣□￣;)", "(✿◠‿◠)", "(~_~メ)", "(-_-メ)", "(^_^メ)", "!(^^)!", "(＠_＠;)", "(^_^.)", "(；一_一)", "(／ロ°)／", "＼(°ロ＼)", "m(__)m", "(^o^)丿", "(≧∇≦)/", "(^o^)／", "(^O^)／", "(^_^)/", "(°_°>)", "(・_・;)", "(・.・;)", "(~_~;)", "(-_-;)", "(>_<)>", "8====D", "@}->--", ":###..", ">°))彡", "('A')", "(°◇°)", "（ﾟДﾟ)", "(o.o)", "(￣ー￣)", ")^o^(", "(^○^)", "(^o^)", "(^O^)", "(^◇^)", "(^ｕ^)", "φ(..)", "(..)φ", "(ーー;)", "<'ヘ'>", "<'～'>", "(・へ・)", "(－－〆)", "(ーー゛)", "(- -)", "(p_-)", "(~_~)", "(~o~)", "('∀')", "(・∀・)", "(^▽^)", "(^ｖ^)", "(@_@。", "(@_@)", "(+_+)", "(*_*;", "(*_*)", "（^-^)", "(^J^)", "(^_^)", "(^·^)", "(^ム^)", "(^.^)", "(^<^)", "§^.^§", "<^!^>", ">^_^<", "(?_?)", "(._.)", "=^_^=", "(=_=)", "(-_-)", "(-.-)", "(ー_ー)", "(Ｔ▽Ｔ)", "(ToT)", "(:_;)", "(;O;)", "(;_:)", "(;_;)", "(T_T)", "(/_;)", "('_')", "(·ω·)", "(^^)/", "(°o°)", "(°レ°)", "(°_°)", "(°.°)", "(°-°)", "(+o+)", "(^_-)", "(^^;)", "(・・;)", "(';')", "(>_<)", "V.v.V", "*\\0/*", "8===D", "><ヨヨ", "(｀')", "(^^ゞ", "(⌒▽⌒", "(^^)", "(－ლ)", "(・・?", "(..)", "(一一)", "(__)", "(°°)", "^_^;", "^<_<", ">_>^", "o/\\o", "@};-", "<:-'", "3:-)", "}:-)", ">:-)", "0;^)", "0:-)", "0:-3", "O:-)", "://3", "://)", "D-':", ":'-)", ":'-(", ":-))", "●～*", "UwU", "uwu", "o.O", "o_0", "°O°", "°o°", "^/^", "^m^", ";n;", ";-;", ";_;", "_)m", "m(_", "^ω^", "^_^", "^^;", ">.<", "O-O", "o_o", "o_O", "O_o", "o-o", "O_O", "v.v", "><>", "<\\3", "</3", "x=3", "x-3", "8=X", "8-X", ">.>", "<.<", ">_>", "<_<", ":-l", ":-'", "%-)", "#-)", ":-J", "B-)", ">:3", ">;)", "3:)", "}:)", "0:)", "0:3", "O:)", ":-&", ":-#", ":-X", ">:/", ">:\\", ":-.", ":-/", ">:P", ":-b", ":-þ", ":-Þ", ":-p", "x-p", "X-P", ":-P", ":-,", ";^)", ";-]", "*-)", ";-)", ":-*", ">:O", "8-0", ":-0", ":-o", ":-O", "D:<", ":'(", ":-[", ":-<", ":-c", ":-(", "B-D", "B'D", "B^D", "X-D", "x-D", "8-D", ":-D", ":^)", ":c)", ":o)", ":-}", "8')", "8-)", ":'>", ":->", ":-3", ":-]", ":')", ":-)", "o7", "<3", "*<", ":E", "%)", ";3", ":&", ":#", ":X", ":$", ":-", ":S", "=L", ":L", "=\\", "=/", ":\\", ":/", "=p", "d:", ":b", ":þ", ":Þ", ":p", "xp", "XP", ":P", ";D", ";>", ";]", "*)", ";)", ":×", ":*", ":o", ":O", "DX", "D=", "D;", "D8", "D:", ";(", ":@", ":{", ":[", ":<", ":c", ":(", "C:", "c:", "=3", "=D", "XD", "xD", "8D", ":D", "=)", "=]", ":}", "8)", ":>", ":3", ":]", ":)"]
-moji_regex = re.compile(r"(?<![A-Za-z])(┻━┻︵ヽ\('Д'\)ﾉ︵┻━┻|v\(\^_\^\)|v（'\-'\*\)|\.\.\.\.\.φ\(・∀・＊\)|┬──┬¯\\_\(ツ\)|\(ノಠ益ಠ\)ノ彡┻━┻|\(╯°□°）╯︵┻━┻|\(\(d\[\-_\-\]b\)\)|┬─┬ノ\(º_ºノ\)|\(\*\^\^\)v\(\^\^\)|\(\-\.\-\)y\-°°°|\(\^\.\^\)y\-\.o○|\(\^\^ゞ\(\^_\^;\)|zzz\(︶｡︶✽\)|\(\*\^3\^\)/~☆|¯\\_\(ツ\)_/¯|\(V\)o￥o\(V\)|\(ToT\)/~~~|\(T_T\)/~~~|\(@\^\^\)/~~~|\(\$··\)/~~~|\(\-_\-\)/~~~|\(\^\.\^\)/~~~|\(;_;\)/~~~|V=\(° °\)=V|⎛⎝\(•ⱅ•\)⎠⎞|@\}-;-'---|\(\*°∀°\)=3|\(\^\^\)/~~~|\(=\^・・\^=\)|<m\(__\)m>|\(\-_\-\)zzz|\(=ʘᆽʘ=\)∫|～°·_·°～|~>°\)～～～|<\*\)\)>=<|<\+\)\)><<|>°\)\)\)\)彡|\('･ω･'\)|ヽ\('ー｀\)┌|\(\*'▽｀\*\)|\(\*\^▽\^\*\)|\(\^\)o\(\^\)|\(●\^o\^●\)|\(\^0_0\^\)|＼\(◎o◎\)／|\(\*\^0\^\*\)|ヽ\(\^o\^\)丿|ヽ\(\^。\^\)ノ|＼\(\-o\-\)／|＼\(\^o\^\)／|＼\(~o~\)／|\(\^_\^\)/~|\(\*\^\.\^\*\)|（\*\^_\^\*）|\(=\^・\^=\)|<\(__\)>|_\(_\^_\)_|_\(\._\.\)_|∩\(·ω·\)∩|\(/◕ヮ◕\)/|<\(｀\^'\)>|\(\(\+_\+\)\)|\(\^_\-\)\-☆|\(#\^\.\^#\)|><\(\(\(\*>|<\*\)\)\)-\{|@>-->--|:-###\.\.|<°\)\)\)彡|\(°\)\)<<|>°\)\)\)彡|\(\*￣m￣\)|\(￣□￣;\)|\(✿◠‿◠\)|\(~_~メ\)|\(\-_\-メ\)|\(\^_\^メ\)|!\(\^\^\)!|\(＠_＠;\)|\(\^_\^\.\)|\(；一_一\)|\(／ロ°\)／|＼\(°ロ＼\)|m\(__\)m|\(\^o\^\)丿|\(≧∇≦\)/|\(\^o\^\)／|\(\^O\^\)／|\(\^_\^\)/|\(°_°>\)|\(・_・;\)|\(・\.・;\)|\(~_~;\)|\(\-_\-;\)|\(>_<\)>|8====D|@\}\->\-\-|:###\.\.|>°\)\)彡|\('A'\)|\(°◇°\)|（ﾟДﾟ\)|\(o\.o\)|\(￣ー￣\)|\)\^o\^\(|\(\^○\^\)|\(\^o\^\)|\(\^O\^\)|\(\^◇\^\)|\(\^ｕ\^\)|φ\(\.\.\)|\(\.\.\)φ|\(ーー;\)|<'ヘ'>|<'～'>|\(・へ・\)|\(－－〆\)|\(ーー゛\)|\(\- \-\)|\(p_\-\)|\(~_~\)|\(~o~\)|\('∀'\)|\(・∀・\)|\(\^▽\^\)|\(\^ｖ\^\)|\(@_@。|\(@_@\)|\(\+_\+\)|\(\*_\*;|\(\*_\*\)|（\^-\^\)|\(\^J\^\)|\(\^_\^\)|\(\^·\^\)|\(\^ム\^\)|\(\^\.\^\)|\(\^<\^\)|§\^\.\^§|<\^!\^>|>\^_\^<|\(\?_\?\)|\(\._\.\)|=\^_\^=|\(=_=\)|\(\-_\-\)|\(\-\.\-\)|\(ー_ー\)|\(Ｔ▽Ｔ\)|\(ToT\)|\(:_;\)|\(;O;\)|\(;_:\)|\(;_;\)|\(T_T\)|\(/_;\)|\('_'\)|\(·ω·\)|\(\^\^\)/|\(°o°\)|\(°レ°\)|\(°_°\)|\(°\.°\)|\(°\-°\)|\(\+o\+\)|\(\^_\-\)|\(\^\^;\)|\(・・;\)|\(';'\)|\(>_<\)|V\.v\.V|\*\\0/\*|8===D|><ヨヨ|\(｀'\)|\(\^\^ゞ|\(⌒▽⌒|\(\^\^\)|\(－ლ\)|\(・・\?|\(\.\.\)|\(一一\)|\(__\)|\(°°\)|\^_\^;|\^<_<|>_>\^|o/\\o|@\};\-|<:-'|3:-\)|\}:-\)|>:-\)|0;\^\)|0:-\)|0:-3|O:-\)|://3|://\)|D-':|:'-\)|:'-\(|:\-\)\)|●～\*|UwU|uwu|o\.O|o_0|°O°|°o°|\^/\^|\^m\^|;n;|;\-;|;_;|_\)m|m\(_|\^ω\^|\^_\^|\^\^;|>\.<|O\-O|o_o|o_O|O_o|o-o|O_O|v\.v|><>|<\\3|</3|x=3|x\-3|8=X|8\-X|>\.>|<\.<|>_>|<_<|:\-l|:\-'|%-\)|#-\)|:-J|B\-\)|>:3|>;\)|3:\)|\}:\)|0:\)|0:3|O:\)|:-&|:-#|:-X|>:/|>:\\|:-\.|:\-/|>:P|:-b|:-þ|:-Þ|:-p|x-p|X-P|:-P|:-,|;\^\)|;-\]|\*\-\)|;-\)|:\-\*|>:O|8-0|:\-0|:-o|:-O|:-0|D:<|:'\(|:-\[|:-<|:-c|:-\(|:\-\||B\-D|B'D|B\^D|X-D|x-D|8-D|:-D|:\^\)|:c\)|:o\)|:\-\}|8'\)|8\-\)|:'>|:\->|:\-3|:\-\]|:'\)|:-\)|o7|<3|\*<|:E|%\)|;3|:&|:#|:X|:\$|:-|:S|=L|:L|=\\|=/|:\\|:/|=p|d:|:b|:þ|:Þ|:p|xp|XP|:P|;D|;>|;\]|\*\)|;\)|:×|:\*|:o|:O|:0|DX|D=|D;|D8|D:|;\(|:@|:\{|:\[|:<|:c|:\(|C:|c:|=3|=D|XD|xD|8D|:D|=\)|=\]|:\}|8\)|:>|:3|:\]|:\)|:\|)(?![A-Za-z])")
+## The emoticons which are kept whole as moji tokens, where they aren't part of a word (i.e. not next to a letter A-Z or a-z). Where more than one could start at the same place, the first in this list is taken.
+moji_literals = ["┻━┻︵ヽ('Д')ﾉ︵┻━┻", 'v(^_^)', "v（'-'*)", '.....φ(・∀・＊)', '┬──┬¯\\_(ツ)', '(ノಠ益ಠ)ノ彡┻━┻', '(╯°□°）╯︵┻━┻', '((d[-_-]b))', '┬─┬ノ(º_ºノ)', '(*^^)v(^^)', '(-.-)y-°°°', '(^.^)y-.o○', '(^^ゞ(^_^;)', 'zzz(︶｡︶✽)', '(*^3^)/~☆', '¯\\_(ツ)_/¯', '(V)o￥o(V)', '(ToT)/~~~', '(T_T)/~~~', '(@^^)/~~~', '($··)/~~~', '(-_-)/~~~', '(^.^)/~~~', '(;_;)/~~~', 'V=(° °)=V', '⎛⎝(•ⱅ•)⎠⎞', "@}-;-'---", '(*°∀°)=3', '(^^)/~~~', '(=^・・^=)', '<m(__)m>', '(-_-)zzz', '(=ʘᆽʘ=)∫', '～°·_·°～', '~>°)～～～', '<*))>=<', '<+))><<', '>°))))彡', "('･ω･')", "ヽ('ー｀)┌", "(*'▽｀*)", '(*^▽^*)', '(^)o(^)', '(●^o^●)', '(^0_0^)', '＼(◎o◎)／', '(*^0^*)', 'ヽ(^o^)丿', 'ヽ(^。^)ノ', '＼(-o-)／', '＼(^o^)／', '＼(~o~)／', '(^_^)/~', '(*^.^*)', '（*^_^*）', '(=^・^=)', '<(__)>', '_(_^_)_', '_(._.)_', '∩(·ω·)∩', '(/◕ヮ◕)/', "<(｀^')>", '((+_+))', '(^_-)-☆', '(#^.^#)', '><(((*>', '<*)))-{', '@>-->--', ':-###..', '<°)))彡', '(°))<<', '>°)))彡', '(*￣m￣)', '(￣□￣;)', '(✿◠‿◠)', '(~_~メ)', '(-_-メ)', '(^_^メ)', '!(^^)!', '(＠_＠;)', '(^_^.)', '(；一_一)', '(／ロ°)／', '＼(°ロ＼)', 'm(__)m', '(^o^)丿', '(≧∇≦)/', '(^o^)／', '(^O^)／', '(^_^)/', '(°_°>)', '(・_・;)', '(・.・;)', '(~_~;)', '(-_-;)', '(>_<)>', '8====D', '@}->--', ':###..', '>°))彡', "('A')", '(°◇°)', '（ﾟДﾟ)', '(o.o)', '(￣ー￣)', ')^o^(', '(^○^)', '(^o^)', '(^O^)', '(^◇^)', '(^ｕ^)', 'φ(..)', '(..)φ', '(ーー;)', "<'ヘ'>", "<'～'>", '(・へ・)', '(－－〆)', '(ーー゛)', '(- -)', '(p_-)', '(~_~)', '(~o~)', "('∀')", '(・∀・)', '(^▽^)', '(^ｖ^)', '(@_@。', '(@_@)', '(+_+)', '(*_*;', '(*_*)', '（^-^)', '(^J^)', '(^_^)', '(^·^)', '(^ム^)', '(^.^)', '(^<^)', '§^.^§', '<^!^>', '>^_^<', '(?_?)', '(._.)', '=^_^=', '(=_=)', '(-_-)', '(-.-)', '(ー_ー)', '(Ｔ▽Ｔ)', '(ToT)', '(:_;)', '(;O;)', '(;_:)', '(;_;)', '(T_T)', '(/_;)', "('_')", '(·ω·)', '(^^)/', '(°o°)', '(°レ°)', '(°_°)', '(°.°)', '(°-°)', '(+o+)', '(^_-)', '(^^;)', '(・・;)', "(';')", '(>_<)', 'V.v.V', '*\\0/*', '8===D', '><ヨヨ', "(｀')", '(^^ゞ', '(⌒▽⌒', '(^^)', '(－ლ)', '(・・?', '(..)', '(一一)', '(__)', '(°°)', '^_^;', '^<_<', '>_>^', 'o/\\o', '@};-', "<:-'", '3:-)', '}:-)', '>:-)', '0;^)', '0:-)', '0:-3', 'O:-)', '://3', '://)', "D-':", ":'-)", ":'-(", ':-))', '●～*', 'UwU', 'uwu', 'o.O', 'o_0', '°O°', '°o°', '^/^', '^m^', ';n;', ';-;', ';_;', '_)m', 'm(_', '^ω^', '^_^', '^^;', '>.<', 'O-O', 'o_o', 'o_O', 'O_o', 'o-o', 'O_O', 'v.v', '><>', '<\\3', '</3', 'x=3', 'x-3', '8=X', '8-X', '>.>', '<.<', '>_>', '<_<', ':-l', ":-'", '%-)', '#-)', ':-J', 'B-)', '>:3', '>;)', '3:)', '}:)', '0:)', '0:3', 'O:)', ':-&', ':-#', ':-X', '>:/', '>:\\', ':-.', ':-/', '>:P', ':-b', ':-þ', ':-Þ', ':-p', 'x-p', 'X-P', ':-P', ':-,', ';^)', ';-]', '*-)', ';-)', ':-*', '>:O', '8-0', ':-0', ':-o', ':-O', ':-0', 'D:<', ":'(", ':-[', ':-<', ':-c', ':-(', ':-|', 'B-D', "B'D", 'B^D', 'X-D', 'x-D', '8-D', ':-D', ':^)', ':c)', ':o)', ':-}', "8')", '8-)', ":'>", ':->', ':-3', ':-]', ":')", ':-)', 'o7', '<3', '*<', ':E', '%)', ';3', ':&', ':#', ':X', ':$', ':-', ':S', '=L', ':L', '=\\', '=/', ':\\', ':/', '=p', 'd:', ':b', ':þ', ':Þ', ':p', 'xp', 'XP', ':P', ';D', ';>', ';]', '*)', ';)', ':×', ':*', ':o', ':O', ':0', 'DX', 'D=', 'D;', 'D8', 'D:', ';(', ':@', ':{', ':[', ':<', ':c', ':(', 'C:', 'c:', '=3', '=D', 'XD', 'xD', '8D', ':D', '=)', '=]', ':}', '8)', ':>', ':3', ':]', ':)', ':|']
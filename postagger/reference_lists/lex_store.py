@@ -0,0 +1,256 @@
+""" On-disk format for the built lexica.
+
+A lexicon file holds a table of UTF-8 strings, a list of keys, a list of fixed-width records (one or more per key, each field being a string number) and an open-addressing hash index over the keys. Everything except the JSON metadata block is an array of unsigned 32-bit integers, so the file can be memory-mapped and searched in place without loading it into Python objects first.
+"""
+
+import os
+import json
+import mmap
+import zlib
+import struct
+from types import MappingProxyType
+from array import array
+from functools import lru_cache
+from collections import namedtuple
+from collections.abc import Mapping, Set
+
+MAGIC = b"TAGIWRLX"
+VERSION = 1
+# magic, version, byte-order check, number of fields per record, then counts and offsets of each section
+HEADER = struct.Struct("=8sIIIIIIIQQQQQQQ")
+BYTE_ORDER = 0x01020304
+
+ENTRY_FIELDS = ("lemma", "lemma_en", "pos_basic", "pos_enriched", "mutation")
+# One dictionary entry, as read from a lexicon. Entries can't be changed once made: a different mutation is given by making a copy with _replace, which shares everything else with the original.
+LexEntry = namedtuple("LexEntry", ENTRY_FIELDS)
+# Number of keys whose entries each lexicon keeps decoded
+RECORD_CACHE_SIZE = 16384
+
+def _pad(handle):
+    while handle.tell() % 8 != 0:
+        handle.write(b"\0")
+
+def write_store(path, records, fields, meta=None):
+    """ Write a mapping of {key: [record, ...]} to path, where each record is a tuple of len(fields) strings. The file is written under a temporary name and moved into place, so processes which already have the old file mapped keep a consistent view of it."""
+    strings = {}
+    string_data = []
+    string_offsets = array("I", [0])
+    def string_id(text):
+        if text not in strings:
+            encoded = text.encode("utf-8")
+            strings[text] = len(strings)
+            string_data.append(encoded)
+            string_offsets.append(string_offsets[-1] + len(encoded))
+        return strings[text]
+    keys = array("I")
+    fields_data = array("I")
+    record_count = 0
+    for key, key_records in records.items():
+        keys.extend((string_id(key), record_count, len(key_records)))
+        for record in key_records:
+            if len(record) != len(fields):
+                raise ValueError("Record for {} has {} fields, expected {}".format(key, len(record), len(fields)))
+            for field in record:
+                fields_data.append(string_id(field))
+            record_count += 1
+    key_count = len(keys) // 3
+    slot_count = 8
+    while slot_count < key_count * 2:
+        slot_count *= 2
+    slots = array("I", bytes(4 * slot_count))
+    mask = slot_count - 1
+    for k in range(key_count):
+        slot = zlib.crc32(string_data[keys[3*k]]) & mask
+        while slots[slot] != 0:
+            slot = (slot + 1) & mask
+        slots[slot] = k + 1
+    meta = dict(meta or {})
+    meta["fields"] = list(fields)
+    meta_data = json.dumps(meta, ensure_ascii=False).encode("utf-8")
+    partial = "{}.{}.part".format(path, os.getpid())
+    with open(partial, "wb") as handle:
+        handle.write(b"\0" * HEADER.size)
+        _pad(handle)
+        offsets = []
+        for section in (b"".join(string_data), string_offsets.tobytes(), keys.tobytes(), fields_data.tobytes(), slots.tobytes(), meta_data):
+            offsets.append(handle.tell())
+            handle.write(section)
+            _pad(handle)
+        handle.seek(0)
+        handle.write(HEADER.pack(MAGIC, VERSION, BYTE_ORDER, len(fields), len(strings), key_count, record_count, slot_count, *offsets, len(meta_data)))
+    os.replace(partial, path)
+
+class LexiconStore:
+    """ Read-only, memory-mapped view of a file written by write_store. Lookups hash the key and probe the index in the mapped file, so nothing but the small header and metadata is read into memory up front."""
+
+    def __init__(self, path):
+        self._path = path
+        with open(path, "rb") as handle:
+            self._mmap = mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, byte_order, self._field_count, string_count, self._key_count, record_count, self._slot_count, strings_start, offsets_start, keys_start, records_start, slots_start, meta_start, meta_length = HEADER.unpack_from(self._mmap, 0)
+        if magic != MAGIC or version != VERSION or byte_order != BYTE_ORDER:
+            raise ValueError("{} is not a lexicon file built by this version of the tagger on this platform. Please rebuild the lexica.".format(path))
+        self._view = view = memoryview(self._mmap)
+        self._strings_start = strings_start
+        self._string_offsets = view[offsets_start:offsets_start + 4 * (string_count + 1)].cast("I")
+        self._keys = view[keys_start:keys_start + 12 * self._key_count].cast("I")
+        self._records = view[records_start:records_start + 4 * self._field_count * record_count].cast("I")
+        self._slots = view[slots_start:slots_start + 4 * self._slot_count].cast("I")
+        self._meta = json.loads(self._mmap[meta_start:meta_start + meta_length].decode("utf-8"))
+        self._fields = tuple(self._meta["fields"])
+
+    def path(self):
+        return self._path
+
+    def meta(self):
+        return self._meta
+
+    def fields(self):
+        return self._fields
+
+    def _bytes(self, string_id):
+        start = self._strings_start + self._string_offsets[string_id]
+        end = self._strings_start + self._string_offsets[string_id + 1]
+        return self._mmap[start:end]
+
+    def string(self, string_id):
+        return self._bytes(string_id).decode("utf-8")
+
+    def find(self, key):
+        """ Return the position of key in the key list, or -1 if it isn't there """
+        try:
+            encoded = key.encode("utf-8")
+        except (AttributeError, UnicodeEncodeError):
+            return -1
+        mask = self._slot_count - 1
+        slot = zlib.crc32(encoded) & mask
+        while True:
+            k = self._slots[slot]
+            if k == 0:
+                return -1
+            if self._bytes(self._keys[3*(k-1)]) == encoded:
+                return k - 1
+            slot = (slot + 1) & mask
+
+    def records(self, key):
+        """ Return the records stored under key, as tuples of strings """
+        k = self.find(key)
+        if k == -1:
+            raise KeyError(key)
+        return self._key_records(k)
+
+    def _key_records(self, k):
+        first = self._keys[3*k + 1]
+        count = self._keys[3*k + 2]
+        width = self._field_count
+        output = []
+        for r in range(first, first + count):
+            output.append(tuple(self._field_string(self._records[r*width + f]) for f in range(width)))
+        return output
+
+    def _field_string(self, string_id):
+        return self.string(string_id)
+
+    def __contains__(self, key):
+        return self.find(key) != -1
+
+    def __len__(self):
+        return self._key_count
+
+    def __iter__(self):
+        for k in range(self._key_count):
+            yield self.string(self._keys[3*k])
+
+    def close(self):
+        for view in (self._string_offsets, self._keys, self._records, self._slots, self._view):
+            view.release()
+        self._mmap.close()
+
+def entry_record(dict_item):
+    """ Flatten a lexicon entry dict into a record for write_store """
+    return (dict_item["lemma"], dict_item["lemma_en"], dict_item["pos_basic"], json.dumps(dict_item["pos_enriched"], ensure_ascii=False), dict_item["mutation"])
+
+def write_lexicon(path, lexicon, meta=None):
+    """ Write a built lexicon ({wordform: [entry dict, ...]}) to path """
+    records = {}
+    for wordform, dict_items in lexicon.items():
+        records[wordform] = [entry_record(di) for di in dict_items]
+    write_store(path, records, ENTRY_FIELDS, meta)
+
+class Lexicon(LexiconStore, Mapping):
+    """ A built lexicon, looked up like the dictionaries it replaces: lexicon[wordform] returns a tuple of LexEntry. Each string is decoded once and then shared by every entry that uses it, as is each part-of-speech descriptor (a read-only mapping); entries for the most recently used keys are kept, since nothing can change them."""
+
+    def __init__(self, path):
+        super().__init__(path)
+        self._string_cache = {}
+        self._pos_cache = {}
+        self._entries = lru_cache(maxsize=RECORD_CACHE_SIZE)(self._read_entries)
+
+    def _field_string(self, string_id):
+        # only the strings in records are kept, so that reading through the keys doesn't fill the cache
+        if string_id not in self._string_cache:
+            self._string_cache[string_id] = self.string(string_id)
+        return self._string_cache[string_id]
+
+    def pos_enriched(self, pos_json):
+        if pos_json not in self._pos_cache:
+            self._pos_cache[pos_json] = MappingProxyType(json.loads(pos_json))
+        return self._pos_cache[pos_json]
+
+    def _read_entries(self, key):
+        entries = []
+        for lemma, lemma_en, pos_basic, pos_enriched, mutation in self.records(key):
+            entries.append(LexEntry(lemma, lemma_en, pos_basic, self.pos_enriched(pos_enriched), mutation))
+        return tuple(entries)
+
+    def __getitem__(self, key):
+        return self._entries(key)
+
+    def __contains__(self, key):
+        return self.find(key) != -1
+
+    def __len__(self):
+        return self._key_count
+
+    def __iter__(self):
+        return LexiconStore.__iter__(self)
+
+class KeyView(Set):
+    """ Set-like view of the keys of one or more lexica. Membership is tested against the mapped files themselves, so worker processes share the same pages instead of each holding its own set of keys."""
+
+    def __init__(self, *stores):
+        self._stores = stores
+
+    @classmethod
+    def _from_iterable(cls, iterable):
+        # results of set operations such as & and - are ordinary sets
+        return set(iterable)
+
+    def stores(self):
+        return self._stores
+
+    def __contains__(self, key):
+        for store in self._stores:
+            if key in store:
+                return True
+        return False
+
+    def __iter__(self):
+        for i, store in enumerate(self._stores):
+            for key in store:
+                if not any(key in earlier for earlier in self._stores[:i]):
+                    yield key
+
+    def __len__(self):
+        if len(self._stores) == 1:
+            return len(self._stores[0])
+        return sum(1 for key in self)
+
+    def union(self, *others):
+        stores = list(self._stores)
+        for other in others:
+            for store in other.stores():
+                # compare by identity: == on a Mapping would read both lexica in full
+                if not any(store is known for known in stores):
+                    stores.append(store)
+        return KeyView(*stores)
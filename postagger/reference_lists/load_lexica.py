@@ -1,6 +1,7 @@
 import sys
 import os
 import json
+import hashlib
 from termcolor import colored
 from pathlib import Path
 
@@ -12,7 +13,14 @@ ref_path = Path(os.path.dirname(__file__))
 lex_path = Path(os.path.abspath(ref_path) + "/lexica")
 
 from admin_refs import *
-from ref_functs import mutate, mwu_exclusions
+from ref_functs import mutate, mutatable, spelling_skeleton
+from lex_store import write_lexicon, write_store, VERSION
+
+# Records a hash of every input each built lexicon was made from, so that only the lexica whose inputs have changed need to be rebuilt.
+manifest_file = Path(ref_path/"lexica_manifest.json")
+lexicon_names = ("cy", "en", "gaz")
+# The ways the Welsh lexicon can hold mutated forms: "expanded" stores every mutated form of each word alongside its radical form, while "on-the-fly" stores the radical forms alone and works out mutated forms from them as they are looked up, making the lexicon about a third of the size at the cost of more work per lookup.
+mutation_modes = ("expanded", "on-the-fly")
 
 def get_morph(pos):
     pose = {}
@@ -65,23 +73,16 @@ def load_cy():
                 lexicon[wordform] = [{"lemma": entry_parts[1], "lemma_en": entry_parts[2],  "pos_basic": entry_parts[3], "pos_enriched": pose, "mutation":"0m"}]
             else:
                 lexicon[wordform].append({"lemma": entry_parts[1], "lemma_en": entry_parts[2],  "pos_basic": entry_parts[3], "pos_enriched": pose, "mutation":"0m"})
-            if wordform[0] in ["l", "r", "t", "p", "c", "b", "d", "g", "m", "â", "ê", "î", "ô", "ŷ", "a", "e", "i", "o", "u", "w", "y"] and (len(wordform) > 2 or wordform in two_mut):
-                mutatable = 1
-                if "_" in wordform:
-                    first_underscore = wordform.index("_")
-                    first_word = wordform[:first_underscore]
-                    if first_word in mwu_exclusions:
-                        mutatable = 0
-                if mutatable == 1:
-                    mutated = mutate(entry_parts[0])
-                    if mutated != []:
-                        for mform in mutated:
-                            form = mform[0]
-                            mtype = mform[1]
-                            if form not in lexicon:
-                                lexicon[form] = [{"lemma": entry_parts[1], "lemma_en": entry_parts[2],  "pos_basic": entry_parts[3], "pos_enriched": pose, "mutation": mtype}]
-                            else:
-                                lexicon[form].append({"lemma": entry_parts[1], "lemma_en": entry_parts[2],  "pos_basic": entry_parts[3], "pos_enriched": pose, "mutation": mtype})
+            if mutatable(wordform, two_mut):
+                mutated = mutate(entry_parts[0])
+                if mutated != []:
+                    for mform in mutated:
+                        form = mform[0]
+                        mtype = mform[1]
+                        if form not in lexicon:
+                            lexicon[form] = [{"lemma": entry_parts[1], "lemma_en": entry_parts[2],  "pos_basic": entry_parts[3], "pos_enriched": pose, "mutation": mtype}]
+                        else:
+                            lexicon[form].append({"lemma": entry_parts[1], "lemma_en": entry_parts[2],  "pos_basic": entry_parts[3], "pos_enriched": pose, "mutation": mtype})
         for lex_entry in lexicon:
             if lex_entry.find("_") != -1:
                 bits = lex_entry.split("_")
@@ -91,87 +92,52 @@ def load_cy():
                     mwus[keyword] = count
     return lexicon, mwus
 
+def gaz_entry(word, lemma_en, pos_enriched):
+    return {"lemma": word, "lemma_en": lemma_en, "pos_basic": "E", "pos_enriched": pos_enriched, "mutation": "0m"}
+
 def load_gaz(language):
     gazetteers = {}
-    term_list = []
+    term_list = {}
     gaz_union = {}
     mwus = {}
     if language == "c":
         print("     casglu rhestr o dermau...")
     else:
         print("     compiling list of terms...")
-    for gaz in os.listdir("{}/gazetteers".format(os.path.dirname(os.path.abspath(__file__)))):
+    gaz_dir = "{}/gazetteers".format(os.path.dirname(os.path.abspath(__file__)))
+    for gaz in sorted(os.listdir(gaz_dir)):
         if gaz.startswith("._") == False: 
-            with open("{}/gazetteers/{}".format(os.path.dirname(os.path.abspath(__file__)), gaz), encoding="utf-8") as loaded_gazetteer:
+            with open("{}/{}".format(gaz_dir, gaz), encoding="utf-8") as loaded_gazetteer:
                 terms = loaded_gazetteer.read().splitlines()
                 gaz_name, gaz_ext = os.path.splitext(gaz)
-                gazetteers[gaz_ext[1:]] = list(set(terms))
-                term_list += terms
-    term_list = set(term_list)
-    if language == "c":
-        message = "creu cofnodion y lecsicon"
-    else:
-        message = "compiling lexicon entries"
+                # sets, so that each membership test below is a single lookup rather than a scan of the whole gazetteer
+                gazetteers[gaz_ext[1:]] = set(terms)
+                term_list.update(dict.fromkeys(terms))
+    proper = gazetteers.get("other_proper", set()) | gazetteers.get("places", set())
+    surnames = gazetteers.get("surnames", set())
+    givennames_f = gazetteers.get("givennames_f", set())
+    givennames_m = gazetteers.get("givennames_m", set())
+    pos_ep = {"cat":"E", "prop": "p", "seg":"E p", "full":"Ep"}
+    pos_epb = {"cat":"E", "prop": "p", "gender":"b", "seg":"E p b", "full":"Epb"}
+    pos_epg = {"cat":"E", "prop": "p", "gender":"g", "seg":"E p g", "full":"Epg"}
     for word in term_list:
-        gaz_entry = []
-        if word in gazetteers["other_proper"] or word in gazetteers["places"]:
-            entry = {}
-            gaz_pos = "Ep"
-            lemma_en = "proper_noun"
-            entry["lemma"] = word
-            entry["lemma_en"] = lemma_en
-            entry["pos_basic"] = "E"
-            entry["pos_enriched"] = {"cat":"E", "prop": "p", "seg":"E p", "full":"Ep"}
-            entry["mutation"] = "0m"
-            gaz_entry += [entry]
-        elif word in gazetteers["surnames"]:
-            entry = {}
-            gaz_pos = "Ep"
-            lemma_en = "personal_name"
-            entry["lemma"] = word
-            entry["lemma_en"] = lemma_en
-            entry["pos_basic"] = "E"
-            entry["pos_enriched"] = {"cat":"E", "prop": "p", "seg":"E p", "full":"Ep"}
-            entry["mutation"] = "0m"
-            gaz_entry += [entry]
-        elif word in gazetteers["givennames_f"] and word in gazetteers["givennames_m"]:
-            entry = {}
-            gaz_pos = "Ep"
-            lemma_en = "personal_name"
-            entry["lemma"] = word
-            entry["lemma_en"] = lemma_en
-            entry["pos_basic"] = "E"
-            entry["pos_enriched"] = {"cat":"E", "prop": "p", "seg":"E p", "full":"Ep"}
-            entry["mutation"] = "0m"
-            gaz_entry += [entry]
-        elif word in gazetteers["givennames_f"]:
-            entry = {}
-            gaz_pos = "Epb"
-            lemma_en = "personal_name"
-            entry["lemma"] = word
-            entry["lemma_en"] = lemma_en
-            entry["pos_basic"] = "E"
-            entry["pos_enriched"] = {"cat":"E", "prop": "p", "gender":"b", "seg":"E p b", "full":"Epb"}
-            entry["mutation"] = "0m"
-            gaz_entry += [entry]
-        elif word in gazetteers["givennames_m"]:
-            entry = {}
-            gaz_pos = "Epg"
-            lemma_en = "personal_name"
-            entry["lemma"] = word
-            entry["lemma_en"] = lemma_en
-            entry["pos_basic"] = "E"
-            entry["pos_enriched"] = {"cat":"E", "prop": "p", "gender":"g", "seg":"E p g", "full":"Epg"}
-            entry["mutation"] = "0m"
-            gaz_entry += [entry]
-        gaz_union[word] = gaz_entry
-
-    for lex_entry in gaz_union:
-        if lex_entry.find("_") != -1:
-            bits = lex_entry.split("_")
+        if word in proper:
+            gaz_union[word] = [gaz_entry(word, "proper_noun", pos_ep)]
+        elif word in surnames:
+            gaz_union[word] = [gaz_entry(word, "personal_name", pos_ep)]
+        elif word in givennames_f and word in givennames_m:
+            gaz_union[word] = [gaz_entry(word, "personal_name", pos_ep)]
+        elif word in givennames_f:
+            gaz_union[word] = [gaz_entry(word, "personal_name", pos_epb)]
+        elif word in givennames_m:
+            gaz_union[word] = [gaz_entry(word, "personal_name", pos_epg)]
+        else:
+            gaz_union[word] = []
+        if "_" in word:
+            bits = word.split("_")
             count = len(bits)
             keyword = bits[0].lower()
-            if keyword not in mwus or (keyword in mwus and mwus[keyword] < count):
+            if keyword not in mwus or mwus[keyword] < count:
                 mwus[keyword] = count
     return gaz_union, mwus
 
@@ -195,12 +161,18 @@ def check_lex():
     return(bad_entries_en, bad_entries_cy)
 
 
-def load_lexica(language, no_gaz=False):
+def load_lexica(language, no_gaz=False, names=None, mutations=None):
+    """ Build the named lexica (by default all of them, or all but the gazetteers if no_gaz is set) and record their inputs in the manifest. mutations is one of mutation_modes, and defaults to the mode the Welsh lexicon was last built with."""
+    mutations = mutation_mode(mutations)
+    if names == None:
+        names = [name for name in lexicon_names if not (no_gaz == True and name == "gaz")]
     if language == "c":
         print("\nGwirio'r mewnbwn...\n\n")
     else:
         print("\nValidating input data...\n\n")
-    bad_entries_en, bad_entries_cy = check_lex()
+    bad_entries_en, bad_entries_cy = [], []
+    if "cy" in names or "en" in names:
+        bad_entries_en, bad_entries_cy = check_lex()
     if bad_entries_cy != [] or bad_entries_en != []:
         outcome = "fail"
         if language == "c":
@@ -226,65 +198,130 @@ def load_lexica(language, no_gaz=False):
             print("You must fix the bad data before re-running the code.")
         raise ValueError("Cannot continue until lexicon data is fixed.")
     else:
+        manifest = read_manifest()
+        for name in names:
+            build_lexicon(name, language, mutations)
+            manifest[name] = lexicon_inputs(name, mutations)
+            write_manifest(manifest)
+
+def build_lexicon(name, language, mutations="expanded"):
+    if name == "cy":
         if language == "c":
             print("Adeiladu'r lecsicon Cymraeg...")
         else:
             print("Building Welsh lexicon...")
-        cy_dict_update, cmwu_update = load_cy()
+        dict_update, mwu_update = load_cy()
+    elif name == "en":
         if language == "c":
             print("Adeiladu'r lecsicon Saesneg...")
         else:
             print("Building English lexicon...")
-        en_dict_update, emwu_update = load_en()
-        if no_gaz==False:
-            if language == "c":
-                print("Adeiladu lecsicon enwau priod...")
-            else:
-                print("Building lexicon of proper nouns...")
-            gaz_dict_update, gmwu_update = load_gaz(language)
-        with open(Path(ref_path/"cy_lexicon.py"), "w", encoding="utf-8") as cy_dump:
-            if language == "c":
-                print("Ygrifennu'r lecsicon Cymraeg i'r ffeil...")
-            else:
-                print("Writing Welsh lexicon to file...")
-            output = "cy_dict = " + json.dumps(cy_dict_update, ensure_ascii=False)
-            cy_dump.write(output)
-        with open(Path(ref_path/"cy_mwus.py"), "w", encoding="utf-8") as cmwu_dump:
-            output = "cy_mwus = " + json.dumps(cmwu_update, ensure_ascii=False)
-            cmwu_dump.write(output)
-            if language == "c":
-                print("Wedi ail-adeiladu'r lecsicon Cymraeg.")
-            else:
-                print("Welsh lexicon rebuilt.")
-        with open(Path(ref_path/"en_lexicon.py"), "w", encoding="utf-8") as en_dump:        
-            if language == "c":
-                print("Ygrifennu'r lecsicon Saesneg i'r ffeil...")
-            else:
-                print("Writing English lexicon to file...")
-            output = "en_dict = " + json.dumps(en_dict_update, ensure_ascii=False)
-            en_dump.write(output)
-        with open(Path(ref_path/"en_mwus.py"), "w", encoding="utf-8") as emwu_dump:
-            output = "en_mwus = " + json.dumps(emwu_update, ensure_ascii=False)
-            emwu_dump.write(output)
-            if language == "c":
-                print("Wedi ail-adeiladu'r lecsicon Saesneg.")
-            else:
-                print("English lexicon rebuilt.")
-        if no_gaz==False:
-            with open(Path(ref_path/"gaz_lexicon.py"), "w", encoding="utf-8") as gaz_dump:
-                if language == "c":
-                    print("Ygrifennu'r lecsicon enwau priod i'r ffeil...")
-                else:
-                    print("Writing proper-noun lexicon to file...")
-                output = "gaz_dict = " + json.dumps(gaz_dict_update, ensure_ascii=False)
-                gaz_dump.write(output)
-            with open(Path(ref_path/"gaz_mwus.py"), "w", encoding="utf-8") as gmwu_dump:
-                output = "gaz_mwus = " + json.dumps(gmwu_update, ensure_ascii=False)
-                gmwu_dump.write(output)
-                if language == "c":
-                    print("Wedi ail-adeiladu'r lecsicon enwau priod.")
-                else:
-                    print("Proper-noun lexicon rebuilt.")
+        dict_update, mwu_update = load_en()
+    else:
+        if language == "c":
+            print("Adeiladu lecsicon enwau priod...")
+        else:
+            print("Building lexicon of proper nouns...")
+        dict_update, mwu_update = load_gaz(language)
+    # the multi-word unit keys are listed in the metadata too, so that the tagger can index them without reading every key in the lexicon
+    mwu_keys = sorted(key for key in dict_update if "_" in key)
+    meta = {"mwus": mwu_update, "mwu_keys": mwu_keys}
+    if name == "cy":
+        meta["mutations"] = mutations
+        meta["keys"] = len(dict_update)
+    if name == "cy" and mutations == "on-the-fly":
+        # only the entries for the radical forms are stored; the metadata and the spelling index below still cover the mutated forms
+        stored = {}
+        for wordform, dict_items in dict_update.items():
+            radical_items = [di for di in dict_items if di["mutation"] == "0m"]
+            if radical_items != []:
+                stored[wordform] = radical_items
+        write_lexicon(lexicon_file(name), stored, meta)
+    else:
+        write_lexicon(lexicon_file(name), dict_update, meta)
+    if name == "cy":
+        # an index of the spelling skeletons of the Welsh wordforms, which lets the tagger skip trying spelling corrections on words that have none in the lexicon
+        write_store(spelling_index_file(), {skeleton: [] for skeleton in set(spelling_skeleton(key) for key in dict_update)}, ())
+    rebuilt = {"cy": ("Wedi ail-adeiladu'r lecsicon Cymraeg.", "Welsh lexicon rebuilt."), "en": ("Wedi ail-adeiladu'r lecsicon Saesneg.", "English lexicon rebuilt."), "gaz": ("Wedi ail-adeiladu'r lecsicon enwau priod.", "Proper-noun lexicon rebuilt.")}
+    if language == "c":
+        print(rebuilt[name][0])
+    else:
+        print(rebuilt[name][1])
+
+def lexicon_file(name):
+    return Path(ref_path/"{}_lexicon.lex".format(name))
+
+def spelling_index_file():
+    return Path(ref_path/"cy_spelling.lex")
+
+def lexicon_sources(name):
+    """ The source files that the named lexicon is built from """
+    if name == "cy":
+        sources = [Path(lex_path/"cy_lexicon_2021.txt"), Path(ref_path/"mut_exclude.csv")]
+    elif name == "en":
+        sources = [Path(lex_path/"en_lexicon_2021.txt")]
+    else:
+        gaz_dir = Path(ref_path/"gazetteers")
+        sources = [Path(gaz_dir/gaz) for gaz in sorted(os.listdir(gaz_dir)) if gaz.startswith("._") == False]
+    # changes to the build code can change the output too
+    builders = [Path(ref_path/"load_lexica.py"), Path(ref_path/"ref_functs.py"), Path(ref_path/"admin_refs.py"), Path(ref_path/"lex_store.py")]
+    return sources + builders
+
+def file_hash(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as source:
+        for block in iter(lambda: source.read(1024*1024), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+def lexicon_inputs(name, mutations="expanded"):
+    inputs = {"format": VERSION}
+    if name == "cy":
+        inputs["mutations"] = mutations
+    for source in lexicon_sources(name):
+        inputs[source.name] = file_hash(source)
+    return inputs
+
+def read_manifest():
+    if manifest_file.exists():
+        with open(manifest_file, encoding="utf-8") as manifest:
+            return json.load(manifest)
+    return {}
 
+def write_manifest(manifest):
+    partial = Path(ref_path/"lexica_manifest.json.{}.part".format(os.getpid()))
+    with open(partial, "w", encoding="utf-8") as manifest_dump:
+        json.dump(manifest, manifest_dump, indent=1, sort_keys=True)
+    os.replace(partial, manifest_file)
 
+def mutation_mode(mutations=None):
+    """ The mode for mutations, if one is given, or else the one the Welsh lexicon was last built with """
+    if mutations != None:
+        if mutations not in mutation_modes:
+            raise ValueError("Unknown mutation mode {}: expected one of {}".format(mutations, ", ".join(mutation_modes)))
+        return mutations
+    return read_manifest().get("cy", {}).get("mutations", "expanded")
 
+def stale_lexica(mutations=None):
+    """ Return the names of the lexica that are missing, or whose inputs have changed since they were built """
+    mutations = mutation_mode(mutations)
+    manifest = read_manifest()
+    stale = []
+    for name in lexicon_names:
+        if not lexicon_file(name).exists() or manifest.get(name) != lexicon_inputs(name, mutations):
+            stale.append(name)
+        elif name == "cy" and not spelling_index_file().exists():
+            stale.append(name)
+    return stale
+
+def update_lexica(language, mutations=None):
+    """ Rebuild whichever lexica are out of date, without asking, including the Welsh lexicon if it was built with a different mode for mutations. Returns the names of the lexica that were rebuilt."""
+    mutations = mutation_mode(mutations)
+    stale = stale_lexica(mutations)
+    if stale != []:
+        if language == "c":
+            print("\nMae angen ail-adeiladu'r lecsica canlynol: {}".format(", ".join(stale)))
+        else:
+            print("\nThe following lexica need to be rebuilt: {}".format(", ".join(stale)))
+        load_lexica(language, names=stale, mutations=mutations)
+    return stale
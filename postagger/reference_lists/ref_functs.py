@@ -45,118 +45,115 @@ mut_exclusions = load_mut_exclusions()
 
 mwu_exclusions = {"'slawer", "a", "ac", "adnabod", "ail", "am", "ar", "at", "beth", "bob", "byth", "diolch", "dros", "dy", "e", "ei", "eich", "ein", "eitha'", "eitha", "er", "erbyn", "ers", "eu", "fan", "fath", "fel", "fesul", "ffon", "ffonau", "ffor'", "ffor", "ffordd", "ffyn", "ffôn", "fodd", "fy", "gan", "ger", "gwaetha'r", "gwaethar", "gyda'r", "gyda", "hanner", "heb", "hollti", "hwyl", "hyd", "hynny", "i'r", "i", "man", "mewn", "mohono", "mohonoch", "mohonom", "mohonon", "mohonot", "mohonyn", "moni", "mono", "monoch", "monon", "monyn", "nag", "naill", "naw", "negesu", "negesydd", "negesyddion", "nes", "nesa", "nesaf", "newydd", "niwed", "nos", "o'r", "o", "oddi", "os", "p'un", "saith", "serch", "sglodion", "sglodyn", "shwd", "shwt", "siart", "siartiau", "slawer", "sugnydd", "sugnyddion", "sul", "sut", "swyddfa'r", "swyddfa", "swydfeydd", "synnwyr", "system", "systemau", "syth", "ta", "un", "unwaith", "uwch", "wedi'i", "wedi'r", "wrth", "wyneb", "wyth", "y", "ych", "ym", "ymlaen", "ymyriadau", "yn", "yng", "yr"}
 
+# Initial-consonant mutations as prefix rewrites: (radical prefix, letters which may not follow it, [(mutated prefix, mutation), ...]). A word takes the mutations of the first radical prefix that fits it, so longer prefixes come before the shorter ones they start with.
+mutation_rules = [("ll", (), [("l", "sm")]),
+    ("rh", (), [("r", "sm")]),
+    ("ts", (), [("j", "sm")]),
+    ("p", ("h", "s"), [("b", "sm"), ("mh", "nm"), ("ph", "am")]),
+    ("t", ("h", "s"), [("d", "sm"), ("nh", "nm"), ("th", "am")]),
+    ("c", ("h",), [("g", "sm"), ("ngh", "nm"), ("ch", "am")]),
+    ("b", (), [("f", "sm"), ("m", "nm")]),
+    ("d", ("d",), [("dd", "sm"), ("n", "nm")]),
+    ("g", (), [("", "sm"), ("ng", "nm")]),
+    ("m", (), [("f", "sm")])]
+mutation_rules += [(vowel, (), [("h" + vowel, "hm")]) for vowel in ["â", "ê", "î", "ô", "ŷ", "a", "e", "i", "o", "u", "w", "y"]]
+
+# The rules indexed by the first letter of the radical prefix, and the other way round, by the first letter of the mutated prefix ("" for the soft mutation of g, which drops the letter altogether)
+mutation_table = {}
+radical_table = {"": []}
+for prefix, excluded, mutations in mutation_rules:
+    mutation_table.setdefault(prefix[:1], []).append((prefix, excluded, mutations))
+    for mutated_prefix, mutation in mutations:
+        radical_table.setdefault(mutated_prefix[:1], []).append((mutated_prefix, prefix, mutation))
+
 def mutate(token):
     mutated = []
-    if token[:2] == "ll":
-        mutated = [(token[1:], "sm")]
-    elif token[:2] == "rh":
-        soft = "r" + token[2:]
-        mutated = [(soft, "sm")]
-    elif token[:2] == "ts":
-        soft = "j" + token[2:]
-        mutated = [(soft, "sm")]
-    elif token[0] == "p" and token[1] not in ["h", "s"]:
-        soft = "b" + token[1:]
-        nasal = "mh" + token[1:]
-        aspirate = "ph" + token[1:]
-        mutated = [(soft, "sm"), (nasal, "nm"), (aspirate, "am")]
-    elif token[0] == "t" and token[1] not in ["h", "s"]:
-        soft = "d" + token[1:]
-        nasal = "nh" + token[1:]
-        aspirate = "th" + token[1:]
-        mutated = [(soft, "sm"), (nasal, "nm"), (aspirate, "am")]        
-    elif token[0] == "c" and token[1] != "h":
-        soft = "g" + token[1:]
-        nasal = "ngh" + token[1:]
-        aspirate = "ch" + token[1:]
-        mutated = [(soft, "sm"), (nasal, "nm"), (aspirate, "am")]   
-    elif token[0] == "b":
-        soft = "f" + token[1:]
-        nasal = "m" + token[1:]
-        mutated = [(soft, "sm"), (nasal, "nm")] 
-    elif token[0] == "d" and token[1] != "d":
-        soft = "dd" + token[1:]
-        nasal = "n" + token[1:]
-        mutated = [(soft, "sm"), (nasal, "nm")] 
-    elif token[0] == "g":
-        soft = token[1:]
-        nasal = "n" + token
-        mutated = [(soft, "sm"), (nasal, "nm")]
-    elif token[0] == "m":
-        soft = "f" + token[1:] 
-        mutated = [(soft, "sm")]
-    elif token[0] in ["â", "ê", "î", "ô", "ŷ", "a", "e", "i", "o", "u", "w", "y"]:
-        hasp = "h" + token
-        mutated = [(hasp, "hm")]
+    for prefix, excluded, mutations in mutation_table.get(token[:1], []):
+        if token.startswith(prefix) and token[len(prefix):len(prefix)+1] not in excluded:
+            rest = token[len(prefix):]
+            mutated = [(mutated_prefix + rest, mutation) for mutated_prefix, mutation in mutations]
+            break
     mut_output = []
     for mut in mutated:
         if mut not in mut_exclusions:
             mut_output.append(mut)
     return mut_output
 
+# Initial letters of the Welsh wordforms which are given mutated forms in the lexicon
+mutatable_initials = {"l", "r", "t", "p", "c", "b", "d", "g", "m", "â", "ê", "î", "ô", "ŷ", "a", "e", "i", "o", "u", "w", "y"}
+
+def mutatable(wordform, short_words):
+    """ Whether the Welsh lexicon gives a wordform mutated forms: it must start with a letter that mutates, be longer than two letters unless it is one of short_words, and not be a multi-word unit whose first word is in mwu_exclusions """
+    if wordform[:1] not in mutatable_initials or (len(wordform) <= 2 and wordform not in short_words):
+        return False
+    if "_" in wordform and wordform[:wordform.index("_")] in mwu_exclusions:
+        return False
+    return True
+
+def radical_forms(token, short_words):
+    """ Return the (radical, mutation) pairs for which the lexicon's mutated forms include the token. This is mutate run backwards, for a lexicon built without the mutated forms."""
+    radicals = []
+    for mutated_prefix, prefix, mutation in radical_table.get(token[:1], []) + radical_table[""]:
+        if token.startswith(mutated_prefix):
+            radical = prefix + token[len(mutated_prefix):]
+            if (radical, mutation) not in radicals and mutatable(radical, short_words) and (token, mutation) in mutate(radical):
+                radicals.append((radical, mutation))
+    return radicals
+
+# The guesses unmutate makes at the radical form of a word, as prefix rewrites: (length the word must be longer than, prefix, letters which may not follow it, number of letters to replace, radical prefix, mutation). Every rule that fits is used.
+unmutation_rules = [(3, "ngh", (), 3, "c", "nm"),
+    (2, "ch", (), 2, "c", "am"),
+    (2, "chyda", (), 2, "g", "am"),
+    (2, "ph", (), 2, "p", "am"),
+    (2, "th", (), 2, "t", "am"),
+    (2, "mh", (), 2, "p", "nm"),
+    (2, "nh", (), 2, "t", "nm"),
+    (2, "ng", ("h",), 2, "g", "nm"),
+    (1, "m", ("h",), 1, "b", "nm"),
+    (1, "n", ("h", "g"), 1, "d", "nm"),
+    (1, "g", (), 1, "c", "sm"),
+    (1, "b", (), 1, "p", "sm"),
+    (1, "d", ("d",), 1, "t", "sm"),
+    (1, "f", ("f",), 1, "b", "sm"),
+    (1, "f", ("f",), 1, "m", "sm"),
+    (1, "l", ("l",), 1, "ll", "sm"),
+    (1, "r", ("h",), 1, "rh", "sm"),
+    (2, "dd", (), 1, "", "sm"),
+    (2, "j", (), 1, "ts", "sm"),
+    (2, "ha", (), 2, "a", "hm"),
+    (2, "he", (), 2, "e", "hm"),
+    (2, "hi", (), 2, "i", "hm"),
+    (2, "ho", (), 2, "o", "hm"),
+    (2, "hu", (), 2, "u", "hm"),
+    (3, "hw", (), 2, "w", "hm"),
+    (3, "hy", (), 2, "y", "hm")]
+unmutation_rules += [(1, initial, (), 0, "g", "sm") for initial in ["a", "e", "i", "o", "u", "w", "y", "r", "l", "â", "ê", "ŵ"]]
+unmutation_table = {}
+for rule in unmutation_rules:
+    unmutation_table.setdefault(rule[1][:1], []).append(rule)
 
 def unmutate(token):
     """ Return a list of all possible Welsh mutations of a given token """
     unmutated = []
-    if len(token) > 3 and  token[:3] == "ngh":
-        unmutated.append(("c{}".format(token[3:]), "nm"))
-    if len(token) > 2 and  token[:2] == "ch":
-        unmutated.append(("c{}".format(token[2:]), "am"))
-        if token[:5] == "chyda":
-            unmutated.append(("g{}".format(token[2:]), "am"))
-    if len(token) > 2 and  token[:2] == "ph":
-        unmutated.append(("p{}".format(token[2:]), "am"))
-    if len(token) > 2 and  token[:2] == "th":
-        unmutated.append(("t{}".format(token[2:]), "am"))
-    if len(token) > 2 and  token[:2] == "mh":
-        unmutated.append(("p{}".format(token[2:]), "nm"))
-    if len(token) > 2 and token[:2] == "nh":
-        unmutated.append(("t{}".format(token[2:]), "nm"))
-    if len(token) > 2 and token[:2] == "ng" and token[2] != "h":
-        unmutated.append(("g{}".format(token[2:]), "nm"))
-    if len(token) > 1 and token[:1] == "m" and token[1] != "h":
-        unmutated.append(("b{}".format(token[1:]), "nm"))
-    if len(token) > 1 and  token[:1] == "n" and token[1] not in ["h", "g"]:
-        unmutated.append(("d{}".format(token[1:]), "nm"))
-    if len(token) > 1 and  token[:1] == "g":
-        unmutated.append(("c{}".format(token[1:]), "sm"))
-    if len(token) > 1 and  token[:1] == "b":
-        unmutated.append(("p{}".format(token[1:]), "sm"))
-    if len(token) > 1 and  token[:1] == "d" and token[1] != "d":
-        unmutated.append(("t{}".format(token[1:]), "sm"))
-    if len(token) > 1 and  token[:1] == "f" and token[1] != "f":
-        unmutated.append(("b{}".format(token[1:]), "sm"))
-        unmutated.append(("m{}".format(token[1:]), "sm"))
-    if len(token) > 1 and token[:1] == "l" and not token[1] == "l":
-        unmutated.append(("ll{}".format(token[1:]), "sm"))
-    if len(token) > 1 and token[:1] == "r" and token[1] != "h":
-        unmutated.append(("rh{}".format(token[1:]), "sm"))
-    if len(token) > 2 and token[:2] == "dd":
-        unmutated.append((token[1:], "sm"))
-    if len(token) > 2 and token[:1] == "j":
-        unmutated.append(("ts{}".format(token[1:]), "sm"))
-    if len(token) > 2 and token[:2] == "ha":
-        unmutated.append(("a{}".format(token[2:]), "hm"))
-    if len(token) > 2 and token[:2] == "he":
-        unmutated.append(("e{}".format(token[2:]), "hm"))
-    if len(token) > 2 and token[:2] == "hi":
-        unmutated.append(("i{}".format(token[2:]), "hm"))
-    if len(token) > 2 and token[:2] == "ho":
-        unmutated.append(("o{}".format(token[2:]), "hm"))
-    if len(token) > 2 and token[:2] == "hu":
-        unmutated.append(("u{}".format(token[2:]), "hm"))
-    if len(token) > 3 and token[:2] == "hw":
-        unmutated.append(("w{}".format(token[2:]), "hm"))
-    if len(token) > 3 and token[:2] == "hy":
-        unmutated.append(("y{}".format(token[2:]), "hm"))
-    if (len(token) > 1 and token[:1] in ["a", "e", "i", "o", "u", "w", "y", "r", "l", "â", "ê", "ŵ"]) or token == "wn":
-        unmutated.append(("g{}".format(token), "sm"))
+    for min_length, prefix, excluded, replaced, radical_prefix, mutation in unmutation_table.get(token[:1], []):
+        if len(token) > min_length and token.startswith(prefix) and token[len(prefix):len(prefix)+1] not in excluded:
+            unmutated.append((radical_prefix + token[replaced:], mutation))
     return unmutated
 
 def deaccent(word):
     deacc = unicodedata2.normalize('NFKD', word).encode('ASCII', 'ignore').decode('ASCII')
     return [deacc]
 
+# The letters which the tagger's spelling corrections swap around
+SKELETON_VOWELS = str.maketrans("", "", "aeiu")
+
+def spelling_skeleton(word):
+    """ The word without the vowels a, e, i and u, and with each run of "n" cut down to one. Spelling corrections (ae/ai/au/ei, final u for i, nn for n) don't change this, so a word and its corrected forms always share a skeleton."""
+    skeleton = word.translate(SKELETON_VOWELS)
+    while "nn" in skeleton:
+        skeleton = skeleton.replace("nn", "n")
+    return skeleton
+
 def tag_morphology(tag):
     """ For a given (rich) POS tag, split it into a list of its morphological elements and return it """
     morphology = []
@@ -0,0 +1,135 @@
+import string
+from .reference_lists.admin_refs import top_level_domains, moji_literals
+
+# Characters which may make up the name and domain parts of an email address or URL
+ADDRESS_CHARS = frozenset(string.ascii_letters + string.digits + ".-_")
+LETTERS = frozenset(string.ascii_letters)
+TLDS = frozenset(top_level_domains)
+# Longest first, since the longest top-level domain at a dot is the one taken
+TLD_LENGTHS = sorted(set(len(tld) for tld in top_level_domains), reverse=True)
+SCHEMES = ("https://", "http://")
+
+def run_end(text, start):
+    """ The end of the run of address characters starting at text[start] """
+    end = start
+    while end < len(text) and text[end] in ADDRESS_CHARS:
+        end += 1
+    return end
+
+def domain_end(text, start, end):
+    """ Where a domain name made from text[start:end] (a run of address characters) ends, or -1 if it has no top-level domain. As with a greedy regex, the last dot that a top-level domain follows is used, and the longest top-level domain there."""
+    dot = text.rfind(".", start + 1, end)
+    while dot != -1:
+        for length in TLD_LENGTHS:
+            if dot + 1 + length <= end and text[dot+1:dot+1+length] in TLDS:
+                return dot + 1 + length
+        dot = text.rfind(".", start + 1, dot)
+    return -1
+
+def is_domain(text):
+    """ Whether the whole of text is a domain name: address characters, a dot and a top-level domain """
+    dot = text.rfind(".")
+    return dot > 0 and text[dot+1:] in TLDS and all(char in ADDRESS_CHARS for char in text[:dot])
+
+class AddressPattern:
+    """ Finds email addresses or URLs, matching what a regular expression with every top-level domain written out would (see email and url), but checking top-level domains against a set. Subclasses give find(text, pos), which returns (start, end) of the first match at or after pos, or None, and fullmatch(text); search, split and fullmatch work like those of a compiled regex with one group."""
+
+    def search(self, text):
+        return self.find(text)
+
+    def split(self, text):
+        pieces = []
+        pos = 0
+        span = self.find(text, pos)
+        while span != None:
+            start, end = span
+            pieces += [text[pos:start], text[start:end]]
+            pos = end
+            span = self.find(text, pos)
+        pieces.append(text[pos:])
+        return pieces
+
+class EmailPattern(AddressPattern):
+    """ name@domain.tld """
+
+    def find(self, text, pos=0):
+        start = pos
+        while start < len(text):
+            if text[start] not in ADDRESS_CHARS:
+                start += 1
+                continue
+            # every start within a run of address characters reaches the same "@", so only the first needs trying
+            at = run_end(text, start)
+            if at < len(text) and text[at] == "@":
+                end = domain_end(text, at + 1, run_end(text, at + 1))
+                if end != -1:
+                    return start, end
+            start = at
+        return None
+
+    def fullmatch(self, text):
+        at = text.find("@")
+        return at > 0 and all(char in ADDRESS_CHARS for char in text[:at]) and is_domain(text[at+1:])
+
+class UrlPattern(AddressPattern):
+    """ domain.tld, with or without http:// or https:// in front """
+
+    def find(self, text, pos=0):
+        failed_to = -1
+        for start in range(pos, len(text)):
+            for scheme in SCHEMES:
+                if text.startswith(scheme, start):
+                    name_start = start + len(scheme)
+                    end = domain_end(text, name_start, run_end(text, name_start))
+                    if end != -1:
+                        return start, end
+            # a start inside a run of address characters where an earlier start failed can only fail too, unless a scheme follows it
+            if start >= failed_to and text[start] in ADDRESS_CHARS:
+                name_end = run_end(text, start)
+                end = domain_end(text, start, name_end)
+                if end != -1:
+                    return start, end
+                failed_to = name_end
+        return None
+
+    def fullmatch(self, text):
+        for scheme in SCHEMES:
+            if text.startswith(scheme) and is_domain(text[len(scheme):]):
+                return True
+        return is_domain(text)
+
+class MojiScanner:
+    """ Finds emoticons from moji_literals with a character trie, in one pass over the text. An emoticon is only taken where it isn't next to a letter A-Z or a-z."""
+
+    def __init__(self, literals):
+        self._literals = literals
+        self._root = {}
+        for i, literal in enumerate(literals):
+            node = self._root
+            for char in literal:
+                node = node.setdefault(char, {})
+            # the first in the list wins where several end at the same place
+            node.setdefault(None, i)
+
+    def search(self, text):
+        """ Returns the first emoticon in text, or None """
+        for start in range(len(text)):
+            if start > 0 and text[start-1] in LETTERS:
+                continue
+            node = self._root
+            found = []
+            pos = start
+            while pos < len(text) and text[pos] in node:
+                node = node[text[pos]]
+                pos += 1
+                if None in node:
+                    found.append((node[None], pos))
+            # as in a regex alternation, the emoticon listed first wins, so long as no letter follows it
+            for i, end in sorted(found):
+                if end == len(text) or text[end] not in LETTERS:
+                    return self._literals[i]
+        return None
+
+email = EmailPattern()
+url = UrlPattern()
+moji = MojiScanner(moji_literals)
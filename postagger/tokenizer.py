@@ -1,23 +1,23 @@
 import re
 import string
-import shutil
-import subprocess
 import os
 import unicodedata2
+from functools import lru_cache
+from collections import namedtuple
 from termcolor import colored
 from .reference import *
 from .preprocessor import *
-
-both_mwus = set(cy_mwus.keys()).intersection(set(en_mwus.keys()))
-all_mwus = both_mwus.intersection(set(gaz_mwus.keys()))
+from .cg import cg_engine, CGBatch
+from .special_tokens import email, url, moji
 
 REGEX = {
     "para": re.compile(r'\n+'),
+    "para_text": re.compile(r'[^\n]+'),
     "engair": re.compile(r'<en:gair="([ A-Za-z\'\-]+)"> ?([^<]+)</en>'),
     "anons": re.compile(r'\[##([^<]+)##\]'),
     "repeats": re.compile(r'([\w]*?)(\w)\2+([\w]*)'),
     "wordchars": re.compile(r"([^\W\d_]+)", re.UNICODE),
-    "pattern": re.compile(r"(?<=[.|!|?])(?<!\s[A-Z][.])(?<![A-Z][.][A-Z][.])(?<![.]\s[.])(?<![.][.])[\s]"),
+    "sentence_end": re.compile(r"(?<=[.|!?])\s"),
     "space": re.compile(r"\s"),
     "en_split": re.compile(r"(<en[^>]*>[^<]*</en>)"),
     "code_split": re.compile(r"(\[##[^<]*##\])"),
@@ -31,6 +31,14 @@ REGEX = {
     "digitseq": re.compile(r"(\d+)")
     }
 
+# Apostrophes, quotation marks, dashes and non-breaking spaces, mapped to the plain characters the tokenizer expects
+CHAR_NORMALIZATION = str.maketrans({"\u00a0": " ", "\u2019": "'", "\u2018": "'", "`": "'", "\u00b4": "'", "\u201c": '"', "\u201d": '"', "\u2011": "-", "\u2014": "-", "\u2013": "-"})
+# CorCenCC markup: English words, anonymised words and transcription codes
+MARKUP = ("<en", "[##", "[~", "~]", "[*")
+
+# One row of the tagger's TSV output, without the file id. Where CG leaves more than one reading, lemma, language, basic_pos, full_pos and mutation hold each reading's value, separated by "|".
+TaggedToken = namedtuple("TaggedToken", ["token", "position", "lemma", "language", "basic_pos", "full_pos", "mutation"])
+
 class Text:
     def __init__(self, text, file_name, text_id, language=None, preproc="n"):
         self._text = text
@@ -54,13 +62,20 @@ class Text:
         return self._filename
 
     def paragraphs(self):
-        para_objs = []
-        para_list = re.split(REGEX["para"], self._text)
-        para_list = list(filter(None, para_list))
-        for para in para_list:
-            p_obj = Paragraph(para, self._filename, self._text_id, self._preproc)
-            para_objs.append(p_obj)
-        return para_objs
+        """ Yields a Paragraph for each non-empty line of the text, as it is needed """
+        for para in REGEX["para_text"].finditer(self._text):
+            yield Paragraph(para.group(), self._filename, self._text_id, self._preproc)
+
+class StreamedText(Text):
+    """ A text read one line at a time from an open file, such as an input file or stdin. As in Text, each non-empty line is a paragraph; paragraphs are made as their lines arrive, so the text as a whole is never held in memory, only the paragraph being tagged."""
+    def __init__(self, handle, file_name, text_id, language=None, preproc="n"):
+        super().__init__(None, file_name, text_id, language, preproc)
+        self._handle = handle
+
+    def paragraphs(self):
+        for line in self._handle:
+            for para in filter(None, re.split(REGEX["para"], line)):
+                yield Paragraph(para, self._filename, self._text_id, self._preproc)
 
 class Paragraph:
     def __init__(self, para_text, file_name, text_id, preproc):
@@ -75,73 +90,68 @@ class Paragraph:
     def genre(self):
         return self._filename[:3]
 
+    def text(self):
+        return self._text
+
+    def size(self):
+        """ Returns the length of the paragraph in bytes, for measuring progress against the size of the input files """
+        return len(self._text.encode("utf-8"))
+
     def id(self):
         return self._text_id
 
     def sentence_raw(self):
-        first_split = re.split(REGEX["pattern"], self._text)
-        sentences = list(filter(None, first_split))
-        k = 0
-        split_sentences = []
-        while k < len(sentences):
+        """ Yields the sentences of the paragraph one at a time, working through the text once """
+        text = self._text
+        start = 0
+        for end in sentence_breaks(text):
             # If an empty sentence is encountered, discard it
-            if sentences[k] != "":
-                current = sentences[k].strip()
-                # treat ellipsis as sentence-ending punctuation
-                if current.find("...") != -1:
-                    ellipsis = current.find("...")
-                    part1 = current[:ellipsis+3].strip()
-                    part2 = current[ellipsis+4:].strip()
-                    split_sentences.append(part1)
-                    split_sentences.append(part2)
-
+            if end > start:
+                sentence = text[start:end].strip()
+                if "..." in sentence:
+                    yield from ellipsis_split(sentence)
                 else:
-                    split_sentences.append(current)
-                k+=1
-        return split_sentences
+                    yield sentence
+            start = end + 1
+        if len(text) > start:
+            yield from ellipsis_split(text[start:].strip())
 
     def sentences(self):
-        split_sentences = self.sentence_raw()
-        clean_split = []
-        output = []
-        for rawsent in split_sentences:
-            if self._preproc == "y":
-                # This step is specifically aimed at processing CorCenCC's data, and is only used if the flag -p is invoked on the command line.
-                preprocessed = CorCenCC_cleaned.cleaned(rawsent)
-                clean_split.append(preprocessed)
-            else:
-                clean_split.append(rawsent)
-        for i, sent in enumerate(clean_split):
-            sent_obj = Sentence(sent, self.id(), self._filename)
-            output += [sent_obj]
-        return output
+        """ Yields a Sentence for each sentence of the paragraph, as it is needed """
+        sentences = self.sentence_raw()
+        if self._preproc == "y":
+            # This step is specifically aimed at processing CorCenCC's data, and is only used if the flag -p is invoked on the command line. The sentences are found in the raw text, then cleaned together, one to a line, so the paragraph is cleaned once and its sentences are the same as if each were cleaned alone.
+            sentences = list(sentences)
+            if sentences != []:
+                sentences = CorCenCC_cleaned.cleaned("\n".join(sentences)).split("\n")
+        for sent in sentences:
+            yield Sentence(sent, self.id(), self._filename)
 
     def cg_output(self, cg_readings):
         """ Given a set of CG-formatted readings, run VISL CG-3 """
-        vislcg3_location = shutil.which("vislcg3")
-        cg_process = subprocess.Popen([vislcg3_location, '--soft-limit', '45', '--hard-limit', "100", "-B", "-v", '0', '-g', '{}/grammar/cy_grammar_2021'.format(os.path.dirname(os.path.abspath(__file__)))], stdin=subprocess.PIPE,stdout=subprocess.PIPE, stderr=subprocess.PIPE)
-        cg_output, cg_error = cg_process.communicate(input=cg_readings.encode("utf-8"))
-        if b"Grammar could not be parsed" in cg_error:
-            err_msg = cg_error.decode("utf-8")
-            msg = colored("There is a problem with the constraint grammar!\nPlease fix before rerunning the code.", attrs=['reverse', 'bold'])
-            out_msg = "\n\n{}\n\n{}".format(msg, err_msg)
-            raise RuntimeError(out_msg)
-        else:
-            return cg_output.decode("utf-8")
+        return cg_engine().run(cg_readings)
 
     def cg_output_trace(self, cg_readings):
         """ Given a set of CG-formatted readings, run VISL CG-3 with trace turned on"""
-        vislcg3_location = shutil.which("vislcg3")
-        cg_process = subprocess.Popen([vislcg3_location, '--soft-limit', '45', '--hard-limit', "100", "--trace", "-B", "-v", '0', '-g', '{}/grammar/cy_grammar_2021'.format(os.path.dirname(os.path.abspath(__file__)))], stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
-        cg_output = cg_process.communicate(input=cg_readings.encode("utf-8"))[0]
-        return cg_output.decode("utf-8")
+        return cg_engine(trace=True).run(cg_readings)
 
     def tsv_output(self, cg_readings, file_id):
+        tsv_items = ""
+        for row in self.tsv_rows(cg_readings):
+            tsv_items += self.genre() + file_id + "\t" + row[0] + "\t" + "\t".join(row[1:]) + "\n"
+        return tsv_items
+
+    def tagged_tokens(self, cg_readings):
+        """ Returns the tagged tokens in VISL CG-3's output for this paragraph, as TaggedToken tuples """
+        return [TaggedToken(*row) for row in self.tsv_rows(cg_readings) if len(row) == len(TaggedToken._fields)]
+
+    def tsv_rows(self, cg_readings):
+        """ Returns the fields of each row of TSV output for VISL CG-3's output for this paragraph: the token, then (if it has any readings) its position, lemma, language, basic and full POS, and mutation."""
         cg_result = list(filter(None, cg_readings.splitlines()))
         tsv_formatted = {}
         item_count = 0
         curr_tok = ""
-        tsv_items = ""
+        tsv_rows = []
         for cg_item in cg_result:
             if cg_item[0] != "\t":
                 curr_tok = cg_item[2:-2].replace("_'", "'")
@@ -208,12 +218,39 @@ class Paragraph:
                     tsv_reading[3] += "|{}".format(basic_pos)
                     tsv_reading[4] += "|{}".format(full_pos)
                     tsv_reading[5] += "|{}".format(mutation)
-            tsv_line = self.genre() + file_id + "\t" + token + "\t" + "\t".join(tsv_reading) + "\n"
-            tsv_items += tsv_line
-        return tsv_items
+            tsv_rows.append([token] + tsv_reading)
+        return tsv_rows
 
 
 
+def sentence_breaks(text):
+    """ Yields the positions of the whitespace characters a paragraph is split into sentences at: those after ".", "!", "?" or "|", unless the full stop ends an initial (" A. "), a pair of initials ("U.S. ") or a run of dots (". ." or ".."). The candidates are found with a single search, and the exceptions checked by looking back a few characters from each, so long paragraphs are scanned in one pass."""
+    for match in REGEX["sentence_end"].finditer(text):
+        i = match.start()
+        if text[i-1] == "." and i >= 2:
+            if text[i-2] == ".":
+                continue
+            if i >= 3 and text[i-3].isspace() and text[i-2] in string.ascii_uppercase:
+                continue
+            if i >= 4 and text[i-4] in string.ascii_uppercase and text[i-3] == "." and text[i-2] in string.ascii_uppercase:
+                continue
+            if i >= 3 and text[i-3] == "." and text[i-2].isspace():
+                continue
+        yield i
+
+def ellipsis_split(sentence):
+    """ Treat ellipsis as sentence-ending punctuation: yields the parts of a sentence, split after every "..." (the character that follows each one is dropped) """
+    start = 0
+    ellipsis = sentence.find("...")
+    while ellipsis != -1:
+        yield sentence[start:ellipsis+3].strip()
+        start = ellipsis + 4
+        ellipsis = sentence.find("...", start)
+    if start == 0:
+        yield sentence
+    else:
+        yield sentence[start:].strip()
+
 class Sentence:
     def __init__(self, sent, text_id, filename, language=None):
         self._sent = sent
@@ -233,60 +270,64 @@ class Sentence:
         """splits the sentence on whitespace and punctuation"""
         """ Normalize different kinds of potential apostrophe/single quotation and dash/hyphen characters """
         word_list = []
-        sent_nbsp = self._sent.replace(" ", " ")
-        sent_apos = (re.sub(r"[’‘`´]", "'", sent_nbsp))
-        sent_quot = (re.sub(r"[“”]", '"', sent_apos))
-        sentence = (re.sub(r"[‑—–]", "-", sent_quot))
+        sentence = self._sent.translate(CHAR_NORMALIZATION)
         sentence = sentence.replace("><", "> <")
-        circ_replace = {"â":"â", "ê":"ê", "î":"î", "ô":"ô", "û":"û", "ŷ":"ŷ", "ŵ":"ŵ"}
-        for char in circ_replace:
-            if char in sentence:
-                sentence = sentence.replace(char, circ_replace[char])
-        split = list(filter(None, re.split(REGEX["space"], sentence)))
-        split_list = []
-        for sl in split:
-            if sl.find("<en") != -1:
-                if sl.count("<en") == sl.count("</en>"):
-                    split_list += list(filter(None, re.split(REGEX["en_split"], sl)))
-                else:
-                    detag = (re.sub(r"</?en[^>]*>", "", sl))
-                    split_list.append(detag)
-            elif sl.find("[##") != -1:
-                if sl.count("[##") == sl.count("##]"):
-                    split_list += list(filter(None, re.split(REGEX["code_split"], sl)))
-                else:
-                    detag = (re.sub(r"(\[##|##\])", "", sl))
-                    split_list.append(detag)
-            elif sl.find("[~") != -1 or sl.count("~]") != -1:
-                if sl.count("[~") == sl.count("~]"):
-                    split_list += list(filter(None, re.split(REGEX["speaker_split"], sl)))
-                else:
-                    detag = (re.sub(r"(\[~|~\])", "", sl))
-                    split_list.append(detag)
-            elif sl.find("[*") != -1 or sl.count("*]") != -1:
-                if sl.count("[*") == sl.count("*]"):
-                    split_list += list(filter(None, re.split(REGEX["stars"], sl)))
-                else:
-                    detag = (re.sub(r"(\[\*|\*\])", "", sl))
-                    split_list.append(detag)
-            elif sl != "":
-                split_list.append(sl)
+        # circumflexes typed as combining characters
+        if "\u0302" in sentence:
+            circ_replace = {"a\u0302": "â", "e\u0302": "ê", "i\u0302": "î", "o\u0302": "ô", "u\u0302": "û", "y\u0302": "ŷ", "w\u0302": "ŵ"}
+            for char in circ_replace:
+                if char in sentence:
+                    sentence = sentence.replace(char, circ_replace[char])
+        # CorCenCC markup is rare, and without it every chunk of the sentence gets through the checks below unchanged
+        markup = any(marker in sentence for marker in MARKUP)
+        if markup == False:
+            split_list = sentence.split()
+        else:
+            split_list = []
+            for sl in filter(None, re.split(REGEX["space"], sentence)):
+                if sl.find("<en") != -1:
+                    if sl.count("<en") == sl.count("</en>"):
+                        split_list += list(filter(None, re.split(REGEX["en_split"], sl)))
+                    else:
+                        detag = (re.sub(r"</?en[^>]*>", "", sl))
+                        split_list.append(detag)
+                elif sl.find("[##") != -1:
+                    if sl.count("[##") == sl.count("##]"):
+                        split_list += list(filter(None, re.split(REGEX["code_split"], sl)))
+                    else:
+                        detag = (re.sub(r"(\[##|##\])", "", sl))
+                        split_list.append(detag)
+                elif sl.find("[~") != -1 or sl.count("~]") != -1:
+                    if sl.count("[~") == sl.count("~]"):
+                        split_list += list(filter(None, re.split(REGEX["speaker_split"], sl)))
+                    else:
+                        detag = (re.sub(r"(\[~|~\])", "", sl))
+                        split_list.append(detag)
+                elif sl.find("[*") != -1 or sl.count("*]") != -1:
+                    if sl.count("[*") == sl.count("*]"):
+                        split_list += list(filter(None, re.split(REGEX["stars"], sl)))
+                    else:
+                        detag = (re.sub(r"(\[\*|\*\])", "", sl))
+                        split_list.append(detag)
+                elif sl != "":
+                    split_list.append(sl)
         for sl in split_list:
-            if sl.find("<en") != -1:
+            # most words are plain letters, which can't hold any of the markup tested for next
+            if sl.isalpha():
+                word = Word(sl, category="alpha")
+                word_list += [word]
+            elif markup == True and sl.find("<en") != -1:
                 word = Word(sl, category="en_tagged")
                 word_list += [word]
-            elif sl.find("[##") != -1:
+            elif markup == True and sl.find("[##") != -1:
                 word = Word(sl, category="anon")
                 word_list += [word]
-            elif sl.find("[~") != -1:
+            elif markup == True and sl.find("[~") != -1:
                 word = Word(sl, category="transcription_code")
                 word_list += [word]
-            elif sl.find("[*") != -1:
+            elif markup == True and sl.find("[*") != -1:
                 word = Word(sl, category="transcription_code")
                 word_list += [word]
-            elif sl.isalpha():
-                word = Word(sl, category="alpha")
-                word_list += [word]
             elif sl in ll_all:
                 word = Word(sl)
                 word_list += [word]
@@ -323,53 +364,56 @@ class Sentence:
         return token_list
 
     def mwus(self, word_list):
+        """ Join up the multi-word units in a list of words, taking the longest unit wherever more than one starts at the same word """
         mwu_list = []
-        list_len = len(word_list)
-        count_len = len(word_list)
         item = 0
-        while count_len > 0:
-            wf = word_list[item].word().lower()
-            words = []
-            if item < list_len and (wf in cy_mwus):
-                max_len = cy_mwus[wf]
-                if item + max_len > list_len:
-                    max_len = len(word_list[item:])
-                words.append(wf)
-                limit = item+max_len
-                word_slice = word_list[item+1:limit]
-                for ws in word_slice:
-                    words.append(ws.word())
-                mwu_word = ""
-                while len(words) > 1:
-                    mwu = "_".join(words)
-                    if mwu in ll_cy:
-                        mwu_word = mwu
-                        break
-                    else:
-                        words = words[:-1]
-                if mwu_word == "":
-                    mwu_list.append(word_list[item])
-                else:
-                    mwu_list.append(Word(mwu_word))
-                count_len -= len(words)
-                item += len(words)
+        while item < len(word_list):
+            length, mwu_word = mwu_index.longest(word_list, item)
+            if length > 1:
+                mwu_list.append(Word(mwu_word))
+                item += length
             else:
                 mwu_list.append(word_list[item])
-                count_len -= 1
                 item += 1
         return mwu_list
 
+    def analyse(self):
+        """ Tokenizes the sentence and looks up each token's entries, once, for everything that needs them """
+        return AnalysedSentence(self)
+
+    def unknowns(self):
+        return self.analyse().unknowns()
+
+    def cg_input(self, sentence_index):
+        return self.analyse().cg_input(sentence_index)
+
+class AnalysedSentence:
+    """ A sentence whose tokens and their dictionary entries have already been worked out. The list of unknown words and the CG input are both derived from the same analysis, so a sentence is only tokenized and looked up once."""
+    def __init__(self, sentence):
+        self._sentence = sentence
+        self._analysis = [(tok, tok.entries()) for tok in sentence.tokens()]
+
+    def sentence(self):
+        return self._sentence
+
+    def tokens(self):
+        return [tok for tok, entries in self._analysis]
+
+    def analysis(self):
+        """ Returns (token, entries) pairs in sentence order """
+        return self._analysis
+
     def unknowns(self):
         unknown_list = []
-        for tok in self.tokens():
-            if len(tok.entries()) == 1 and tok.entries()[0].basic_pos() == "unk":
-                unknown_list.append(tok.entries()[0].word())
+        for tok, entries in self._analysis:
+            if len(entries) == 1 and entries[0].basic_pos() == "unk":
+                unknown_list.append(entries[0].word())
         return unknown_list
 
     def cg_input(self, sentence_index):
         cg_input = ""
-        for tok in self.tokens():
-            cg_input += tok.cg_formatted(sentence_index)
+        for tok, entries in self._analysis:
+            cg_input += tok.cg_formatted(sentence_index, entries)
         return cg_input
 
 class Word:
@@ -437,6 +481,7 @@ class Token(Word):
         super().__init__(word, language)
         self._word_obj = word
         self._word = word.word()
+        self._variants = None
         #self._token_position = token_position
 
     def word(self):
@@ -451,7 +496,9 @@ class Token(Word):
     def sentence_no(self):
         return self._sentence_no
 
-    def cg_formatted(self, sentence_i):
+    def cg_formatted(self, sentence_i, entries=None):
+        if entries == None:
+            entries = self.entries()
         sentence_index = '"{' + str(sentence_i) + '}"'
         if self._word in ["\\", '"']:
             if self._word == "\\":
@@ -459,13 +506,13 @@ class Token(Word):
             else:
                 self_alias = "literal_dbl_quot"
             cg_text = '"<{}>"\n'.format(self_alias)
-            for entry in self.entries():
+            for entry in entries:
                 entry_line = '\t"{}"\t[{}]\t{}\t:{}:\t{}\t{}\n'.format(self_alias, entry.language(), entry.segmented_pos(), self_alias, "+0m", sentence_index)
                 cg_text += entry_line
         elif "\\" in self._word:
             self_alias = self._word.replace("\\", "\\\\")
             cg_text = '"<{}>"\n'.format(self_alias)
-            for entry in self.entries():
+            for entry in entries:
                 entry_line = '\t"{}"\t[{}]\t{}\t:{}:\t{}\t{}\n'.format(self_alias, entry.language(), entry.segmented_pos(), self_alias, "+0m", sentence_index)
                 cg_text += entry_line
         else:
@@ -474,7 +521,7 @@ class Token(Word):
                 cg_text = '"<[{}]>"\n'.format(self.word())
             else:
                 cg_text = '"<{}>"\n'.format(self.word())
-            for entry in self.entries():
+            for entry in entries:
                 if entry.mutation() == None:
                     mutation = "\t+0m"
                 else:
@@ -484,35 +531,26 @@ class Token(Word):
         return cg_text
 
     def variants(self):
-        variants = Variants(self.word()).variants()
-        return variants
+        """ Returns the variant forms of this token which are in the lexica. They are worked out on first use and kept, as a lookup asks for them several times over."""
+        if self._variants == None:
+            self._variants = Variants(self.word()).variants()
+        return self._variants
     def nonstandard(self):
-        if "nonstandard" in self.variants():
-           return self.variants()["nonstandard"]
-        else:
-            return []
+        return self.variants().get("nonstandard", [])
     def elision(self):
-        if "elision" in self.variants():
-           return self.variants()["elision"]
-        else:
-            return []
+        return self.variants().get("elision", [])
     def spellcheck(self):
-        if "spellcheck" in self.variants():
-           return self.variants()["spellcheck"]
-        else:
-            return []
+        return self.variants().get("spellcheck", [])
     def dehyphenated(self):
-        if "dehyph" in self.variants():
-           return self.variants()["dehyph"]
-        else:
-            return []
+        return self.variants().get("dehyph", [])
     def deaccented(self):
-        if "deacc" in self.variants():
-            return self.variants()["deacc"]
-        else:
-            return []
+        return self.variants().get("deacc", [])
 
     def entries(self):
+        """ Returns the dictionary entries for this token, from the lookup cache where possible """
+        return cached_entries(self._word, self._word_obj.category())
+
+    def lookup_entries(self):
         # Get the various dictionary entries for this token
         wordobj = self._word_obj
         wordform = self._word
@@ -554,35 +592,20 @@ class Token(Word):
                 else:
                     lemma_en = "anonymized"
                     defpos = {"cat":"Anon", "full":"Anon", "seg":"Anon"}
-                dict_item = {}
                 anon_lemma = "[" + code + "]"
-                dict_item["lemma"] = anon_lemma
-                dict_item["lemma_en"] = lemma_en
-                dict_item["pos_basic"] = defpos["cat"]
-                dict_item["pos_enriched"] = defpos
-                dict_item["mutation"] = "0m"
+                dict_item = LexEntry(lemma=anon_lemma, lemma_en=lemma_en, pos_basic=defpos["cat"], pos_enriched=defpos, mutation="0m")
                 entries = [Entry(anon_lemma, dict_item, language="neutral")]
             else:
                 entries = [Entry(wordobj.word(), dict_item=None, language="unk")]
         elif wordobj.category() == "transcription_code":
-            dict_item = {}
-            dict_item["lemma"] = wordform
-            dict_item["lemma_en"] = "[CorCenCC_transcription_code]"
-            dict_item["pos_basic"] = "Gw"
-            dict_item["pos_enriched"] = {"cat":"Gw", "other_type":"ann", "full":"Gwann", "seg":"Gw ann"}
-            dict_item["mutation"] = "0m"
+            dict_item = LexEntry(lemma=wordform, lemma_en="[CorCenCC_transcription_code]", pos_basic="Gw", pos_enriched={"cat":"Gw", "other_type":"ann", "full":"Gwann", "seg":"Gw ann"}, mutation="0m")
             entries = [Entry(wordobj.word(), dict_item, language="neutral")]
         elif defpos != None:
             if defpos["cat"] == "E" and "prop" not in defpos:
                 language = "cy"
             else:
                 language = "neutral"
-            dict_item = {}
-            dict_item["lemma"] = wordobj.normalized()
-            dict_item["lemma_en"] = wordobj.normalized()
-            dict_item["pos_basic"] = defpos["cat"]
-            dict_item["pos_enriched"] = defpos
-            dict_item["mutation"] = "0m"
+            dict_item = LexEntry(lemma=wordobj.normalized(), lemma_en=wordobj.normalized(), pos_basic=defpos["cat"], pos_enriched=defpos, mutation="0m")
             entries = [Entry(wordobj.word(), dict_item, language)]
         elif wordobj.normalized() in ll_all:
             lookup = Headword(wordobj.normalized())
@@ -618,11 +641,22 @@ class Token(Word):
                 lookup = Headword(form[0], language=form[1], en_trans=None, mutation=mut_type)
                 entries += lookup.entries()
         if entries == [] and mut_type == None:
-            if unmutate(wordform) != []:
-                for um in unmutate(wordform):
-                    entries += self.try_variants(wordform=um[0].lower(), mut_type=um[1])
+            for um in unmutate(wordform):
+                entries += self.try_variants(wordform=um[0].lower(), mut_type=um[1])
         return entries
 
+# Lookups are cached by wordform and category, which between them decide every entry a token gets. A small number of types make up most of the tokens in any text, so most lookups are answered from the cache.
+ENTRY_CACHE_SIZE = 65536
+
+@lru_cache(maxsize=ENTRY_CACHE_SIZE)
+def cached_entries(wordform, category):
+    """ Returns the entries for a wordform of the given category as a tuple, so that the cached copy can't be changed by callers """
+    return tuple(Token(Word(wordform, category=category)).lookup_entries())
+
+def entry_cache_info():
+    """ Returns the hits, misses and current size of the entry lookup cache for this process """
+    return cached_entries.cache_info()
+
 class Variants:
     def __init__(self, word):
         self._word = word
@@ -632,13 +666,15 @@ class Variants:
 
     def variants(self):
         variants = {}
-        if deaccent(self._word) != []:
-            deacc = deaccent(self._word)[0]
+        deacc_list = deaccent(self._word)
+        if deacc_list != []:
+            deacc = deacc_list[0]
             variants["deacc"] = []
             if deacc in ll_cy:
                 variants["deacc"] = [(deacc, "cy")]
-        if self.hyphenation() != []:
-            dehyph = self.hyphenation()[0]
+        hyph_list = self.hyphenation()
+        if hyph_list != []:
+            dehyph = hyph_list[0]
             variants["dehyph"] = []
             for dh in dehyph:
                 if dehyph in ll_cy:
@@ -647,30 +683,35 @@ class Variants:
                     variants["dehyph"] += [(dehyph, "en")]
                 if dehyph in ll_gaz:
                     variants["dehyph"] += [(dehyph, "gaz")]
-        if self.elision() != []:
+        elision_list = self.elision()
+        if elision_list != []:
             variants["elision"] = []
-            for elision in self.elision():
+            for elision in elision_list:
                 if elision in ll_cy:
                     if "elision" in variants:
                         variants["elision"] = [(elision, "cy")]
                     else:
                         variants["elision"] += [(elision, "cy")]
-        if self.nonstandard() != []:
+        ns_list = self.nonstandard()
+        if ns_list != []:
             variants["nonstandard"] = []
-            for ns in self.nonstandard():
+            for ns in ns_list:
                 if ns in ll_cy:
                     if "nonstandard" in variants:
                         variants["nonstandard"] = [(ns, "cy")]
                     else:
                         variants["nonstandard"] += [(ns, "cy")]
-        if self.spellcheck() != []:
-            variants["spellcheck"] = []
-            for sp in self.spellcheck():
-                if sp in ll_cy:
-                    if "spellcheck" in variants:
-                        variants["spellcheck"] = [(sp, "cy")]
-                    else:
-                        variants["spellcheck"] += [(sp, "cy")]     
+        # every spelling variant has the same skeleton as the word itself, so unless some Welsh headword shares that skeleton there is nothing to find
+        if spelling_skeleton(self._word.lower()) in ll_cy_spelling:
+            sp_list = self.spellcheck()
+            if sp_list != []:
+                variants["spellcheck"] = []
+                for sp in sp_list:
+                    if sp in ll_cy:
+                        if "spellcheck" in variants:
+                            variants["spellcheck"] = [(sp, "cy")]
+                        else:
+                            variants["spellcheck"] += [(sp, "cy")]
         return variants
 
     def hyphenation(self):
@@ -779,8 +820,8 @@ class WordString:
         tail = ""
         word_list = []
         if len(middle) > 1:
-            # look for the matches to hashtags, email, etc. which are defined in the admin_refs file            
-            if re.search(hashtag, middle) != None:
+            # look for the matches to hashtags, email, etc. which are defined in the admin_refs file. Each kind has a character it can't do without, which rules most of them out at once.
+            if "#" in middle and re.search(hashtag, middle) != None:
                 h_split = list(filter(None, re.split(hashtag, middle)))
                 for hs in h_split:
                     if re.fullmatch(hashtag, hs):
@@ -791,10 +832,10 @@ class WordString:
                         word_list += new_string.punct_split()
                 return word_list
             
-            if re.search(email, middle) != None:
-                e_split = list(filter(None, re.split(email, middle)))
+            if "@" in middle and email.search(middle) != None:
+                e_split = list(filter(None, email.split(middle)))
                 for es in e_split:
-                    if re.fullmatch(email, es):
+                    if email.fullmatch(es):
                         email_word = Word(es, category="email")
                         word_list += [email_word]
                     else:
@@ -802,10 +843,10 @@ class WordString:
                         word_list += new_string.punct_split()
                 return word_list
             
-            if re.search(url, middle) != None:
-                u_split = list(filter(None, re.split(url, middle)))
+            if "." in middle and url.search(middle) != None:
+                u_split = list(filter(None, url.split(middle)))
                 for us in u_split:
-                    if re.fullmatch(url, us):
+                    if url.fullmatch(us):
                         url_word = Word(us, category="url")
                         word_list += [url_word]
                     else:
@@ -813,7 +854,7 @@ class WordString:
                         word_list += new_string.punct_split()
                 return word_list
             
-            if re.search(username, middle) != None:
+            if "@" in middle and re.search(username, middle) != None:
                 un_split = list(filter(None, re.split(username, middle)))
                 for uns in un_split:
                     if re.fullmatch(username, uns):
@@ -824,26 +865,26 @@ class WordString:
                         word_list += new_string.punct_split()
                 return word_list
 
-            moji_search = re.findall(moji_regex, middle)
-            if len(moji_search) != 0:
-                moji_split = middle.split(moji_search[0], 1)
+            moji_found = moji.search(middle)
+            if moji_found != None:
+                moji_split = middle.split(moji_found, 1)
                 if moji_split[0] in ["", " "] and moji_split[1] in ["", " "]:
-                    word = Word(moji_search[0], "moji")
+                    word = Word(moji_found, "moji")
                     word_list += [word]
                 elif moji_split[0] == "":
-                    word = Word(moji_search[0], "moji")
+                    word = Word(moji_found, "moji")
                     word_list += [word]
                     new_string = WordString(moji_split[1])
                     word_list += new_string.punct_split()
                 elif moji_split[1] == "":
                     new_string = WordString(moji_split[0])
                     word_list += new_string.punct_split()
-                    word = Word(moji_search[0], "moji")
+                    word = Word(moji_found, "moji")
                     word_list += [word]
                 else:
                     new_string_head = WordString(moji_split[0])
                     word_list += new_string_head.punct_split()
-                    word = Word(moji_search[0], "moji")
+                    word = Word(moji_found, "moji")
                     word_list += [word]
                     new_string_tail = WordString(moji_split[1])
                     word_list += new_string_tail.punct_split()
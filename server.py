@@ -0,0 +1,237 @@
+"""
+A tagging service for CyTag: a long-running process which keeps a Tagger (and its VISL CG-3 process) warm and tags text sent to it over HTTP, on a local port or a Unix socket.
+
+    POST /tag            tag the request body (UTF-8 text, one paragraph per line)
+    POST /tag?format=json    the same, with results as JSON instead of TSV
+    GET /health          report whether the service is up, and how many requests are waiting
+
+Requests which arrive while the tagger is busy wait in a queue, and are then tagged together in a single batch, so that VISL CG-3 is called once for the lot.
+"""
+
+import os
+import json
+import queue
+import socketserver
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+# Defaults for the service: the number of requests that may wait for the tagger, the most requests tagged in one batch, the number of seconds a request may wait for its results, and the largest request body accepted, in bytes.
+QUEUE_SIZE = 64
+BATCH_SIZE = 32
+TIMEOUT = 30.0
+MAX_BODY = 10*1024*1024
+
+class ServiceBusy(Exception):
+    """ Raised when the request queue is full """
+
+class Job:
+    """ One request waiting to be tagged """
+    def __init__(self, text):
+        self._text = text
+        self._done = threading.Event()
+        self._cancelled = False
+        self._result = None
+        self._error = None
+
+    def text(self):
+        return self._text
+
+    def cancel(self):
+        self._cancelled = True
+
+    def cancelled(self):
+        return self._cancelled
+
+    def finish(self, result=None, error=None):
+        self._result = result
+        self._error = error
+        self._done.set()
+
+    def wait(self, timeout):
+        """ Wait for the job's results, raising TimeoutError if they aren't ready within timeout seconds """
+        if not self._done.wait(timeout):
+            self.cancel()
+            raise TimeoutError("Tagging took longer than {} seconds".format(timeout))
+        if self._error != None:
+            raise self._error
+        return self._result
+
+class TaggingService:
+    """ Feeds queued requests to a Tagger from a single thread. Whatever has queued up while the last batch was being tagged goes into the next one (up to batch_size requests), and is tagged with one call to VISL CG-3. Every paragraph is a window of its own in VISL CG-3, so no request's results depend on the others in its batch; if a batch fails, its requests are tagged again one at a time, so that only the one at fault gets an error."""
+    def __init__(self, tagger, queue_size=QUEUE_SIZE, batch_size=BATCH_SIZE, timeout=TIMEOUT):
+        self._tagger = tagger
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._batch_size = batch_size
+        self._timeout = timeout
+        self._thread = threading.Thread(target=self._serve, daemon=True)
+        self._thread.start()
+
+    def timeout(self):
+        return self._timeout
+
+    def waiting(self):
+        return self._queue.qsize()
+
+    def running(self):
+        return self._thread.is_alive()
+
+    def tag(self, text, timeout=None):
+        """ Tag a text, returning a list of TaggedParagraph. Raises ServiceBusy if the queue is full, or TimeoutError if the results take too long."""
+        if timeout == None:
+            timeout = self._timeout
+        job = Job(text)
+        try:
+            self._queue.put_nowait(job)
+        except queue.Full:
+            raise ServiceBusy("The tagging queue is full")
+        return job.wait(timeout)
+
+    def _serve(self):
+        while True:
+            jobs = [self._queue.get()]
+            while len(jobs) < self._batch_size:
+                try:
+                    jobs.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            # requests whose callers have given up aren't worth tagging
+            jobs = [job for job in jobs if not job.cancelled()]
+            if jobs == []:
+                continue
+            try:
+                results = self._tagger.tag_texts([job.text() for job in jobs])
+            except Exception as error:
+                if len(jobs) == 1:
+                    jobs[0].finish(error=error)
+                else:
+                    # one request's text mustn't fail the others in its batch, so each is tried again on its own
+                    for job in jobs:
+                        self._tag_alone(job)
+            else:
+                for job, result in zip(jobs, results):
+                    job.finish(result=result)
+
+    def _tag_alone(self, job):
+        try:
+            result = self._tagger.tag_texts([job.text()])[0]
+        except Exception as error:
+            job.finish(error=error)
+        else:
+            job.finish(result=result)
+
+def json_results(tagged_paragraphs):
+    paragraphs = []
+    for tagged in tagged_paragraphs:
+        paragraphs.append({"text": tagged.text(), "tokens": [token._asdict() for token in tagged.tokens()], "unknowns": tagged.unknowns()})
+    return {"paragraphs": paragraphs}
+
+class TaggingHandler(BaseHTTPRequestHandler):
+    """ HTTP front end for a TaggingService, which is found on the server """
+
+    def address_string(self):
+        # clients of a Unix socket have no address
+        if isinstance(self.client_address, tuple):
+            return self.client_address[0]
+        return "unix"
+
+    def log_message(self, format, *args):
+        if self.server.verbose == True:
+            super().log_message(format, *args)
+
+    def send_text(self, status, text, content_type="text/plain; charset=utf-8"):
+        body = text.encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def send_json(self, status, data):
+        self.send_text(status, json.dumps(data, ensure_ascii=False), "application/json; charset=utf-8")
+
+    def do_GET(self):
+        if urlparse(self.path).path != "/health":
+            self.send_json(404, {"error": "not found"})
+            return
+        service = self.server.service
+        if service.running():
+            self.send_json(200, {"status": "ok", "waiting": service.waiting()})
+        else:
+            self.send_json(503, {"status": "stopped", "waiting": service.waiting()})
+
+    def do_POST(self):
+        url = urlparse(self.path)
+        if url.path != "/tag":
+            self.send_json(404, {"error": "not found"})
+            return
+        output_format = parse_qs(url.query).get("format", ["tsv"])[0]
+        if output_format not in ("tsv", "json"):
+            self.send_json(400, {"error": "format must be tsv or json"})
+            return
+        try:
+            length = int(self.headers.get("Content-Length", ""))
+        except ValueError:
+            self.send_json(411, {"error": "Content-Length is required"})
+            return
+        if length > MAX_BODY:
+            self.send_json(413, {"error": "request body is larger than {} bytes".format(MAX_BODY)})
+            return
+        try:
+            text = self.rfile.read(length).decode("utf-8")
+        except UnicodeDecodeError:
+            self.send_json(400, {"error": "request body must be UTF-8 text"})
+            return
+        try:
+            tagged_paragraphs = self.server.service.tag(text)
+        except ServiceBusy as error:
+            self.send_json(503, {"error": str(error)})
+            return
+        except TimeoutError as error:
+            self.send_json(504, {"error": str(error)})
+            return
+        except Exception as error:
+            self.send_json(500, {"error": str(error)})
+            return
+        if output_format == "json":
+            self.send_json(200, json_results(tagged_paragraphs))
+        else:
+            self.send_text(200, "".join(tagged.tsv() for tagged in tagged_paragraphs), "text/tab-separated-values; charset=utf-8")
+
+# Connections the operating system will hold while the server is busy accepting others; socketserver's default of 5 is too few for bursts of concurrent requests
+LISTEN_BACKLOG = 128
+
+class TCPHTTPServer(ThreadingHTTPServer):
+    request_queue_size = LISTEN_BACKLOG
+
+class UnixHTTPServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+    request_queue_size = LISTEN_BACKLOG
+
+    def server_bind(self):
+        if os.path.exists(self.server_address):
+            os.unlink(self.server_address)
+        super().server_bind()
+
+def make_server(service, host="127.0.0.1", port=8080, socket_path=None, verbose=False):
+    """ Make an HTTP server for the service, listening on host:port, or on a Unix socket if socket_path is given """
+    if socket_path != None:
+        server = UnixHTTPServer(socket_path, TaggingHandler)
+    else:
+        server = TCPHTTPServer((host, port), TaggingHandler)
+    server.service = service
+    server.verbose = verbose
+    return server
+
+def serve(tagger, host="127.0.0.1", port=8080, socket_path=None, queue_size=QUEUE_SIZE, batch_size=BATCH_SIZE, timeout=TIMEOUT, verbose=False):
+    """ Run the tagging service until interrupted """
+    service = TaggingService(tagger, queue_size=queue_size, batch_size=batch_size, timeout=timeout)
+    server = make_server(service, host, port, socket_path, verbose)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        if socket_path != None and os.path.exists(socket_path):
+            os.unlink(socket_path)
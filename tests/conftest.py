@@ -0,0 +1,12 @@
+import pytest
+
+@pytest.fixture(scope="session")
+def built_lexica():
+    """ Skips tests which need the real lexica unless they have already been built from their sources and are up to date. The tests never build them, since that would write into the package."""
+    from postagger.reference_lists import load_lexica
+    try:
+        stale = load_lexica.stale_lexica()
+    except FileNotFoundError:
+        stale = list(load_lexica.lexicon_names)
+    if stale != []:
+        pytest.skip("the lexica ({}) need building first: run the tagger once, or python app.py -l".format(", ".join(stale)))
@@ -0,0 +1,108 @@
+"""
+Tests for the VISL CG-3 engine and CGBatch, run against a stand-in for vislcg3 which passes readings through unchanged, except that it adds a tag to each reading, just before the last, giving the number of cohorts in the window it was in. Two paragraphs that end up in the same window therefore come out differently from the same paragraphs run one at a time.
+"""
+
+import os
+import sys
+
+import pytest
+
+from postagger import cg
+
+FAKE_VISLCG3 = '''#!{python}
+import sys
+args = sys.argv[1:]
+if "--grammar-only" in args:
+    open(args[args.index("--grammar-bin") + 1], "w").write("compiled")
+    sys.exit(0)
+window = []
+def end_window():
+    cohorts = sum(1 for line in window if line.startswith('"<'))
+    for line in window:
+        if line.startswith("\\t"):
+            fields = line[1:].rstrip("\\n").replace("\\t", " ").split(" ")
+            line = "\\t" + " ".join(fields[:-1] + ["W{{}}".format(cohorts), fields[-1]]) + "\\n"
+        sys.stdout.write(line)
+    window.clear()
+for line in sys.stdin:
+    if line.startswith("<STREAMCMD:FLUSH>"):
+        end_window()
+        sys.stdout.write(line)
+        sys.stdout.flush()
+    else:
+        window.append(line)
+end_window()
+'''
+
+# Readings which the grammar can produce without a "{sentence_index}" tag at the end, or with the index 0
+PARAGRAPHS = [
+    '"<Mae>"\n\t"bod" [cy] B Bpres3u {1} "{1}"\n"<yr un>"\n\t"yr_un" [cy] Adf :each: +0m\n',
+    '"<o\'r gorau>"\n\t"o\'r_gorau" [cy] Adf <{0}> ¤mergeORG2\n"<.>"\n\t"." [neutral] Atd Atdt {2} "{2}"\n',
+    '',
+    '"<heb>"\n\t"heb" [cy] Ar Arsym {3} "{3}" ¤copy\n"<atalnod>"\n\t"atalnod" [cy] E Egu {3} "{3}"\n',
+]
+
+@pytest.fixture
+def fake_vislcg3(tmp_path, monkeypatch):
+    bin_dir = tmp_path/"bin"
+    bin_dir.mkdir()
+    program = bin_dir/"vislcg3"
+    program.write_text(FAKE_VISLCG3.format(python=sys.executable))
+    program.chmod(0o755)
+    monkeypatch.setenv("PATH", str(bin_dir) + os.pathsep + os.environ.get("PATH", ""))
+    monkeypatch.setattr(cg, "grammar_cache", tmp_path/"cache")
+    monkeypatch.setattr(cg, "_engines", {})
+    yield program
+    cg.close_engines()
+
+def test_split_pairs_paragraphs_with_their_output():
+    batch = cg.CGBatch()
+    for para in ["a", "b", "c"]:
+        batch.add(para, "")
+    assert batch.split(["1", "2", "3"]) == [("a", "1"), ("b", "2"), ("c", "3")]
+
+def test_split_needs_output_for_every_paragraph():
+    batch = cg.CGBatch()
+    batch.add("a", "")
+    batch.add("b", "")
+    with pytest.raises(ValueError):
+        batch.split(["1"])
+
+def test_batch_limits():
+    batch = cg.CGBatch(max_cohorts=3)
+    batch.add("a", PARAGRAPHS[0])
+    assert batch.full() == False
+    batch.add("b", PARAGRAPHS[1])
+    assert batch.full() == True
+    assert batch.new().empty() == True
+    batch = cg.CGBatch(max_bytes=10)
+    batch.add("a", PARAGRAPHS[3])
+    assert batch.full() == True
+
+def test_run_batches_keeps_each_batch_in_its_own_window(fake_vislcg3):
+    engine = cg.CGEngine()
+    outputs = engine.run_batches(PARAGRAPHS)
+    engine.close()
+    assert len(outputs) == len(PARAGRAPHS)
+    assert outputs[0] == PARAGRAPHS[0].replace(":each: +0m", ":each: W2 +0m").replace('{1} "{1}"', '{1} W2 "{1}"')
+    assert outputs[2] == ""
+    for output in outputs[1], outputs[3]:
+        assert output.count(" W2 ") == 2
+
+def test_batch_output_matches_paragraphs_run_alone(fake_vislcg3):
+    batch = cg.CGBatch()
+    for i, readings in enumerate(PARAGRAPHS):
+        batch.add(i, readings)
+    engine = cg.CGEngine()
+    alone = [(i, engine.run(readings)) for i, readings in enumerate(PARAGRAPHS)]
+    engine.close()
+    assert batch.cg_output() == alone
+    assert batch.cg_output_trace() == "".join(output for i, output in alone)
+
+def test_engine_restarts_after_vislcg3_dies(fake_vislcg3):
+    engine = cg.CGEngine()
+    first = engine.run(PARAGRAPHS[0])
+    engine._process.kill()
+    engine._process.wait()
+    assert engine.run(PARAGRAPHS[0]) == first
+    engine.close()
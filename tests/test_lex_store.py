@@ -0,0 +1,112 @@
+"""
+Tests for the on-disk lexicon format, on small lexica written to a temporary directory.
+"""
+
+import pytest
+
+from postagger.reference_lists import lex_store
+from postagger.reference_lists.lex_store import write_store, write_lexicon, LexiconStore, Lexicon, KeyView, LexEntry
+
+def entry(lemma, pos_basic, pos_enriched, mutation="0m"):
+    return {"lemma": lemma, "lemma_en": lemma + "_en", "pos_basic": pos_basic, "pos_enriched": pos_enriched, "mutation": mutation}
+
+NOUN = {"cat": "E", "gender": "b", "number": "u"}
+VERB = {"cat": "B", "verb_type": "be"}
+
+LEXICON = {
+    "cath": [entry("cath", "Ebu", NOUN)],
+    "gath": [entry("cath", "Ebu", NOUN, "sm")],
+    "ŵy": [entry("ŵy", "Egu", {"cat": "E", "gender": "g", "number": "u"})],
+    "caru": [entry("caru", "Be", VERB), entry("car", "Egll", {"cat": "E", "number": "ll"})],
+    "": [entry("", "unk", {})],
+}
+
+@pytest.fixture
+def lexicon(tmp_path):
+    path = tmp_path/"cy.lex"
+    write_lexicon(str(path), LEXICON, meta={"name": "cy", "mutations": "expanded"})
+    lexicon = Lexicon(str(path))
+    yield lexicon
+    lexicon.close()
+
+def test_lexicon_round_trip(lexicon):
+    assert len(lexicon) == len(LEXICON)
+    assert list(lexicon) == list(LEXICON)
+    for wordform, dict_items in LEXICON.items():
+        assert wordform in lexicon
+        entries = lexicon[wordform]
+        assert isinstance(entries, tuple)
+        assert [entry._asdict() for entry in entries] == dict_items
+    assert lexicon["gath"][0] == LexEntry("cath", "cath_en", "Ebu", NOUN, "sm")
+
+def test_missing_keys(lexicon):
+    for key in ["ci", "Cath", "cath ", 5, None, "\ud800"]:
+        assert key not in lexicon
+    with pytest.raises(KeyError):
+        lexicon["ci"]
+
+def test_entries_share_their_strings_and_descriptors(lexicon):
+    cath, gath = lexicon["cath"][0], lexicon["gath"][0]
+    assert cath.lemma is gath.lemma
+    assert cath.pos_enriched is gath.pos_enriched
+    with pytest.raises(TypeError):
+        cath.pos_enriched["cat"] = "B"
+
+def test_meta_keeps_the_field_names(lexicon):
+    assert lexicon.meta() == {"name": "cy", "mutations": "expanded", "fields": list(lex_store.ENTRY_FIELDS)}
+    assert lexicon.fields() == lex_store.ENTRY_FIELDS
+
+def test_store_with_many_keys(tmp_path):
+    # enough keys for the hash index to have collisions to probe past
+    records = {"gair{}".format(i): [(str(i), str(i % 7))] for i in range(5000)}
+    path = str(tmp_path/"geiriau.lex")
+    write_store(path, records, ("rhif", "gweddill"))
+    store = LexiconStore(path)
+    try:
+        assert len(store) == 5000
+        for key, key_records in records.items():
+            assert store.records(key) == key_records
+        assert "gair5000" not in store
+    finally:
+        store.close()
+
+def test_records_must_have_every_field(tmp_path):
+    path = tmp_path/"drwg.lex"
+    with pytest.raises(ValueError):
+        write_store(str(path), {"a": [("1", "2")], "b": [("1",)]}, ("un", "dau"))
+    assert list(tmp_path.iterdir()) == []
+
+def test_other_files_are_refused(tmp_path):
+    path = tmp_path/"nid-lecsicon.lex"
+    path.write_bytes(b"\0" * 256)
+    with pytest.raises(ValueError):
+        LexiconStore(str(path))
+
+def test_rewriting_leaves_open_stores_as_they_were(tmp_path):
+    path = str(tmp_path/"hen.lex")
+    write_store(path, {"hen": [("1",)]}, ("rhif",))
+    old = LexiconStore(path)
+    write_store(path, {"newydd": [("2",)]}, ("rhif",))
+    new = LexiconStore(path)
+    try:
+        assert list(old) == ["hen"] and old.records("hen") == [("1",)]
+        assert list(new) == ["newydd"]
+    finally:
+        old.close()
+        new.close()
+
+def test_key_view(tmp_path):
+    write_store(str(tmp_path/"un.lex"), {"a": [("1",)], "b": [("2",)]}, ("rhif",))
+    write_store(str(tmp_path/"dau.lex"), {"b": [("3",)], "c": [("4",)]}, ("rhif",))
+    first, second = LexiconStore(str(tmp_path/"un.lex")), LexiconStore(str(tmp_path/"dau.lex"))
+    try:
+        keys = KeyView(first).union(KeyView(second), KeyView(first))
+        assert len(keys.stores()) == 2
+        assert list(keys) == ["a", "b", "c"]
+        assert len(keys) == 3
+        assert "c" in keys and "d" not in keys
+        assert KeyView(first) & KeyView(second) == {"b"}
+        assert KeyView(first) - {"a"} == {"b"}
+    finally:
+        first.close()
+        second.close()
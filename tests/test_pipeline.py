@@ -0,0 +1,58 @@
+"""
+Tests for pipelined, which runs the stages of tagging in threads joined by queues.
+"""
+
+import threading
+import time
+
+import pytest
+
+from postagger.pipeline import pipelined
+
+def slowly(delay):
+    def stage(item):
+        time.sleep(delay)
+        return item
+    return stage
+
+def test_results_come_out_in_order():
+    stages = [slowly(0.001), lambda item: item * 2, slowly(0.002)]
+    assert list(pipelined(range(50), stages)) == [i * 2 for i in range(50)]
+    assert list(pipelined(range(50), stages, queue_depths=[1, 0, 3, 1])) == [i * 2 for i in range(50)]
+
+def test_no_stages():
+    assert list(pipelined(iter("abc"), [])) == ["a", "b", "c"]
+
+def test_queue_depths_must_match_the_stages():
+    with pytest.raises(ValueError):
+        list(pipelined(range(3), [str], queue_depths=[1]))
+
+def test_errors_in_a_stage_are_raised_again():
+    def stage(item):
+        if item == 3:
+            raise ZeroDivisionError(item)
+        return item
+    results = []
+    with pytest.raises(ZeroDivisionError):
+        for item in pipelined(range(10), [stage, str]):
+            results.append(item)
+    assert results == ["0", "1", "2"]
+
+def test_errors_in_the_source_are_raised_again():
+    def source():
+        yield 1
+        raise KeyError("ffynhonnell")
+    with pytest.raises(KeyError):
+        list(pipelined(source(), [str]))
+
+def test_stopping_early_ends_every_thread():
+    def endless():
+        i = 0
+        while True:
+            yield i
+            i += 1
+    before = threading.active_count()
+    results = pipelined(endless(), [slowly(0.001), str], queue_depths=1)
+    assert [next(results) for i in range(5)] == ["0", "1", "2", "3", "4"]
+    results.close()
+    assert threading.active_count() == before
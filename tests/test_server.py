@@ -0,0 +1,139 @@
+"""
+Tests for the tagging service, with a stand-in for the Tagger, and for Tagger.tag_texts, which the service relies on to tag the requests in a batch as if each had been tagged alone.
+"""
+
+import json
+import shutil
+import threading
+import time
+import urllib.request
+
+import pytest
+
+import server
+
+class FakeTagged:
+    def __init__(self, text):
+        self._text = text
+
+    def text(self):
+        return self._text
+
+    def tokens(self):
+        return []
+
+    def unknowns(self):
+        return []
+
+    def tsv(self):
+        return self._text + "\n"
+
+class FakeTagger:
+    """ Tags each line of a text as a paragraph, and records the texts of each call. A text containing "bad" makes the whole call fail. While hold() is in force, calls wait until release()."""
+    def __init__(self):
+        self.calls = []
+        self.started = threading.Event()
+        self._open = threading.Event()
+        self._open.set()
+
+    def hold(self):
+        self._open.clear()
+
+    def release(self):
+        self._open.set()
+
+    def tag_texts(self, texts):
+        self.calls.append(list(texts))
+        self.started.set()
+        self._open.wait()
+        for text in texts:
+            if "bad" in text:
+                raise ValueError("can't tag {}".format(text))
+        return [[FakeTagged(line) for line in text.splitlines() if line != ""] for text in texts]
+
+def send_requests(service, texts):
+    """ Send each text from a thread of its own, returning the threads and a dict which will hold each text's results or error """
+    results = {}
+    def request(text):
+        try:
+            results[text] = service.tag(text)
+        except Exception as error:
+            results[text] = error
+    threads = [threading.Thread(target=request, args=(text,)) for text in texts]
+    for thread in threads:
+        thread.start()
+    return threads, results
+
+def wait_for_queue(service, waiting):
+    deadline = time.monotonic() + 5
+    while service.waiting() < waiting and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+def test_waiting_requests_are_tagged_together():
+    tagger = FakeTagger()
+    tagger.hold()
+    service = server.TaggingService(tagger)
+    first, results = send_requests(service, ["un"])
+    tagger.started.wait(5)
+    others, more_results = send_requests(service, ["dau\ndwy", "tri"])
+    wait_for_queue(service, 2)
+    tagger.release()
+    for thread in first + others:
+        thread.join(5)
+    results.update(more_results)
+    assert tagger.calls[0] == ["un"]
+    assert sorted(tagger.calls[1]) == ["dau\ndwy", "tri"]
+    assert len(tagger.calls) == 2
+    for text in ["un", "dau\ndwy", "tri"]:
+        assert [tagged.text() for tagged in results[text]] == text.splitlines()
+
+def test_a_failing_request_does_not_fail_its_batch():
+    tagger = FakeTagger()
+    tagger.hold()
+    service = server.TaggingService(tagger)
+    first, results = send_requests(service, ["un"])
+    tagger.started.wait(5)
+    others, more_results = send_requests(service, ["bad", "dau"])
+    wait_for_queue(service, 2)
+    tagger.release()
+    for thread in first + others:
+        thread.join(5)
+    results.update(more_results)
+    assert isinstance(results["bad"], ValueError)
+    assert [tagged.text() for tagged in results["dau"]] == ["dau"]
+    assert [tagged.text() for tagged in results["un"]] == ["un"]
+    # the failed batch, then each of its requests on its own
+    assert sorted(tagger.calls[1]) == ["bad", "dau"]
+    assert sorted(tagger.calls[2:]) == [["bad"], ["dau"]]
+
+def test_http_requests():
+    service = server.TaggingService(FakeTagger())
+    http_server = server.make_server(service, port=0)
+    thread = threading.Thread(target=http_server.serve_forever, daemon=True)
+    thread.start()
+    address = "http://127.0.0.1:{}".format(http_server.server_address[1])
+    try:
+        body = "un\ndau".encode("utf-8")
+        with urllib.request.urlopen(urllib.request.Request(address + "/tag?format=json", data=body, method="POST")) as response:
+            assert [paragraph["text"] for paragraph in json.load(response)["paragraphs"]] == ["un", "dau"]
+        with urllib.request.urlopen(urllib.request.Request(address + "/tag", data=body, method="POST")) as response:
+            assert response.read().decode("utf-8") == "un\ndau\n"
+        with urllib.request.urlopen(address + "/health") as response:
+            assert json.load(response)["status"] == "ok"
+    finally:
+        http_server.shutdown()
+        http_server.server_close()
+
+def test_tag_texts_matches_tagging_each_text_alone(built_lexica, tmp_path, monkeypatch):
+    if shutil.which("vislcg3") == None:
+        pytest.skip("vislcg3 is not installed")
+    from postagger import cg
+    monkeypatch.setattr(cg, "grammar_cache", tmp_path)
+    import app
+    # texts which don't end in punctuation, and which the grammar merges cohorts in
+    texts = ["Mae hi'n braf heddiw", "Dw i'n mynd yr un ffordd\nRoedd hi o'r gorau", "Helo. Sut wyt ti?"]
+    with app.Tagger(language="e") as tagger:
+        batched = tagger.tag_texts(texts)
+        for text, tagged in zip(texts, batched):
+            alone = tagger.tag_text(text)
+            assert [(para.cg_input(), para.cg_output(), para.tsv()) for para in tagged] == [(para.cg_input(), para.cg_output(), para.tsv()) for para in alone]
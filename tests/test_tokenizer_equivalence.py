@@ -0,0 +1,181 @@
+"""
+Checks that the faster tokenizer code gives the same results as the code it replaced. Each replaced piece of code is kept here as it was (the regular expressions are rebuilt from the lists in admin_refs that they were made from), and compared with the tokenizer on random strings made of the pieces most likely to trip it up. Run with "python -m pytest" from the top of the repository.
+"""
+
+import random
+import re
+
+import pytest
+
+from postagger.reference_lists.admin_refs import top_level_domains, moji_literals, hashtag, username
+
+# Number of random strings each check is run on
+ROUNDS = 20000
+
+TLD_ALTERNATION = "|".join(top_level_domains)
+OLD_EMAIL = re.compile(r"([a-zA-Z0-9\.\-_]+@[a-zA-Z0-9\-\._]+\.(?:" + TLD_ALTERNATION + "))")
+OLD_URL = re.compile(r"((?:https?://)?[a-zA-Z0-9\.\-_]+\.(?:" + TLD_ALTERNATION + "))")
+OLD_MOJI = re.compile(r"(?<![A-Za-z])(" + "|".join(re.escape(literal) for literal in moji_literals) + r")(?![A-Za-z])")
+OLD_SENTENCE_SPLIT = re.compile(r"(?<=[.|!|?])(?<!\s[A-Z][.])(?<![A-Z][.][A-Z][.])(?<![.]\s[.])(?<![.][.])[\s]")
+
+class OldPattern:
+    """ One of the old email and URL regexes, used in place of the scanner in special_tokens """
+    def __init__(self, regex):
+        self._regex = regex
+
+    def search(self, text):
+        return self._regex.search(text)
+
+    def split(self, text):
+        return self._regex.split(text)
+
+    def fullmatch(self, text):
+        return self._regex.fullmatch(text)
+
+class OldMoji:
+    """ The old emoticon regex, used in place of the trie in special_tokens """
+    def search(self, text):
+        moji_search = re.findall(OLD_MOJI, text)
+        if len(moji_search) != 0:
+            return moji_search[0]
+        return None
+
+def random_strings(seed, pieces, max_pieces):
+    rand = random.Random(seed)
+    for i in range(ROUNDS):
+        yield "".join(rand.choice(pieces) for piece in range(rand.randint(0, max_pieces)))
+
+ADDRESS_PIECES = ["a", "b", "Z", "9", ".", "-", "_", "@", "/", ":", " ", "com", "co", "uk", "cymru", "wales", "org", "c", "o", "http://", "https://", "www.", ".com", ".uk", "xn--p1ai", "#"]
+MOJI_PIECES = list(set("".join(moji_literals))) + ["a", "Z", " ", ":)", ":-)", "xD", "<3", ";)", "^_^"]
+WORD_PIECES = ["a", "b", "Cymru", "mae", "'", "''", "-", ".", ",", "!", "?", "(", ")", '"', "#", "@", "_", "1", "www.", ".com", "bbc.co.uk", "fi@example.com", "http://", ":)", ":D", "xD", " ", "ll", "w", "y", "n"]
+SENTENCE_PIECES = ["a", "B", "cd", "Mae", " ", "  ", "\t", " ", ".", ". ", "!", "?", "|", "...", " U.S. ", " A. ", "'", "’", "“", "–", "â", "ŵ", "><", "<en>", "</en>", '<en:gair="hi">', "[##", "##]", "[~", "~]", "[*", "*]", "saib", ":)", "bbc.co.uk", "#tag", "@enw", "o'r", "i'r"]
+
+def old_sentence_raw(text):
+    """ Paragraph.sentence_raw before the single-pass splitter. It only split a sentence at its first ellipsis, where it now splits at every one, so the old split is applied again to what follows each ellipsis."""
+    split_sentences = []
+    for sentence in filter(None, re.split(OLD_SENTENCE_SPLIT, text)):
+        current = sentence.strip()
+        while current.find("...") != -1:
+            ellipsis = current.find("...")
+            split_sentences.append(current[:ellipsis+3].strip())
+            current = current[ellipsis+4:].strip()
+        split_sentences.append(current)
+    return split_sentences
+
+@pytest.fixture(scope="module")
+def tokenizer(built_lexica):
+    """ The tokenizer loads the lexica when it's imported, so it's only imported once they're known to be built """
+    from postagger import tokenizer
+    return tokenizer
+
+def old_words(tokenizer, sent):
+    """ Sentence.words before the fast path for sentences without markup """
+    word_list = []
+    sent_nbsp = sent._sent.replace("\xa0", " ")
+    sent_apos = (re.sub(r"[’‘`\xb4]", "'", sent_nbsp))
+    sent_quot = (re.sub(r"[“”]", '"', sent_apos))
+    sentence = (re.sub(r"[‑—–]", "-", sent_quot))
+    sentence = sentence.replace("><", "> <")
+    circ_replace = {"â":"\xe2", "ê":"\xea", "î":"\xee", "ô":"\xf4", "û":"\xfb", "ŷ":"ŷ", "ŵ":"ŵ"}
+    for char in circ_replace:
+        if char in sentence:
+            sentence = sentence.replace(char, circ_replace[char])
+    split = list(filter(None, re.split(tokenizer.REGEX["space"], sentence)))
+    split_list = []
+    for sl in split:
+        if sl.find("<en") != -1:
+            if sl.count("<en") == sl.count("</en>"):
+                split_list += list(filter(None, re.split(tokenizer.REGEX["en_split"], sl)))
+            else:
+                detag = (re.sub(r"</?en[^>]*>", "", sl))
+                split_list.append(detag)
+        elif sl.find("[##") != -1:
+            if sl.count("[##") == sl.count("##]"):
+                split_list += list(filter(None, re.split(tokenizer.REGEX["code_split"], sl)))
+            else:
+                detag = (re.sub(r"(\[##|##\])", "", sl))
+                split_list.append(detag)
+        elif sl.find("[~") != -1 or sl.count("~]") != -1:
+            if sl.count("[~") == sl.count("~]"):
+                split_list += list(filter(None, re.split(tokenizer.REGEX["speaker_split"], sl)))
+            else:
+                detag = (re.sub(r"(\[~|~\])", "", sl))
+                split_list.append(detag)
+        elif sl.find("[*") != -1 or sl.count("*]") != -1:
+            if sl.count("[*") == sl.count("*]"):
+                split_list += list(filter(None, re.split(tokenizer.REGEX["stars"], sl)))
+            else:
+                detag = (re.sub(r"(\[\*|\*\])", "", sl))
+                split_list.append(detag)
+        elif sl != "":
+            split_list.append(sl)
+    for sl in split_list:
+        if sl.find("<en") != -1:
+            word_list += [tokenizer.Word(sl, category="en_tagged")]
+        elif sl.find("[##") != -1:
+            word_list += [tokenizer.Word(sl, category="anon")]
+        elif sl.find("[~") != -1:
+            word_list += [tokenizer.Word(sl, category="transcription_code")]
+        elif sl.find("[*") != -1:
+            word_list += [tokenizer.Word(sl, category="transcription_code")]
+        elif sl.isalpha():
+            word_list += [tokenizer.Word(sl, category="alpha")]
+        elif sl in tokenizer.ll_all:
+            word_list += [tokenizer.Word(sl)]
+        elif "''" in sl:
+            sl_spl = re.split(tokenizer.REGEX["quotes"], sl)
+            for slsp in sl_spl:
+                if set(slsp) != "'":
+                    word_list += tokenizer.WordString(slsp).punct_split()
+                else:
+                    word_list += [tokenizer.Word(slsp, category="punct")]
+        elif sl not in ["", " "]:
+            word_list += tokenizer.WordString(sl).punct_split()
+    word_list = list(filter(None, word_list))
+    return sent.mwus(word_list)
+
+def described(words):
+    return [(word.word(), word.category()) for word in words]
+
+def span(match):
+    if match == None:
+        return None
+    if isinstance(match, tuple):
+        return match
+    return match.span()
+
+def test_email_scanner(tokenizer):
+    for text in random_strings(1, ADDRESS_PIECES, 8):
+        assert span(tokenizer.email.search(text)) == span(OLD_EMAIL.search(text)), text
+        assert tokenizer.email.split(text) == OLD_EMAIL.split(text), text
+        assert bool(tokenizer.email.fullmatch(text)) == bool(OLD_EMAIL.fullmatch(text)), text
+
+def test_url_scanner(tokenizer):
+    for text in random_strings(2, ADDRESS_PIECES, 8):
+        assert span(tokenizer.url.search(text)) == span(OLD_URL.search(text)), text
+        assert tokenizer.url.split(text) == OLD_URL.split(text), text
+        assert bool(tokenizer.url.fullmatch(text)) == bool(OLD_URL.fullmatch(text)), text
+
+def test_moji_scanner(tokenizer):
+    old_moji = OldMoji()
+    for text in random_strings(3, MOJI_PIECES, 6):
+        assert tokenizer.moji.search(text) == old_moji.search(text), text
+
+def test_punct_split(tokenizer, monkeypatch):
+    texts = list(random_strings(4, WORD_PIECES, 6))
+    new_words = [described(tokenizer.WordString(text).punct_split()) for text in texts]
+    monkeypatch.setattr(tokenizer, "email", OldPattern(OLD_EMAIL))
+    monkeypatch.setattr(tokenizer, "url", OldPattern(OLD_URL))
+    monkeypatch.setattr(tokenizer, "moji", OldMoji())
+    for text, words in zip(texts, new_words):
+        assert words == described(tokenizer.WordString(text).punct_split()), text
+
+def test_words(tokenizer):
+    for text in random_strings(5, SENTENCE_PIECES, 12):
+        sent = tokenizer.Sentence(text, "000001", "tst.txt")
+        assert described(sent.words()) == described(old_words(tokenizer, sent)), text
+
+def test_sentence_raw(tokenizer):
+    for text in random_strings(6, SENTENCE_PIECES, 20):
+        para = tokenizer.Paragraph(text, "tst.txt", "000001", "n")
+        assert list(para.sentence_raw()) == old_sentence_raw(text), text